@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Transports the translation engine can send prompts to: OpenAI, Circuit, offline, and a local fake."""
+from __future__ import annotations
+
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+from tokens import TokenUsage
+
+if TYPE_CHECKING:
+    from circuitclient import CircuitClient
+
+CIRCUIT_MODEL = "gpt-4o-mini"
+# CIRCUIT_API_URL in the environment points the backend elsewhere, e.g. at stubserver.py.
+CIRCUIT_API_URL = os.environ.get(
+    "CIRCUIT_API_URL", f"https://chat-ai.cisco.com/openai/deployments/{CIRCUIT_MODEL}/chat/completions"
+)
+CIRCUIT_USER_FIELD = '{"appkey":"egai-prd-ther-020122487-coding-1758642862113"}'
+
+
+class Backend:
+    """Turns a prompt into MediaWiki text.
+
+    Subclasses set ``name`` (the ``-backend`` value), ``model`` (part of every cache key)
+    and ``output_path`` (where a single-file run writes). ``offline`` backends never see
+    a prompt: the engine renders their output with noprompt instead. ``batch`` backends
+    can run a chunked translation as one Batch API job.
+    """
+
+    name = ""
+    model = ""
+    output_path = Path("response.mw")
+    offline = False
+    batch = False
+
+    def prepare(self) -> None:
+        """Check credentials and set up clients before the first request is dispatched."""
+
+    def complete(self, prompt: str, usage: TokenUsage | None = None) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str, usage: TokenUsage | None = None) -> Iterator[str]:
+        """Yield the completion in pieces as it is generated; by default, all at once."""
+        yield self.complete(prompt, usage)
+
+    def report(self) -> str | None:
+        """A transport-specific line for the end-of-run summary, if any."""
+        return None
+
+    def batch_client(self):
+        """A client with OpenAI's Files and Batches APIs, for ``-submit-batch`` (backends with ``batch``)."""
+        raise NotImplementedError
+
+
+class OpenAIBackend(Backend):
+    name = "openai"
+    model = "gpt-4o"
+    output_path = Path("openairesponse.mw")
+    batch = True
+
+    def __init__(self) -> None:
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                api_key = os.environ.get("OPENAI_API_KEY")
+                if not api_key:
+                    raise SystemExit("OPENAI_API_KEY environment variable is not set.")
+                from openai import OpenAI
+
+                self._client = OpenAI(api_key=api_key)
+            return self._client
+
+    def prepare(self) -> None:
+        self._get_client()
+
+    def batch_client(self):
+        # OPENAI_BASE_URL in the environment points this at another server, e.g. stubserver.py.
+        return self._get_client()
+
+    def complete(self, prompt: str, usage: TokenUsage | None = None) -> str:
+        response = self._get_client().responses.create(
+            model=self.model,
+            input=prompt,
+        )
+        if usage is not None:
+            reported = response.usage
+            usage.record(prompt, reported.input_tokens if reported else None, reported.output_tokens if reported else None)
+        return response.output_text
+
+    def stream(self, prompt: str, usage: TokenUsage | None = None) -> Iterator[str]:
+        reported = None
+        for event in self._get_client().responses.create(model=self.model, input=prompt, stream=True):
+            if event.type == "response.output_text.delta":
+                yield event.delta
+            elif event.type == "response.completed":
+                reported = event.response.usage
+        if usage is not None:
+            usage.record(prompt, reported.input_tokens if reported else None, reported.output_tokens if reported else None)
+
+
+class CircuitBackend(Backend):
+    name = "circuit"
+    model = CIRCUIT_MODEL
+    output_path = Path("circuitresponse.mw")
+
+    def __init__(self) -> None:
+        self._client: CircuitClient | None = None
+        self._lock = threading.Lock()
+
+    def _get_client(self) -> CircuitClient:
+        # One pooled client shared by concurrent chunks and batch threads.
+        with self._lock:
+            if self._client is None:
+                # Imported here so runs on other backends never load requests.
+                from circuitclient import CircuitClient
+
+                self._client = CircuitClient.from_env(CIRCUIT_API_URL, CIRCUIT_USER_FIELD)
+            return self._client
+
+    def prepare(self) -> None:
+        self._get_client()
+
+    def complete(self, prompt: str, usage: TokenUsage | None = None) -> str:
+        content, reported = self._get_client().complete(prompt)
+        if usage is not None:
+            usage.record(prompt, reported.get("prompt_tokens"), reported.get("completion_tokens"))
+        return content
+
+    def stream(self, prompt: str, usage: TokenUsage | None = None) -> Iterator[str]:
+        reported: dict = {}
+        yield from self._get_client().stream(prompt, reported)
+        if usage is not None:
+            usage.record(prompt, reported.get("prompt_tokens"), reported.get("completion_tokens"))
+
+    def report(self) -> str | None:
+        return self._client.latency.summary() if self._client is not None else None
+
+
+class OfflineBackend(Backend):
+    """noprompt's local renderer: no requests, no tokens."""
+
+    name = "offline"
+    model = "noprompt"
+    output_path = Path("output.mw")
+    offline = True
+
+
+# Fake streams send their response in pieces about the size of a few tokens.
+STREAM_PIECE_CHARS = 16
+
+
+class FakeBackend(Backend):
+    """Answers locally with one placeholder row per prompted issue, for tests and benchmarks.
+
+    ``latency`` seconds are slept per request and ``failure_rate`` of requests raise, so
+    concurrency and fallback paths can be exercised without a network.
+    """
+
+    name = "fake"
+    model = "fake"
+    output_path = Path("fakeresponse.mw")
+    ISSUE_PATTERN = re.compile(r"^Issue \d+: (\S+) \| Summary: (.*?) \| Priority: ", re.MULTILINE)
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0) -> None:
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _respond(self, prompt: str, usage: TokenUsage | None) -> str:
+        with self._lock:
+            failed = self._random.random() < self.failure_rate
+        if failed:
+            raise RuntimeError("fake backend failure")
+        response = fake_response(prompt)
+        if usage is not None:
+            usage.record(prompt, usage.counter(prompt), usage.counter(response))
+        return response
+
+    def complete(self, prompt: str, usage: TokenUsage | None = None) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(prompt, usage)
+
+    def stream(self, prompt: str, usage: TokenUsage | None = None) -> Iterator[str]:
+        """The ``complete`` response in small pieces, with ``latency`` spread across them."""
+        pieces = split_pieces(self._respond(prompt, usage))
+        for piece in pieces:
+            if self.latency:
+                time.sleep(self.latency / len(pieces))
+            yield piece
+
+
+def fake_response(prompt: str) -> str:
+    """A fenced MediaWiki reply with one placeholder row per ``Issue N: KEY | Summary: ...`` line of ``prompt``."""
+    rows: list[str] = []
+    for key, summary in FakeBackend.ISSUE_PATTERN.findall(prompt):
+        rows.extend(["|-", f"| [https://splunk.atlassian.net/browse/{key} {key}]", f"| {summary}"])
+        rows.extend(["| &mdash;"] * 8)
+    return "```mediawiki\n" + "\n".join(rows) + "\n```"
+
+
+def split_pieces(text: str) -> list[str]:
+    return [text[start:start + STREAM_PIECE_CHARS] for start in range(0, len(text), STREAM_PIECE_CHARS)]
+
+
+BACKENDS: dict[str, type[Backend]] = {
+    backend.name: backend for backend in (OpenAIBackend, CircuitBackend, OfflineBackend, FakeBackend)
+}
+
+
+def make_backend(name: str) -> Backend:
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise SystemExit(f"Unknown backend: {name} (expected one of {', '.join(BACKENDS)}).") from None
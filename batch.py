@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Run a converter over many input files, optionally in parallel, and summarize the run."""
+from __future__ import annotations
+
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Sequence
+
+Convert = Callable[[Path, Path], None]
+
+# -watch defaults, here so the converters can parse them without importing watch.py.
+DEFAULT_DEBOUNCE_MS = 500
+DEFAULT_STATUS_PORT = 8765
+
+
+def pop_flag(args: list[str], name: str) -> bool:
+    """Remove the switch ``name`` from ``args`` and report whether it was present."""
+    if name not in args:
+        return False
+    args.remove(name)
+    return True
+
+
+def pop_value(args: list[str], name: str, default: str) -> str:
+    """Remove ``name VALUE`` from ``args`` and return VALUE, or ``default`` when absent."""
+    if name not in args:
+        return default
+    position = args.index(name)
+    if position + 1 >= len(args):
+        raise SystemExit(f"Error: {name} requires a value.")
+    value = args[position + 1]
+    del args[position:position + 2]
+    return value
+
+
+def pop_option(args: list[str], name: str, default: int) -> int:
+    """Remove ``name N`` from ``args`` and return N, or ``default`` when absent."""
+    text = pop_value(args, name, str(default))
+    try:
+        value = int(text)
+    except ValueError:
+        raise SystemExit(f"Error: {name} requires a whole number.") from None
+    if value < 1:
+        raise SystemExit(f"Error: {name} must be at least 1.")
+    return value
+
+
+def csv_batch_tasks(directory: Path, default_csv: Path, default_output: Path) -> list[tuple[Path, Path]]:
+    """Pair each CSV in ``directory`` with its output path, in a stable order.
+
+    The script's default CSV keeps the script's default output name; every other
+    CSV writes next to itself with the output suffix.
+    """
+    default_csv = default_csv.resolve()
+    tasks: list[tuple[Path, Path]] = []
+    for csv_file in sorted(directory.glob("*.csv")):
+        output_path = default_output if csv_file.resolve() == default_csv else csv_file.with_suffix(default_output.suffix)
+        tasks.append((csv_file, output_path))
+    return tasks
+
+
+def _convert_one(convert: Convert, input_path: Path, output_path: Path) -> tuple[str | None, float]:
+    started = time.perf_counter()
+    try:
+        convert(input_path, output_path)
+    except SystemExit as exc:
+        # The converters report bad input with SystemExit; contain it to this file.
+        return str(exc.code), time.perf_counter() - started
+    except Exception as exc:  # noqa: BLE001 - one bad file must not stop the batch
+        return f"{type(exc).__name__}: {exc}", time.perf_counter() - started
+    return None, time.perf_counter() - started
+
+
+def convert_tasks(
+    convert: Convert,
+    tasks: Sequence[tuple[Path, Path]],
+    jobs: int = 1,
+    executor: str = "process",
+) -> list[tuple[str | None, float]]:
+    """Convert every ``(input, output)`` pair; returns each file's error (``None`` on success) and seconds.
+
+    ``jobs`` > 1 fans the files out over a process pool (CPU-bound converters) or a
+    thread pool (``executor="thread"``, for converters that wait on the network).
+    """
+    if jobs > 1 and len(tasks) > 1:
+        pool_class: type[Executor] = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_class(max_workers=min(jobs, len(tasks))) as pool:
+            return list(pool.map(
+                _convert_one,
+                [convert] * len(tasks),
+                [input_path for input_path, _ in tasks],
+                [output_path for _, output_path in tasks],
+            ))
+    return [_convert_one(convert, input_path, output_path) for input_path, output_path in tasks]
+
+
+def run_batch(
+    convert: Convert,
+    tasks: Sequence[tuple[Path, Path]],
+    jobs: int = 1,
+    executor: str = "process",
+) -> int:
+    """Convert every ``(input, output)`` pair (see ``convert_tasks``) and print a throughput/failure summary.
+
+    Returns the number of files that failed.
+    """
+    started = time.perf_counter()
+    results = convert_tasks(convert, tasks, jobs, executor)
+    elapsed = time.perf_counter() - started
+
+    failures = [(input_path, error) for (input_path, _), (error, _) in zip(tasks, results) if error is not None]
+    rate = len(tasks) / elapsed if elapsed else float("inf")
+    print(
+        f"Processed {len(tasks)} files in {elapsed:.2f}s ({rate:.1f} files/s) with {jobs} job(s): "
+        f"{len(tasks) - len(failures)} succeeded, {len(failures)} failed."
+    )
+    for input_path, error in failures:
+        print(f"  FAILED {input_path}: {error}")
+    return len(failures)
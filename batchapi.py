@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Send a chunked translation as one OpenAI Batch API job instead of concurrent requests.
+
+Every chunk prompt becomes one line of a JSONL job file (``<output stem>.batch.jsonl``),
+with ``custom_id`` ``chunk-N``. The file is uploaded, a batch is created, and its
+status is polled with exponential backoff until the batch finishes. The results
+are matched back to their chunks by ``custom_id``. A batch can take up to 24 hours,
+but it is billed at half the synchronous price and is not held to the per-minute
+rate limits.
+
+The batch ID is saved in ``<output stem>.batch.json``, so an interrupted run
+(Ctrl+C, a closed laptop) resumes polling the same batch instead of submitting a
+new one. Both files are removed once the batch's results are collected.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from tokens import TokenUsage
+
+BATCH_ENDPOINT = "/v1/responses"
+COMPLETION_WINDOW = "24h"
+POLL_FIRST_SECONDS = 10
+POLL_MAX_SECONDS = 300
+FINISHED = {"completed", "failed", "expired", "cancelled"}
+
+
+def job_path_for(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}.batch.jsonl")
+
+
+def state_path_for(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}.batch.json")
+
+
+def custom_id(number: int) -> str:
+    return f"chunk-{number}"
+
+
+def job_lines(model: str, prompts: list[str]) -> list[str]:
+    return [
+        json.dumps(
+            {"custom_id": custom_id(number), "method": "POST", "url": BATCH_ENDPOINT, "body": {"model": model, "input": prompt}}
+        )
+        for number, prompt in enumerate(prompts, start=1)
+    ]
+
+
+def response_text(body: dict) -> str:
+    """The text of a Responses API result, as the SDK's ``output_text`` would give it."""
+    return "".join(
+        part.get("text", "")
+        for item in body.get("output", [])
+        if item.get("type") == "message"
+        for part in item.get("content", [])
+        if part.get("type") == "output_text"
+    )
+
+
+def parse_results(text: str) -> dict[str, tuple[str | Exception, dict]]:
+    """Map each ``custom_id`` in a batch output or error file to its reply (or error) and reported usage."""
+    results: dict[str, tuple[str | Exception, dict]] = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or body.get("error") or {}
+            message = error.get("message") if isinstance(error, dict) else str(error)
+            results[record["custom_id"]] = (RuntimeError(message or f"HTTP {response.get('status_code')}"), {})
+        else:
+            results[record["custom_id"]] = (response_text(body), body.get("usage") or {})
+    return results
+
+
+def _save_state(path: Path, state: dict) -> None:
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        json.dump(state, handle, indent=2)
+    os.replace(temp_name, path)
+
+
+class BatchSubmitter:
+    """A ``chunked.Submit`` that runs the prompts as one batch job through an OpenAI client.
+
+    ``client`` is called once, when there is something to submit or resume, and
+    must return an ``openai.OpenAI`` (or a client with the same ``files`` and
+    ``batches`` resources, such as one pointed at stubserver.py).
+    """
+
+    def __init__(
+        self,
+        client: Callable[[], Any],
+        model: str,
+        output_path: Path,
+        usage: TokenUsage | None = None,
+        poll_seconds: float = POLL_FIRST_SECONDS,
+    ) -> None:
+        self.client = client
+        self.model = model
+        self.job_path = job_path_for(output_path)
+        self.state_path = state_path_for(output_path)
+        self.usage = usage
+        self.poll_seconds = poll_seconds
+
+    def __call__(self, prompts: list[str]) -> list[str | Exception]:
+        lines = job_lines(self.model, prompts)
+        digest = hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+        client = self.client()
+        batch_id = self._resumable(digest)
+        if batch_id is None:
+            batch_id = self._submit(client, lines, digest)
+        else:
+            print(f"Resuming batch {batch_id} from {self.state_path}.")
+        try:
+            batch = self._wait(client, batch_id)
+        except KeyboardInterrupt:
+            raise SystemExit(f"Stopped polling batch {batch_id}; rerun the same command to pick up its results.") from None
+        if batch.status != "completed":
+            errors = [error.message for error in (batch.errors.data or [])] if batch.errors else []
+            print(f"Batch {batch_id} {batch.status}{': ' + '; '.join(errors) if errors else ''}.")
+
+        results: dict[str, tuple[str | Exception, dict]] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                results.update(parse_results(client.files.content(file_id).text))
+        # The batch is finished: its results are used now, and cached per chunk by the caller.
+        self.state_path.unlink(missing_ok=True)
+        self.job_path.unlink(missing_ok=True)
+
+        replies: list[str | Exception] = []
+        for number, prompt in enumerate(prompts, start=1):
+            reply, reported = results.get(custom_id(number), (RuntimeError(f"no result; the batch {batch.status}"), {}))
+            if self.usage is not None and not isinstance(reply, Exception):
+                self.usage.record(prompt, reported.get("input_tokens"), reported.get("output_tokens"))
+            replies.append(reply)
+        return replies
+
+    def _resumable(self, digest: str) -> str | None:
+        """The ID of a batch already submitted for exactly these prompts, if one is on record."""
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        return state.get("batch_id") if state.get("digest") == digest else None
+
+    def _submit(self, client: Any, lines: list[str], digest: str) -> str:
+        self.job_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        with self.job_path.open("rb") as handle:
+            uploaded = client.files.create(file=handle, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=uploaded.id, endpoint=BATCH_ENDPOINT, completion_window=COMPLETION_WINDOW
+        )
+        _save_state(self.state_path, {"batch_id": batch.id, "digest": digest, "job_file": str(self.job_path)})
+        print(f"Submitted batch {batch.id} with {len(lines)} requests from {self.job_path}.")
+        return batch.id
+
+    def _wait(self, client: Any, batch_id: str) -> Any:
+        """Poll until the batch finishes, doubling the interval up to ``POLL_MAX_SECONDS``."""
+        interval = self.poll_seconds
+        last = None
+        while True:
+            batch = client.batches.retrieve(batch_id)
+            counts = batch.request_counts
+            progress = f"{counts.completed + counts.failed}/{counts.total}" if counts and counts.total else "-"
+            if (batch.status, progress) != last:
+                print(f"Batch {batch_id}: {batch.status}, {progress} requests done.")
+                last = (batch.status, progress)
+            if batch.status in FINISHED:
+                return batch
+            time.sleep(interval)
+            interval = min(interval * 2, POLL_MAX_SECONDS)
@@ -0,0 +1,622 @@
+#!/usr/bin/env python3
+"""Benchmarks for the ReXML converters, run against synthetic Jira exports and conf.spec files."""
+from __future__ import annotations
+
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import noprompt
+from batch import pop_option, pop_value
+
+DEFAULT_ROWS = 100_000
+DEFAULT_WIDTH = 300
+DEFAULT_SPEC_FILES = 20
+DEFAULT_STANZAS = 500
+SUITE_ROWS = 2000
+SUITE_REPEAT = 3
+FAKE_LATENCY_MS = 20
+HISTORY_PATH = Path("bench-history.jsonl")
+# A benchmark whose best time is this many percent slower than its recent history is a regression.
+REGRESSION_PERCENT = 15
+HISTORY_WINDOW = 5
+STARTUP_REPEAT = 5
+MARKUP_REPEAT = 20
+# The real export's width, and its columns in order with how often each repeats.
+REAL_WIDTH = 2261
+HEADER_SHAPE = (
+    ("Summary", 1),
+    ("Issue key", 1),
+    ("Issue id", 1),
+    ("Issue Type", 1),
+    ("Status", 1),
+    ("Project key", 1),
+    ("Priority", 1),
+    ("Resolution", 1),
+    ("Assignee", 1),
+    ("Reporter", 1),
+    ("Created", 1),
+    ("Updated", 1),
+    ("Resolved", 1),
+    ("Affects versions", 165),
+    ("Fix versions", 8),
+    ("Components", 4),
+    ("Labels", 7),
+    ("Description", 1),
+    ("Environment", 1),
+    ("Watchers", 35),
+    ("Watchers Id", 35),
+    ("Inward issue link (Cloners)", 7),
+    ("Outward issue link (Relates)", 5),
+    ("Attachment", 36),
+    ("Sprint", 27),
+    ("Comment", 80),
+)
+# Groups narrowed in proportion when a benchmark asks for fewer than REAL_WIDTH columns.
+SCALED_COLUMNS = {"Affects versions", "Watchers", "Watchers Id", "Attachment", "Sprint", "Comment"}
+
+PRIORITIES = ("P1-Immediate", "P2-High", "P3-Medium", "P4-Low", "Unknown")
+STATUSES = ("Closed", "Resolved", "Done", "Untriaged")
+RESOLUTIONS = ("Fixed", "Done", "", "Won't Fix", "Duplicate")
+ISSUE_TYPES = ("Bug", "Task", "Story")
+COMPONENTS = ("Search", "Indexer", "Forwarder", "KV Store", "Deployment Server", "Ingest Actions")
+VERSIONS = ("9.2.3", "9.3.1", "9.4.0", "9.4.2", "10.0.0", "10.0.1")
+LABELS = ("customer", "regression", "docs", "sustain", "security")
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+AFFECTS_VERSIONS = tuple(f"{major}.{minor}.{patch}" for major in (8, 9, 10) for minor in range(5) for patch in range(12))
+# Start-up case -> (python arguments, top-level modules that must not be imported).
+# Each heavy dependency should load only on the code path that uses it.
+_HEAVY = {"openai", "pandas", "requests", "lxml", "asyncio", "http"}
+STARTUP_CASES = {
+    "rexml -h": (["rexml.py", "-h"], _HEAVY),
+    "import noprompt": (["-c", "import noprompt"], _HEAVY),
+    "import engine": (["-c", "import engine"], _HEAVY),
+    "import issuestore": (["-c", "import issuestore"], _HEAVY),
+    "import spexml": (["-c", "import spexml"], _HEAVY - {"lxml"}),
+    "engine -h": (["engine.py", "-h"], _HEAVY),
+}
+SPEC_VALUES = ("<string>", "<boolean>", "<integer>", "<positive integer>", "<comma-separated list>", "<regular expression>")
+
+
+def synthetic_header(width: int) -> list[str]:
+    """A header laid out like a real export; the large repeated groups shrink when ``width`` is narrower."""
+    scale = min(1.0, width / REAL_WIDTH)
+    header: list[str] = []
+    for name, repeat in HEADER_SHAPE:
+        if name in SCALED_COLUMNS:
+            repeat = max(1, round(repeat * scale))
+        header += [name] * repeat
+    header += [f"Custom field ({i})" for i in range(max(0, width - len(header)))]
+    return header
+
+
+def jira_date(rng: random.Random) -> str:
+    return f"{rng.randint(1, 28):02d}/{rng.choice(MONTHS)}/25 {rng.randint(1, 12)}:{rng.randrange(60):02d} {rng.choice('AP')}M"
+
+
+def synthetic_description(rng: random.Random) -> str:
+    """Multi-line prose, sometimes with a pasted {noformat} log, averaging a couple of KB like real tickets."""
+    lines = [
+        f"Customers running {rng.choice(COMPONENTS)} on {rng.choice(VERSIONS)} report that event {rng.randrange(10**6)} "
+        f"is dropped after the forwarder reconnects to indexer {rng.randrange(100)}."
+        for _ in range(rng.randint(2, 12))
+    ]
+    if rng.random() < 0.3:
+        trace = [f"  at com.splunk.Worker.run(Worker.java:{rng.randrange(1000)})" for _ in range(rng.randint(5, 40))]
+        lines += ["{noformat}", *trace, "{noformat}"]
+    if rng.random() < 0.1:
+        original = f"https://splunk.atlassian.net/browse/SPL-{rng.randrange(200000, 300000)}"
+        lines.insert(0, f"This ticket is a backport of [{original}|{original}|smart-link]")
+    return "\n\n".join(lines)
+
+
+def synthetic_rows(header: Sequence[str], count: int, seed: int = 0) -> Iterable[list[str]]:
+    rng = random.Random(seed)
+    index, repeated = noprompt.resolve_columns(header)
+    groups: dict[str, list[int]] = {}
+    for position, name in enumerate(header):
+        groups.setdefault(name, []).append(position)
+    for number in range(count):
+        row = [""] * len(header)
+        row[index["Summary"]] = f"Synthetic issue {number} in {rng.choice(COMPONENTS)} {rng.randrange(10**6)}"
+        row[index["Issue key"]] = f"SPL-{100000 + number}"
+        row[index["Issue Type"]] = rng.choice(ISSUE_TYPES)
+        row[index["Status"]] = rng.choice(STATUSES)
+        row[index["Resolution"]] = rng.choice(RESOLUTIONS)
+        row[index["Priority"]] = rng.choice(PRIORITIES)
+        row[index["Description"]] = synthetic_description(rng)
+        row[index["Updated"]] = jira_date(rng)
+        for column in ("Created", "Resolved"):
+            row[groups[column][0]] = jira_date(rng)
+        for column, choices in (("Fix versions", VERSIONS), ("Components", COMPONENTS), ("Labels", LABELS)):
+            positions = repeated[column]
+            for position, value in zip(positions, rng.sample(choices, rng.randint(0, min(len(positions), len(choices))))):
+                row[position] = value
+
+        # The wide, mostly ignored groups that make real exports expensive to parse.
+        affects = groups["Affects versions"]
+        for position, value in zip(affects, rng.sample(AFFECTS_VERSIONS, rng.randint(0, len(affects)))):
+            row[position] = value
+        watchers = rng.randint(1, len(groups["Watchers"]))
+        for position, id_position in zip(groups["Watchers"][:watchers], groups["Watchers Id"]):
+            row[position] = f"Watcher {rng.randrange(5000)}"
+            row[id_position] = f"557058:{rng.getrandbits(128):032x}"
+        for position in groups["Comment"][:rng.randint(0, min(30, len(groups["Comment"])))]:
+            row[position] = (
+                f"{jira_date(rng)};557058:{rng.getrandbits(64):016x};"
+                + " ".join(f"note{rng.randrange(10**4)}" for _ in range(rng.randint(10, 120)))
+            )
+        for position in groups["Sprint"][:rng.randint(0, 3)]:
+            row[position] = f"Sprint {rng.randrange(300)}"
+        if rng.random() < 0.2:
+            row[groups["Inward issue link (Cloners)"][0]] = f"SPL-{rng.randrange(200000, 300000)}"
+        yield row
+
+
+def write_synthetic_export(path: Path, rows: int, width: int = DEFAULT_WIDTH, seed: int = 0) -> Path:
+    header = synthetic_header(width)
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(header)
+        writer.writerows(synthetic_rows(header, rows, seed))
+    return path
+
+
+def synthetic_spec_lines(stanzas: int, seed: int = 0) -> Iterable[str]:
+    """A conf.spec with a comment preamble and stanzas of described settings, defaults, and examples."""
+    rng = random.Random(seed)
+    yield "#   Version 10.0.0\n"
+    yield "#\n"
+    yield "# This file contains possible setting/value pairs for a synthetic configuration file.\n"
+    yield "#" * 76 + "\n"
+    for number in range(stanzas):
+        yield "\n"
+        yield f"[stanza_{number}://<name>]\n"
+        yield f"* Settings for synthetic input {number}.\n"
+        for setting in range(rng.randint(1, 25)):
+            yield "\n"
+            yield f"setting_{setting} = {rng.choice(SPEC_VALUES)}\n"
+            for bullet in range(rng.randint(1, 4)):
+                yield f"* Describes behaviour {rng.randrange(10**6)} of setting_{setting} when the\n"
+                yield f"  indexer receives {rng.randrange(10**4)} events per second.\n"
+            if rng.random() < 0.2:
+                yield "* Examples:\n"
+                yield f"    setting_{setting} = {rng.randrange(100)}\n"
+            yield f"* Default: {rng.choice(('true', 'false', '0', '100', 'not set'))}\n"
+
+
+def write_synthetic_spec(path: Path, stanzas: int, seed: int = 0) -> Path:
+    with path.open("w", encoding="utf-8") as handle:
+        handle.writelines(synthetic_spec_lines(stanzas, seed))
+    return path
+
+
+def plain_dedupe(values: Iterable[str]) -> list[str]:
+    ordered: list[str] = []
+    for value in values:
+        cleaned = value.strip()
+        if cleaned and cleaned not in ordered:
+            ordered.append(cleaned)
+    return ordered
+
+
+def dict_issues(path: Path) -> list[dict]:
+    """The pre-Issue representation: one dict of uninterned strings and lists per ticket."""
+    rows = noprompt.iter_csv_rows(path)
+    header = next(rows)
+    index, repeated = noprompt.resolve_columns(header)
+    issues: list[dict] = []
+    for row in rows:
+        summary = row[index["Summary"]].strip()
+        resolution = row[index["Resolution"]].strip()
+        if not summary or resolution.lower() not in noprompt.INCLUDED_RESOLUTIONS:
+            continue
+        fix_versions = plain_dedupe(row[i] for i in repeated["Fix versions"]) or ["Unscheduled"]
+        issues.append({
+            "summary": summary,
+            "key": row[index["Issue key"]].strip(),
+            "issue_type": row[index["Issue Type"]].strip(),
+            "status": row[index["Status"]].strip(),
+            "resolution": resolution,
+            "priority": row[index["Priority"]].strip(),
+            "description": row[index["Description"]],
+            "fix_versions": fix_versions,
+            "all_fix_versions": fix_versions,
+            "components": plain_dedupe(row[i] for i in repeated["Components"]),
+            "labels": plain_dedupe(row[i] for i in repeated["Labels"]),
+        })
+    return issues
+
+
+def measure(label: str, build) -> int:
+    tracemalloc.start()
+    started = time.perf_counter()
+    kept = build()
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>8}: {len(kept):>8} issues  {retained / 2**20:8.1f} MiB retained  "
+          f"{peak / 2**20:8.1f} MiB peak  {elapsed:6.2f}s")
+    del kept
+    return retained
+
+
+def bench_memory(rows: int, width: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_synthetic_export(Path(tmp) / "synthetic.csv", rows, width)
+        print(f"Synthetic export: {rows} rows x {width} columns, {path.stat().st_size / 2**20:.1f} MiB")
+        before = measure("dict", lambda: dict_issues(path))
+        after = measure("Issue", lambda: list(noprompt.iter_issues(path)))
+    print(f"Issue records retain {100 * (1 - after / before):.0f}% less memory than per-row dicts.")
+
+
+def legacy_sanitize_cell(text: str) -> str:
+    """The sanitizer build_table_rows used before precompiled, guarded passes."""
+    cleaned = text.strip()
+    if not cleaned:
+        return "&mdash;"
+    cleaned = cleaned.replace("\r\n", "\n").replace("\r", "\n")
+    cleaned = re.sub(r"\n{2,}", "\n", cleaned)
+    return cleaned.replace("\n", "<br/>")
+
+
+def profile(run) -> tuple[float, int]:
+    """Wall time and traced peak allocation of ``run()``."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench_render(rows: int, width: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_synthetic_export(Path(tmp) / "synthetic.csv", rows, width)
+        grouped = noprompt.group_by_fix_version(noprompt.iter_issues(path))
+        count = sum(len(issues) for issues in grouped.values())
+        print(f"Synthetic export: {rows} rows, {count} table rows across {len(grouped)} fix versions")
+        output = Path(tmp) / "output.mw"
+
+        def in_memory() -> None:
+            output.write_text(noprompt.build_release_notes(grouped), encoding="utf-8")
+
+        def streaming() -> None:
+            with output.open("w", encoding="utf-8", buffering=noprompt.OUTPUT_BUFFER_BYTES) as handle:
+                noprompt.write_release_notes(grouped, handle)
+
+        for label, run in (("joined", in_memory), ("streamed", streaming)):
+            noprompt.sanitize_repeated.cache_clear()
+            noprompt.format_repeated.cache_clear()
+            noprompt.jira_to_mediawiki.cache_clear()
+            elapsed, peak = profile(run)
+            print(f"{label:>8}: {count / elapsed:10.0f} rows/s  {peak / 2**20:8.1f} MiB peak  {elapsed:6.2f}s")
+
+        descriptions = [issue.description for issues in grouped.values() for issue in issues]
+        for label, sanitize in (("legacy", legacy_sanitize_cell), ("current", noprompt.sanitize_cell)):
+            started = time.perf_counter()
+            for text in descriptions:
+                sanitize(text)
+            elapsed = time.perf_counter() - started
+            print(f"{label:>8} sanitize_cell: {len(descriptions) / elapsed:10.0f} cells/s")
+
+
+def bench_markup(path: Path, repeat: int) -> None:
+    """Description cells/s for sanitize_cell and for the Jira-markup converter, uncached and cached, on a real export."""
+    from jiramarkup import jira_to_mediawiki
+
+    descriptions = [issue.description for issue in noprompt.iter_issues(path, resolutions=None)]
+    size = sum(len(text.encode("utf-8")) for text in descriptions) / 2**20
+    print(f"{path}: {len(descriptions)} descriptions ({len(set(descriptions))} distinct), {size:.2f} MiB, x{repeat}")
+
+    def cached() -> None:
+        # A cold cache per pass, as one run of noprompt.py sees it: only repeated descriptions hit.
+        jira_to_mediawiki.cache_clear()
+        for text in descriptions:
+            jira_to_mediawiki(text)
+
+    for label, run in (
+        ("sanitize_cell", lambda: [noprompt.sanitize_cell(text) for text in descriptions]),
+        ("uncached", lambda: [jira_to_mediawiki.__wrapped__(text) for text in descriptions]),
+        ("cached", cached),
+    ):
+        elapsed = min(time_runs(run, repeat))
+        print(f"{label:>14}: {len(descriptions) / elapsed:10.0f} cells/s  {size / elapsed:7.1f} MiB/s")
+    before = sum(len(noprompt.sanitize_cell(text)) for text in descriptions)
+    after = sum(len(jira_to_mediawiki(text)) for text in descriptions)
+    print(f"Converted cells are {100 * (1 - after / before):.0f}% smaller ({before} -> {after} characters).")
+
+
+def bench_parse(rows: int, width: int, jobs: int) -> None:
+    """Serial parsing against parallelcsv at 2, 4, ... up to ``jobs`` processes, on one synthetic export."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_synthetic_export(Path(tmp) / "synthetic.csv", rows, width)
+        size = path.stat().st_size
+        print(f"Synthetic export: {rows} rows x {width} columns, {size / 2**20:.1f} MiB, {os.cpu_count()} CPUs")
+        counts = [1]
+        while counts[-1] * 2 <= jobs:
+            counts.append(counts[-1] * 2)
+        if counts[-1] != jobs:
+            counts.append(jobs)
+        serial = None
+        for parse_jobs in counts:
+            started = time.perf_counter()
+            issues = sum(1 for _ in noprompt.iter_issues(path, parse_jobs=parse_jobs))
+            elapsed = time.perf_counter() - started
+            serial = serial or elapsed
+            print(f"{parse_jobs:>3} jobs: {issues:>8} issues  {size / 2**20 / elapsed:8.1f} MiB/s  "
+                  f"{elapsed:6.2f}s  {serial / elapsed:5.2f}x")
+
+
+def legacy_stanza_scan(path: Path) -> int:
+    """The header detection spexml used before confspec: an uncompiled match per stripped line."""
+    with path.open(encoding="utf-8") as handle:
+        return sum(1 for line in handle if re.match(r"^\[.*\]$", line.strip()))
+
+
+def bench_spec(files: int, stanzas: int) -> None:
+    import confspec
+    import spexml  # needs lxml, which the Jira benchmarks do not
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = [write_synthetic_spec(Path(tmp) / f"synthetic{n}.conf.spec", stanzas, seed=n) for n in range(files)]
+        size = sum(path.stat().st_size for path in corpus) / 2**20
+        lines = 0
+        for path in corpus:
+            with path.open(encoding="utf-8") as handle:
+                lines += sum(1 for _ in handle)
+        print(f"Synthetic corpus: {files} specs x {stanzas} stanzas, {lines} lines, {size:.1f} MiB")
+
+        def scan(parse) -> None:
+            for path in corpus:
+                with path.open(encoding="utf-8") as handle:
+                    for _ in parse(handle):
+                        pass
+
+        for label, run in (
+            ("legacy", lambda: [legacy_stanza_scan(path) for path in corpus]),
+            ("tokenize", lambda: scan(confspec.tokenize)),
+            ("model", lambda: scan(confspec.iter_stanzas)),
+        ):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            print(f"{label:>10}: {lines / elapsed:10.0f} lines/s  {size / elapsed:7.1f} MiB/s")
+
+        for label, structured in (("codeblock", False), ("structured", True)):
+            def convert() -> None:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for path in corpus:
+                        spexml.parse_splunk_conf_spec(path, path.with_suffix(".xml"), structured)
+
+            started = time.perf_counter()
+            convert()
+            elapsed = time.perf_counter() - started
+            print(f"{label:>10}: {files / elapsed:10.1f} files/s  {size / elapsed:7.1f} MiB/s")
+
+
+def git_revision() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def time_runs(run, repeat: int) -> list[float]:
+    """Wall time of ``repeat`` quiet runs of ``run()``."""
+    times: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def recent_history(path: Path, params: dict) -> list[dict]:
+    """The last HISTORY_WINDOW results recorded with the same parameters, oldest first."""
+    if not path.exists():
+        return []
+    entries = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        entry = json.loads(line)
+        if entry["params"] == params:
+            entries.append(entry)
+    return entries[-HISTORY_WINDOW:]
+
+
+def bench_suite(
+    rows: int,
+    width: int,
+    files: int,
+    stanzas: int,
+    repeat: int,
+    latency_ms: int,
+    history_path: Path,
+    threshold_percent: int = REGRESSION_PERCENT,
+) -> int:
+    """Time every converter end to end, append the results to ``history_path`` and flag regressions.
+
+    Each case's best of ``repeat`` runs is compared with the median of its best times in
+    the recent history recorded with the same parameters. Returns the number of regressions.
+    """
+    import spexml  # needs lxml
+    from backends import FakeBackend
+    from engine import translate_file
+
+    params = {"rows": rows, "width": width, "files": files, "stanzas": stanzas, "latency_ms": latency_ms}
+    history = recent_history(history_path, params)
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        export = write_synthetic_export(directory / "synthetic.csv", rows, width)
+        corpus = [write_synthetic_spec(directory / f"synthetic{n}.conf.spec", stanzas, seed=n) for n in range(files)]
+        print(
+            f"Synthetic export: {rows} rows x {width} columns, {export.stat().st_size / 2**20:.1f} MiB; "
+            f"{files} specs x {stanzas} stanzas; fake backend latency {latency_ms} ms; best of {repeat}"
+        )
+        output = directory / "output.mw"
+        backend = FakeBackend(latency=latency_ms / 1000)
+        cases = {
+            "noprompt": lambda: noprompt.process_file(export, output),
+            "spexml": lambda: [spexml.parse_splunk_conf_spec(path, path.with_suffix(".xml")) for path in corpus],
+            "spexml-structured": lambda: [
+                spexml.parse_splunk_conf_spec(path, path.with_suffix(".xml"), True) for path in corpus
+            ],
+            "engine-single": lambda: translate_file(export, output, backend, use_cache=False),
+            "engine-chunked": lambda: translate_file(export, output, backend, chunked=True, use_cache=False),
+        }
+
+        results: dict[str, dict[str, float]] = {}
+        regressions = 0
+        for name, run in cases.items():
+            times = time_runs(run, repeat)
+            best = min(times)
+            results[name] = {"best": best, "median": statistics.median(times)}
+            verdict, regressed = compare_with_history(name, best, history, threshold_percent)
+            regressions += regressed
+            print(f"{name:>18}: best {best:7.3f}s  median {results[name]['median']:7.3f}s  {verdict}")
+
+    append_history(history_path, params, results)
+    print(f"Appended results to {history_path}; {regressions} regression(s).")
+    return regressions
+
+
+def compare_with_history(name: str, best: float, history: list[dict], threshold_percent: int) -> tuple[str, bool]:
+    """Describe ``best`` against the median of ``name``'s recent best times; True if it regressed."""
+    previous = [entry["results"][name]["best"] for entry in history if name in entry["results"]]
+    if not previous:
+        return "", False
+    change = best / statistics.median(previous) - 1
+    verdict = f"{change:+7.1%} vs. last {len(previous)} run(s)"
+    if change * 100 > threshold_percent:
+        return verdict + "  REGRESSION", True
+    return verdict, False
+
+
+def append_history(path: Path, params: dict, results: dict[str, dict[str, float]]) -> None:
+    entry = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "params": params,
+        "results": results,
+    }
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(entry) + "\n")
+
+
+def import_profile(argv: Sequence[str]) -> tuple[float, set[str]]:
+    """Run ``python -X importtime`` with ``argv``; returns the total import time (s) and the modules imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        cwd=Path(__file__).resolve().parent,
+        capture_output=True,
+        text=True,
+    )
+    total_us = 0
+    modules: set[str] = set()
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", one line per module
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            total_us += int(self_us)
+            modules.add(name.strip())
+    return total_us / 1e6, modules
+
+
+def bench_startup(repeat: int, history_path: Path, threshold_percent: int = REGRESSION_PERCENT) -> int:
+    """Measure each entry point's import time with ``-X importtime`` and check it skips heavy dependencies.
+
+    An entry point that imports one of its STARTUP_CASES forbidden modules fails the
+    run, as does one whose best import time regressed against the history.
+    Returns the number of failures.
+    """
+    params = {"benchmark": "startup"}
+    history = recent_history(history_path, params)
+    print(f"Import time with -X importtime, best of {repeat} (includes the interpreter's own site imports)")
+    results: dict[str, dict[str, float]] = {}
+    failures = 0
+    for name, (argv, forbidden) in STARTUP_CASES.items():
+        profiles = [import_profile(argv) for _ in range(repeat)]
+        times = [seconds for seconds, _ in profiles]
+        best = min(times)
+        results[name] = {"best": best, "median": statistics.median(times)}
+        verdict, regressed = compare_with_history(name, best, history, threshold_percent)
+        failures += regressed
+        loaded = sorted(module for module in profiles[0][1] if module.split(".")[0] in forbidden)
+        if loaded:
+            verdict += f"  IMPORTS {', '.join(loaded[:5])}"
+            failures += 1
+        print(f"{name:>18}: best {best * 1000:6.1f} ms  median {results[name]['median'] * 1000:6.1f} ms  {verdict}")
+
+    append_history(history_path, params, results)
+    print(f"Appended results to {history_path}; {failures} failure(s).")
+    return failures
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    benchmarks = {
+        "memory": lambda: bench_memory(pop_option(args, "-rows", DEFAULT_ROWS), pop_option(args, "-width", DEFAULT_WIDTH)),
+        "render": lambda: bench_render(pop_option(args, "-rows", DEFAULT_ROWS), pop_option(args, "-width", DEFAULT_WIDTH)),
+        "parse": lambda: bench_parse(
+            pop_option(args, "-rows", DEFAULT_ROWS), pop_option(args, "-width", DEFAULT_WIDTH), pop_option(args, "-jobs", os.cpu_count() or 1)
+        ),
+        "markup": lambda: bench_markup(
+            Path(pop_value(args, "-input", str(noprompt.CSV_PATH))),
+            pop_option(args, "-repeat", MARKUP_REPEAT),
+        ),
+        "spec": lambda: bench_spec(pop_option(args, "-files", DEFAULT_SPEC_FILES), pop_option(args, "-stanzas", DEFAULT_STANZAS)),
+        "startup": lambda: bench_startup(
+            pop_option(args, "-repeat", STARTUP_REPEAT),
+            Path(pop_value(args, "-history", str(HISTORY_PATH))),
+            pop_option(args, "-threshold", REGRESSION_PERCENT),
+        ),
+        "suite": lambda: bench_suite(
+            pop_option(args, "-rows", SUITE_ROWS),
+            pop_option(args, "-width", REAL_WIDTH),
+            pop_option(args, "-files", DEFAULT_SPEC_FILES),
+            pop_option(args, "-stanzas", DEFAULT_STANZAS),
+            pop_option(args, "-repeat", SUITE_REPEAT),
+            pop_option(args, "-latency", FAKE_LATENCY_MS),
+            Path(pop_value(args, "-history", str(HISTORY_PATH))),
+            pop_option(args, "-threshold", REGRESSION_PERCENT),
+        ),
+    }
+    if not args or args[0] not in benchmarks:
+        print("Usage:")
+        print("  python bench.py memory [-rows N] [-width N]      # Issue vs dict memory on a synthetic export")
+        print("  python bench.py render [-rows N] [-width N]      # In-memory vs streaming MediaWiki rendering")
+        print("  python bench.py parse [-rows N] [-width N] [-jobs N]   # Serial vs parallel parsing of one large export")
+        print("  python bench.py markup [-input CSV] [-repeat N]  # Jira-markup conversion of description cells")
+        print("  python bench.py spec [-files N] [-stanzas N]     # conf.spec tokenizer and spexml throughput")
+        print("  python bench.py suite [-rows N] [-width N] [-files N] [-stanzas N] [-repeat N] [-latency MS]")
+        print("                      [-history FILE] [-threshold PERCENT]")
+        print("                                                   # Time every converter and track regressions")
+        print("  python bench.py startup [-repeat N] [-history FILE] [-threshold PERCENT]")
+        print("                                                   # Entry-point import time; fails on heavy imports")
+        sys.exit(1)
+    # Only the suite and startup return a result: their number of regressions or failures.
+    if benchmarks[args[0]]():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
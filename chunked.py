@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""Translate a whole Jira export by sending token-budgeted chunks to an LLM concurrently."""
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Callable, Sequence
+
+from llmcache import ResponseCache
+from metrics import count, stage
+from noprompt import Issue, build_release_notes, build_table_rows, ordered_fix_versions
+from tokens import TokenCounter, approximate_tokens
+
+if TYPE_CHECKING:
+    import asyncio
+
+DEFAULT_TOKEN_BUDGET = 6000
+DEFAULT_CONCURRENCY = 4
+# Descriptions are trimmed to this many tokens before packing, and further if one issue alone overflows a request.
+DEFAULT_DESCRIPTION_TOKENS = 150
+# Bump whenever CHUNK_INSTRUCTIONS change, so cached rows from the old wording are not reused.
+CHUNK_PROMPT_VERSION = "2"
+
+# issue_line(index, issue, description_tokens, counter) -> the issue's line in the prompt
+IssueLine = Callable[[int, Issue, int, TokenCounter], str]
+Call = Callable[[str], str]
+# Sends every prompt at once (e.g. as a batch job); returns each prompt's reply, or the error it failed with.
+Submit = Callable[[list[str]], list["str | Exception"]]
+# Called with each chunk whose reply parsed, and its rows per issue, as soon as it arrives.
+Done = Callable[["Chunk", list[list[str]]], None]
+
+CHUNK_INSTRUCTIONS = (
+    'Convert the following Jira issues into MediaWiki table rows for the "{version}" section of the release notes.',
+    "The table columns are, in order: Ticket, Summary, Components, Fix version(s), Priority, Issue type, Status, Resolution, Labels, Notes.",
+    "For each issue, in the order given, output a line containing only |- followed by one line per column that starts with \"| \".",
+    "Write the ticket as [https://splunk.atlassian.net/browse/KEY KEY] and use &mdash; for empty cells.",
+    "When an issue lists Backports, add them to its Ticket cell after <br/>Backports: as links in the same format, each followed by its branch in parentheses.",
+    "Use concise text and keep the rows valid MediaWiki syntax.",
+    "",
+)
+CHUNK_FOOTER = ("", "Return only the table rows, without the table start, header row, or table end.")
+
+
+class Chunk:
+    """A run of issues from one fix version that fits in a single request."""
+
+    __slots__ = ("version", "issues", "prompt")
+
+    def __init__(self, version: str, issues: list[Issue], prompt: str) -> None:
+        self.version = version
+        self.issues = issues
+        self.prompt = prompt
+
+
+def build_chunk_prompt(version: str, lines: Sequence[str]) -> str:
+    header = [line.format(version=version) for line in CHUNK_INSTRUCTIONS]
+    return "\n".join([*header, *lines, *CHUNK_FOOTER])
+
+
+def plan_chunks(
+    grouped: dict[str, list[Issue]],
+    issue_line: IssueLine,
+    token_budget: int,
+    counter: TokenCounter = approximate_tokens,
+    description_tokens: int = DEFAULT_DESCRIPTION_TOKENS,
+) -> list[Chunk]:
+    """Fill requests of at most ``token_budget`` tokens with each fix version's issues, in release-notes order.
+
+    An issue that would not fit in an empty request has its description trimmed until
+    it does (or until the description is gone).
+    """
+    chunks: list[Chunk] = []
+    for version in ordered_fix_versions(grouped):
+        overhead = counter(build_chunk_prompt(version, []))
+        room = token_budget - overhead
+        issues: list[Issue] = []
+        allowances: list[int] = []
+        used = overhead
+        for issue in sorted(grouped[version], key=lambda item: item.sort_key):
+            allowance = description_tokens
+            cost = counter(issue_line(len(issues) + 1, issue, allowance, counter)) + 1
+            if cost > room:
+                allowance = max(0, allowance - (cost - room))
+                cost = counter(issue_line(len(issues) + 1, issue, allowance, counter)) + 1
+            if issues and used + cost > token_budget:
+                chunks.append(_make_chunk(version, issues, allowances, issue_line, counter))
+                issues, allowances, used = [], [], overhead
+            issues.append(issue)
+            allowances.append(allowance)
+            used += cost
+        if issues:
+            chunks.append(_make_chunk(version, issues, allowances, issue_line, counter))
+    return chunks
+
+
+def _make_chunk(
+    version: str, issues: list[Issue], allowances: list[int], issue_line: IssueLine, counter: TokenCounter
+) -> Chunk:
+    lines = [
+        issue_line(number, issue, allowance, counter)
+        for number, (issue, allowance) in enumerate(zip(issues, allowances), start=1)
+    ]
+    return Chunk(version, issues, build_chunk_prompt(version, lines))
+
+
+def parse_rows(response: str, expected: int) -> list[str]:
+    """Keep only the table-row lines of a response and check there is one row per issue."""
+    rows: list[str] = []
+    for raw in response.splitlines():
+        line = raw.rstrip()
+        if not line or line.startswith(("```", "{|", "|}", "!")):
+            continue
+        if not rows and line != "|-":
+            continue
+        rows.append(line)
+    found = rows.count("|-")
+    if found != expected:
+        raise ValueError(f"expected {expected} rows, got {found}")
+    return rows
+
+
+def split_rows(rows: Sequence[str]) -> list[list[str]]:
+    """Split table rows into one list of lines per issue, each starting at its ``|-``."""
+    per_issue: list[list[str]] = []
+    for line in rows:
+        if line == "|-":
+            per_issue.append([])
+        per_issue[-1].append(line)
+    return per_issue
+
+
+def chunk_result(
+    chunk: Chunk, number: int, response: str | Exception, done: Done | None = None
+) -> tuple[list[list[str]], bool]:
+    """The chunk's rows per issue from ``response``, or offline rows when it failed or does not parse."""
+    try:
+        if isinstance(response, Exception):
+            raise response
+        issue_rows = split_rows(parse_rows(response, len(chunk.issues)))
+    except Exception as exc:  # noqa: BLE001 - any failed chunk falls back to the offline renderer
+        print(f"Chunk {number} ({chunk.version}, {len(chunk.issues)} issues) failed: {exc}; using offline rows.")
+        return [build_table_rows([issue]) for issue in chunk.issues], False
+    if done is not None:
+        done(chunk, issue_rows)
+    return issue_rows, True
+
+
+async def _translate_chunk(
+    chunk: Chunk, number: int, call: Call, semaphore: asyncio.Semaphore, done: Done | None = None
+) -> tuple[list[list[str]], bool]:
+    import asyncio
+
+    async with semaphore:
+        try:
+            response: str | Exception = await asyncio.to_thread(call, chunk.prompt)
+        except Exception as exc:  # noqa: BLE001 - reported and rendered offline by chunk_result
+            response = exc
+    return chunk_result(chunk, number, response, done)
+
+
+async def _translate_all(
+    chunks: Sequence[Chunk], call: Call, concurrency: int, done: Done | None = None
+) -> list[tuple[list[list[str]], bool]]:
+    import asyncio
+
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(
+        *(_translate_chunk(chunk, number, call, semaphore, done) for number, chunk in enumerate(chunks, start=1))
+    )
+
+
+def translate_issues(
+    grouped: dict[str, list[Issue]],
+    call: Call,
+    issue_line: IssueLine,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    cache: ResponseCache | None = None,
+    model: str = "",
+    counter: TokenCounter = approximate_tokens,
+    description_tokens: int = DEFAULT_DESCRIPTION_TOKENS,
+    prepare: Callable[[], None] | None = None,
+    submit: Submit | None = None,
+) -> str:
+    """Translate every issue and stitch the fragments into release notes ordered by fix version.
+
+    ``call`` is the blocking transport (prompt in, completion out); up to ``concurrency``
+    calls run at once, each holding at most ``token_budget`` tokens as measured by
+    ``counter``. Chunks whose request fails, or whose reply does not contain one row
+    per issue, are rendered offline with ``noprompt.build_table_rows`` instead.
+
+    Each issue is translated once even when it sits under several fix versions. With a
+    ``cache``, rows are stored per issue under a hash of ``model``, the prompt version and
+    the issue's prompt line, so only new or edited tickets are sent. ``prepare`` runs
+    once before the first request (and not at all when everything was cached), so a
+    missing credential stops the run instead of failing every chunk.
+
+    With ``submit``, the uncached chunks are sent together through it (a batch job)
+    instead of through ``call``.
+    """
+    rows_by_issue: dict[int, list[str]] = {}
+    cache_keys: dict[int, str] = {}
+    pending: dict[str, list[Issue]] = {}
+    seen: set[int] = set()
+    # Cache lookups and chunk planning both build every issue's prompt line.
+    with stage("prompt"):
+        for version in ordered_fix_versions(grouped):
+            for issue in grouped[version]:
+                if id(issue) in seen:
+                    continue
+                seen.add(id(issue))
+                if cache is not None:
+                    key = cache.key(model, CHUNK_PROMPT_VERSION, issue_line(1, issue, description_tokens, counter))
+                    cached = cache.get(key)
+                    if cached is not None:
+                        rows_by_issue[id(issue)] = cached.split("\n")
+                        continue
+                    cache_keys[id(issue)] = key
+                pending.setdefault(version, []).append(issue)
+
+        chunks = plan_chunks(pending, issue_line, token_budget, counter, description_tokens)
+    if chunks and prepare is not None:
+        prepare()
+
+    def store(chunk: Chunk, issue_rows: list[list[str]]) -> None:
+        # Cached as each chunk arrives, so an interrupted run resends only the chunks still missing.
+        for issue, rows in zip(chunk.issues, issue_rows):
+            cache.put(cache_keys[id(issue)], "\n".join(rows))
+
+    done = store if cache is not None else None
+    started = time.perf_counter()
+    with stage("requests"):
+        if submit is not None:
+            replies = submit([chunk.prompt for chunk in chunks]) if chunks else []
+            results = [
+                chunk_result(chunk, number, reply, done)
+                for number, (chunk, reply) in enumerate(zip(chunks, replies), start=1)
+            ]
+        else:
+            # asyncio is imported only once there are requests to send: it costs more start-up
+            # time than everything else a cached or offline run loads.
+            import asyncio
+
+            results = asyncio.run(_translate_all(chunks, call, concurrency, done))
+
+    for chunk, (issue_rows, _) in zip(chunks, results):
+        for issue, rows in zip(chunk.issues, issue_rows):
+            rows_by_issue[id(issue)] = rows
+
+    rendered_rows = {
+        version: [line for issue in sorted(issues, key=lambda item: item.sort_key) for line in rows_by_issue[id(issue)]]
+        for version, issues in grouped.items()
+    }
+
+    fallbacks = sum(1 for _, translated in results if not translated)
+    print(
+        f"Translated {len(chunks)} chunks in {time.perf_counter() - started:.1f}s "
+        f"({fallbacks} rendered offline after a failed request)."
+    )
+    count("chunks", len(chunks))
+    count("fallback_chunks", fallbacks)
+    with stage("render"):
+        release_notes = build_release_notes(grouped, rendered_rows)
+    return release_notes
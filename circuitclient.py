@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Reusable Circuit (Cisco chat-ai) client: pooled connections, OAuth token refresh, and rate-limit backoff."""
+from __future__ import annotations
+
+import base64
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TOKEN_URL = "https://id.cisco.com/oauth2/default/v1/token"
+DEFAULT_TIMEOUT = 60
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+# Fetch a new access token this long before the current one expires.
+REFRESH_MARGIN_SECONDS = 300
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitError(RuntimeError):
+    """The Circuit API rejected the access token or sent a reply the client cannot read."""
+
+
+class LatencyStats:
+    """Per-request wall time (retries included) and retry counts, safe to update from several threads."""
+
+    def __init__(self) -> None:
+        self.samples: list[float] = []
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def add_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def percentile(self, fraction: float) -> float:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self) -> str:
+        if not self.samples:
+            return f"Circuit API: no requests, {self.retries} retries."
+        return (
+            f"Circuit API: {len(self.samples)} requests, {self.retries} retries, latency "
+            f"p50 {1000 * self.percentile(0.5):.0f} ms / p95 {1000 * self.percentile(0.95):.0f} ms / "
+            f"max {1000 * max(self.samples):.0f} ms."
+        )
+
+
+def iter_sse_data(lines: Iterable[str]) -> Iterator[str]:
+    """The data of each server-sent event in ``lines``, including the final ``[DONE]``.
+
+    An event's ``data:`` lines are joined with newlines and end at a blank line;
+    comments and other fields (``event:``, ``id:``) are ignored.
+    """
+    data: list[str] = []
+    for line in lines:
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+        elif line.startswith("data:"):
+            data.append(line[5:].removeprefix(" "))
+    if data:
+        yield "\n".join(data)
+
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """Parse a Retry-After header, which is either a number of seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitClient:
+    """Chat-completions client for the Circuit API.
+
+    With ``client_id``/``client_secret`` it acquires access tokens through the OAuth
+    client-credentials grant and refreshes them shortly before they expire; with only
+    ``api_key`` it uses that token as-is (the manually exported one-hour key).
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        user_field: str,
+        client_id: str | None = None,
+        client_secret: str | None = None,
+        api_key: str | None = None,
+        token_url: str = TOKEN_URL,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        backoff: float = BACKOFF_SECONDS,
+        pool_size: int = 10,
+    ) -> None:
+        if not api_key and not (client_id and client_secret):
+            raise SystemExit(
+                "Set CISCO_CLIENT_ID and CISCO_CLIENT_SECRET (or a CISCO_API_KEY access token) to call the Circuit API."
+            )
+        self.api_url = api_url
+        self.user_field = user_field
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_url = token_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.latency = LatencyStats()
+
+        self._token = api_key
+        self._token_expires = float("inf") if api_key and not client_id else 0.0
+        self._token_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_env(cls, api_url: str, user_field: str, **kwargs) -> CircuitClient:
+        # CIRCUIT_TOKEN_URL points the token requests elsewhere, e.g. at stubserver.py.
+        kwargs.setdefault("token_url", os.environ.get("CIRCUIT_TOKEN_URL", TOKEN_URL))
+        return cls(
+            api_url,
+            user_field,
+            client_id=os.environ.get("CISCO_CLIENT_ID"),
+            client_secret=os.environ.get("CISCO_CLIENT_SECRET"),
+            api_key=os.environ.get("CISCO_API_KEY"),
+            **kwargs,
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+    def access_token(self, force_refresh: bool = False) -> str:
+        with self._token_lock:
+            if force_refresh or time.time() >= self._token_expires - REFRESH_MARGIN_SECONDS:
+                if not (self.client_id and self.client_secret):
+                    if force_refresh:
+                        raise CircuitError("The Circuit API rejected CISCO_API_KEY; export a fresh access token.")
+                else:
+                    self._refresh_token()
+            return self._token or ""
+
+    def _refresh_token(self) -> None:
+        credentials = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode("utf-8")).decode("ascii")
+        response = self._send(
+            "POST",
+            self.token_url,
+            headers={
+                "Accept": "application/json",
+                "Content-Type": "application/x-www-form-urlencoded",
+                "Authorization": f"Basic {credentials}",
+            },
+            data={"grant_type": "client_credentials"},
+            record=False,
+        )
+        data = response.json()
+        self._token = data["access_token"]
+        self._token_expires = time.time() + float(data.get("expires_in", 3600))
+
+    def _send(self, method: str, url: str, record: bool = True, **kwargs) -> requests.Response:
+        """Send a request, retrying connection errors and 429/5xx with exponential backoff.
+
+        Only requests with ``record`` set (the chat requests, not token fetches) count their retries in ``latency``.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                delay = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response
+                delay = retry_after_seconds(response.headers.get("Retry-After"))
+                # A streamed response holds its pooled connection until it is closed.
+                response.close()
+            if delay is None:
+                delay = self.backoff * 2**attempt * (1 + random.random() / 2)
+            if record:
+                self.latency.add_retry()
+            time.sleep(min(delay, MAX_BACKOFF_SECONDS))
+        raise AssertionError("unreachable")
+
+    def _post_chat(self, payload: dict, **kwargs) -> requests.Response:
+        """POST a chat request; its one latency sample spans every attempt but not the token fetches."""
+        elapsed = 0.0
+        try:
+            for refreshed in (False, True):
+                headers = {
+                    "Content-Type": "application/json",
+                    "Accept": "text/event-stream" if payload.get("stream") else "application/json",
+                    "api-key": self.access_token(force_refresh=refreshed),
+                }
+                started = time.perf_counter()
+                try:
+                    return self._send("POST", self.api_url, headers=headers, json=payload, **kwargs)
+                except requests.HTTPError as exc:
+                    # An expired or revoked token: refresh once and retry.
+                    if refreshed or exc.response is None or exc.response.status_code != 401:
+                        raise
+                    exc.response.close()
+                    self.latency.add_retry()
+                finally:
+                    elapsed += time.perf_counter() - started
+        finally:
+            self.latency.add(elapsed)
+        raise AssertionError("unreachable")
+
+    def _payload(self, prompt: str) -> dict:
+        return {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt,
+                }
+            ],
+            "user": self.user_field,
+            "stop": ["<|im_end|>"],
+        }
+
+    def complete(self, prompt: str) -> tuple[str, dict]:
+        """Return the completion text and the API's usage block for a single-message chat."""
+        data = self._post_chat(self._payload(prompt)).json()
+        try:
+            return data["choices"][0]["message"]["content"], data.get("usage") or {}
+        except (KeyError, IndexError) as exc:
+            raise CircuitError(f"Unexpected response structure: {data}") from exc
+
+    def stream(self, prompt: str, usage: dict) -> Iterator[str]:
+        """Yield the completion's text as the API streams it (server-sent events).
+
+        The usage block, when the API sends one, is stored into ``usage``. Only
+        opening the stream is retried; a connection that drops mid-stream raises.
+        """
+        payload = {**self._payload(prompt), "stream": True, "stream_options": {"include_usage": True}}
+        with self._post_chat(payload, stream=True) as response:
+            response.encoding = "utf-8"  # what the event-stream format requires, whatever the headers say
+            for data in iter_sse_data(response.iter_lines(decode_unicode=True)):
+                if data == "[DONE]":
+                    return
+                try:
+                    event = json.loads(data)
+                except ValueError as exc:
+                    raise CircuitError(f"Unexpected stream event: {data[:200]}") from exc
+                if event.get("usage"):
+                    usage.update(event["usage"])
+                for choice in event.get("choices") or ():
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        yield text
+        # Without the sentinel the reply may have been cut short, so treat it like a dropped connection.
+        raise requests.ConnectionError("The Circuit API stream ended before [DONE].")
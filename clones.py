@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Detect backport clone families and collapse each into one canonical issue.
+
+Jira's Clone action copies a fix once per sustaining branch, e.g.
+``[CLONE] [sustain/cobalt] MachineTypeFilter doesn't work...`` with a description
+starting ``This ticket is a backport of [https://.../browse/SPL-270345|...]`` and a
+Cloners link back to the original. Issues are joined into a family when:
+
+- one is a backport of the other (the description line above), or both are
+  backports of the same ticket;
+- they are linked by Cloners and have the same normalized summary; or
+- one is marked as a clone and the other is the only unmarked issue with the same
+  normalized summary, so it can only be the original. Generic summaries such as
+  "Update documentation" shared by several distinct tickets are never merged this way.
+
+Normalizing drops the ``[CLONE]``, ``CLONE -``, ``[sustain/...]``, ``[PUBLIC]`` and
+``[release note(s)]`` prefixes, case and extra spaces. Each summary is hashed into
+one bucket, so detection is a single pass plus a union-find over the matches.
+"""
+from __future__ import annotations
+
+import re
+from typing import Sequence
+
+from noprompt import Issue, dedupe_preserve_order, natural_key
+
+# One leading tag at a time; normalize_summary strips them until none is left.
+_PREFIX = re.compile(r"\s*(?:\[\s*(?:clone|public|release[ _-]?notes?|sustain/[^\]]*)\s*\]|clone\s*-)\s*", re.IGNORECASE)
+_CLONE_MARK = re.compile(r"\[\s*(?:clone\s*\]|sustain/)|(?-i:\bCLONE -)", re.IGNORECASE)
+_BRANCH = re.compile(r"\[\s*sustain/([^\]]+?)\s*\]", re.IGNORECASE)
+# Matches the key in "[https://host/browse/SPL-1|https://host/browse/SPL-1|smart-link]" and in a bare "SPL-1".
+_BACKPORT = re.compile(r"This ticket is a backport of\W*(?:\S*?/browse/)?([A-Z][A-Z0-9_]*-\d+)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+class CloneFamily:
+    """The merged ``issue`` that replaces ``members`` (the original, if exported, and its clones)."""
+
+    __slots__ = ("issue", "members")
+
+    def __init__(self, issue: Issue, members: list[Issue]) -> None:
+        self.issue = issue
+        self.members = members
+
+
+def normalize_summary(summary: str) -> str:
+    position = 0
+    while True:
+        match = _PREFIX.match(summary, position)
+        if match is None or match.end() == position:
+            break
+        position = match.end()
+    return _SPACES.sub(" ", summary[position:]).strip().lower()
+
+
+def backport_target(description: str) -> str | None:
+    """The key named by a "This ticket is a backport of" line, if the description has one."""
+    if "backport" not in description.lower():
+        return None
+    match = _BACKPORT.search(description)
+    return match[1].upper() if match else None
+
+
+def is_clone(issue: Issue) -> bool:
+    return bool(_CLONE_MARK.search(issue.summary)) or backport_target(issue.description) is not None
+
+
+def branch_name(summary: str) -> str:
+    """``cobalt`` for ``[CLONE] [sustain/cobalt] ...``; empty when the summary names no branch."""
+    match = _BRANCH.search(summary)
+    return match[1] if match else ""
+
+
+def merge_family(members: Sequence[Issue]) -> Issue:
+    """One issue for a family: the canonical member's fields, every member's versions, components and labels.
+
+    The canonical member is the original when it was exported (the member not marked
+    as a clone), otherwise the lowest key. Its ``clones`` lists the other members'
+    keys and branches.
+    """
+    canonical = min(members, key=lambda issue: (is_clone(issue), natural_key(issue.key)))
+    others = sorted((issue for issue in members if issue is not canonical), key=lambda issue: natural_key(issue.key))
+    ordered = [canonical, *others]
+
+    versions = list(dedupe_preserve_order(version for issue in ordered for version in issue.fix_versions))
+    if len(versions) > 1 and "Unscheduled" in versions:
+        versions.remove("Unscheduled")
+    versions.sort(key=lambda value: (value == "Unscheduled", natural_key(value)))
+
+    merged = Issue(
+        key=canonical.key,
+        summary=canonical.summary,
+        issue_type=canonical.issue_type,
+        status=canonical.status,
+        resolution=canonical.resolution,
+        priority=canonical.priority,
+        description=canonical.description,
+        updated=canonical.updated,
+        fix_versions=tuple(versions),
+        components=dedupe_preserve_order(component for issue in ordered for component in issue.components),
+        labels=dedupe_preserve_order(label for issue in ordered for label in issue.labels),
+        clone_links=canonical.clone_links,
+    )
+    merged.clones = tuple((issue.key, branch_name(issue.summary)) for issue in others)
+    return merged
+
+
+def collapse_clones(issues: Sequence[Issue]) -> tuple[list[Issue], list[CloneFamily]]:
+    """Replace each clone family in ``issues`` with its merged issue, at the family's first position.
+
+    Returns the remaining issues and the families that were collapsed.
+    """
+    parent = list(range(len(issues)))
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(first: int, second: int) -> None:
+        first, second = find(first), find(second)
+        if first != second:
+            parent[max(first, second)] = min(first, second)
+
+    by_key: dict[str, int] = {}
+    buckets: dict[str, list[int]] = {}
+    summaries: list[str] = []
+    for number, issue in enumerate(issues):
+        by_key.setdefault(issue.key.upper(), number)
+        summary = normalize_summary(issue.summary)
+        summaries.append(summary)
+        if summary:
+            buckets.setdefault(summary, []).append(number)
+
+    backports: dict[str, int] = {}
+    for number, issue in enumerate(issues):
+        target = backport_target(issue.description)
+        if target is not None:
+            if target in by_key:
+                union(number, by_key[target])
+            union(number, backports.setdefault(target, number))
+        for key in issue.clone_links:
+            other = by_key.get(key.upper())
+            if other is not None and summaries[other] and summaries[other] == summaries[number]:
+                union(number, other)
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        marked = [member for member in members if is_clone(issues[member])]
+        originals = [member for member in members if not is_clone(issues[member])]
+        if marked and len(originals) == 1:
+            for member in marked:
+                union(originals[0], member)
+
+    groups: dict[int, list[Issue]] = {}
+    for number, issue in enumerate(issues):
+        groups.setdefault(find(number), []).append(issue)
+
+    collapsed: list[Issue] = []
+    families: list[CloneFamily] = []
+    for members in groups.values():
+        if len(members) == 1:
+            collapsed.append(members[0])
+            continue
+        family = CloneFamily(merge_family(members), members)
+        families.append(family)
+        collapsed.append(family.issue)
+    return collapsed, families
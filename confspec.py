@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Single-pass tokenizer and structured model for Splunk .conf.spec files.
+
+A spec is a preamble of ``#`` comments followed by ``[stanza]`` headers, each with
+``setting = <type>`` lines described by ``* `` bullets. Bullets may wrap onto
+indented continuation lines, state a ``Default:``, or open an indented example
+block. ``iter_stanzas`` turns that into ``Stanza``/``Setting`` records one stanza
+at a time, so a renderer can stream huge specs.
+"""
+from __future__ import annotations
+
+import re
+from typing import Iterable, Iterator
+
+BLANK = "blank"
+COMMENT = "comment"
+STANZA = "stanza"
+SETTING = "setting"
+BULLET = "bullet"
+DEFAULT = "default"
+EXAMPLE = "example"
+INDENTED = "indented"
+TEXT = "text"
+
+Token = tuple[str, str, str]
+
+_STANZA = re.compile(r"\[(.+)\]\s*$")
+_SETTING = re.compile(r"([^=\s][^=]*?)\s*=\s*(.*)$")
+# "* Default: true", "* Default (if not set): 5", and the older "* Defaults to true."
+_DEFAULT = re.compile(r"\*\s*(?:Default(?:\s*\([^)]*\))?\s*:|Defaults to)\s*(.*?)\.?\s*$", re.IGNORECASE)
+_EXAMPLE = re.compile(r"\*\s*(?:For )?examples?\s*:\s*(.*)$", re.IGNORECASE)
+# "#****" and "#====" banners that frame comment headings carry no text.
+_BANNER = re.compile(r"[*=#\-\s]*$")
+
+
+def tokenize(lines: Iterable[str]) -> Iterator[Token]:
+    """Classify each line as ``(kind, text, value)``.
+
+    The first character picks the single pattern worth trying, so every line costs
+    at most one precompiled match.
+    """
+    for raw in lines:
+        line = raw.rstrip()
+        if not line:
+            yield BLANK, "", ""
+            continue
+        first = line[0]
+        if first in " \t":
+            yield INDENTED, line.strip(), ""
+        elif first == "#":
+            text = line[1:].strip()
+            yield (BLANK, "", "") if _BANNER.match(text) else (COMMENT, text, "")
+        elif first == "[":
+            match = _STANZA.match(line)
+            yield (STANZA, match[1].strip(), "") if match else (TEXT, line, "")
+        elif first == "*":
+            match = _DEFAULT.match(line)
+            if match:
+                yield DEFAULT, match[1], ""
+                continue
+            match = _EXAMPLE.match(line)
+            if match:
+                yield EXAMPLE, match[1], ""
+                continue
+            yield BULLET, line[1:].strip(), ""
+        else:
+            match = _SETTING.match(line)
+            yield (SETTING, match[1], match[2]) if match else (TEXT, line, "")
+
+
+class Setting:
+    """One ``name = value`` line with its bullets, default, and example lines."""
+
+    __slots__ = ("name", "value", "description", "default", "examples")
+
+    def __init__(self, name: str, value: str) -> None:
+        self.name = name
+        self.value = value
+        self.description: list[str] = []
+        self.default: str | None = None
+        self.examples: list[str] = []
+
+
+class Stanza:
+    """A ``[name]`` header, the bullets that describe it, and its settings.
+
+    ``name`` is ``None`` for the settings a spec declares before its first header.
+    """
+
+    __slots__ = ("name", "description", "default", "examples", "settings")
+
+    def __init__(self, name: str | None) -> None:
+        self.name = name
+        self.description: list[str] = []
+        self.default: str | None = None
+        self.examples: list[str] = []
+        self.settings: list[Setting] = []
+
+
+def iter_stanzas(lines: Iterable[str]) -> Iterator[Stanza]:
+    """Yield each stanza of a spec as soon as the next header (or the end of input) closes it."""
+    stanza = Stanza(None)
+    target: Stanza | Setting = stanza
+    in_example = False
+    for kind, text, value in tokenize(lines):
+        if kind == BLANK or kind == COMMENT:
+            continue
+        if kind == INDENTED or kind == TEXT:
+            if in_example:
+                target.examples.append(text)
+            elif target.description:
+                target.description[-1] += " " + text
+            else:
+                target.description.append(text)
+            continue
+
+        in_example = False
+        if kind == STANZA:
+            if stanza.name is not None or stanza.settings or stanza.description:
+                yield stanza
+            stanza = target = Stanza(text)
+        elif kind == SETTING:
+            target = Setting(text, value)
+            stanza.settings.append(target)
+        elif kind == BULLET:
+            target.description.append(text)
+        elif kind == DEFAULT:
+            target.default = text
+        elif kind == EXAMPLE:
+            in_example = True
+            if text:
+                target.examples.append(text)
+    if stanza.name is not None or stanza.settings or stanza.description:
+        yield stanza
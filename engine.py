@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""Translate Jira CSV exports to MediaWiki release notes through a pluggable LLM backend.
+
+One pipeline for every backend: load the export, filter issues, pack them into
+token-budgeted prompts, dispatch the prompts (cached and concurrent), and assemble
+the returned rows into release notes.
+"""
+from __future__ import annotations
+
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+import noprompt
+from backends import BACKENDS, Backend, make_backend
+from batchapi import POLL_FIRST_SECONDS, BatchSubmitter
+from batch import (
+    DEFAULT_DEBOUNCE_MS,
+    DEFAULT_STATUS_PORT,
+    csv_batch_tasks,
+    pop_flag,
+    pop_option,
+    pop_value,
+    run_batch,
+)
+from chunked import DEFAULT_CONCURRENCY, DEFAULT_DESCRIPTION_TOKENS, DEFAULT_TOKEN_BUDGET, Submit, translate_issues
+from clones import collapse_clones
+from llmcache import ResponseCache
+from streaming import StreamCheckpoint, TableStream, fingerprint
+from metrics import count, profiled, sample, stage
+from noprompt import Issue, build_table_rows, compile_where, group_by_fix_version, iter_issues
+from tokens import (
+    DEFAULT_TOKENIZER,
+    TokenCounter,
+    TokenUsage,
+    approximate_tokens,
+    estimate_cost,
+    get_counter,
+    trim_description,
+)
+
+if TYPE_CHECKING:
+    from issuefilter import IssueFilter
+
+CSV_PATH = Path("Jira.csv")
+DEFAULT_BACKEND = "openai"
+
+
+def issue_line(
+    idx: int,
+    issue: Issue,
+    description_tokens: int = DEFAULT_DESCRIPTION_TOKENS,
+    counter: TokenCounter = approximate_tokens,
+) -> str:
+    description = trim_description(issue.description, description_tokens, counter)
+    return (
+        f"Issue {idx}: {issue.key} | Summary: {issue.summary} | Priority: {issue.priority} | "
+        f"Status: {issue.status} | Resolution: {issue.resolution} | Type: {issue.issue_type} | "
+        f"Fix Versions: {', '.join(issue.fix_versions) or 'None'} | Components: {', '.join(issue.components) or 'None'} | "
+        f"Labels: {', '.join(issue.labels) or 'None'} | Description: {description}"
+    ) + format_backports(issue)
+
+
+def format_backports(issue: Issue) -> str:
+    """`` | Backports: KEY (branch), ...`` for a collapsed clone family, else nothing."""
+    if not issue.clones:
+        return ""
+    return " | Backports: " + ", ".join(f"{key} ({branch})" if branch else key for key, branch in issue.clones)
+
+
+def collapse_for_prompt(issues: list[Issue], counter: TokenCounter = approximate_tokens) -> list[Issue]:
+    """Collapse backport clone families so only each family's canonical ticket is prompted.
+
+    Reports the clones folded away and the prompt tokens that saves: the lines the
+    members would have taken, less the merged line that replaces them.
+    """
+    issues, families = collapse_clones(issues)
+    if families:
+        line_tokens = lambda issue: counter(issue_line(1, issue, DEFAULT_DESCRIPTION_TOKENS, counter)) + 1
+        folded = sum(len(family.members) for family in families) - len(families)
+        saved = sum(line_tokens(member) for family in families for member in family.members)
+        saved -= sum(line_tokens(family.issue) for family in families)
+        count("clones_collapsed", folded)
+        count("clone_tokens_saved", saved)
+        print(f"Collapsed {folded} backport clones into {len(families)} tickets, saving about {saved} prompt tokens.")
+    return issues
+
+
+def build_prompt(issues: list[Issue], counter: TokenCounter = approximate_tokens) -> str:
+    lines = [
+        "Convert the following Jira issues into a MediaWiki table suitable for release notes.",
+        "Each row should include the ticket key (followed by any backports), summary, components, fix versions, priority, issue type, status, resolution, labels, and description.",
+        "Use concise text and keep the table valid MediaWiki syntax.",
+        "",
+    ]
+
+    for idx, issue in enumerate(issues, start=1):
+        lines.append(issue_line(idx, issue, DEFAULT_DESCRIPTION_TOKENS, counter))
+
+    lines.append("")
+    lines.append("Return only the MediaWiki markup.")
+    return "\n".join(lines)
+
+
+def load_issues(
+    path: Path,
+    token_budget: int,
+    counter: TokenCounter = approximate_tokens,
+    where: IssueFilter | None = None,
+    keep_clones: bool = False,
+) -> list[Issue]:
+    """Read issues from the top of the export until the single-request prompt reaches ``token_budget``.
+
+    Unless ``keep_clones``, the whole export is read first so backport clone families
+    can be collapsed before the budget is applied.
+    """
+    if not path.exists():
+        raise SystemExit(f"CSV file not found: {path}")
+
+    source: Iterable[Issue] = iter_issues(path, resolutions=None, where=where)
+    if not keep_clones:
+        source = collapse_for_prompt(list(source), counter)
+    issues: list[Issue] = []
+    used = counter(build_prompt([]))
+    for issue in source:
+        if not issue.key:
+            continue
+        cost = counter(issue_line(len(issues) + 1, issue, DEFAULT_DESCRIPTION_TOKENS, counter)) + 1
+        if issues and used + cost > token_budget:
+            break
+        issues.append(issue)
+        used += cost
+    if not issues:
+        raise SystemExit("No issues found in the CSV.")
+    return issues
+
+
+def complete(backend: Backend, usage: TokenUsage, prompt: str) -> str:
+    """``backend.complete``, with each request's latency sampled for run metrics."""
+    started = time.perf_counter()
+    try:
+        return backend.complete(prompt, usage)
+    finally:
+        sample("request_seconds", time.perf_counter() - started)
+
+
+def record_usage(usage: TokenUsage, model: str, cache: ResponseCache | None, batch: bool = False) -> None:
+    """Add the run's request, token, cost and cache figures to the metrics file; ``batch`` runs cost half."""
+    count("requests", usage.requests)
+    count("prompt_tokens_estimated", usage.estimated)
+    count("input_tokens", usage.input_tokens)
+    count("output_tokens", usage.output_tokens)
+    # Without reported usage, price the estimated prompt tokens.
+    cost = estimate_cost(model, usage.input_tokens or usage.estimated, usage.output_tokens, batch)
+    if cost is not None:
+        count("cost_usd_estimate", cost)
+    if cache is not None:
+        count("cache_hits", cache.hits)
+        count("cache_misses", cache.misses)
+
+
+def translate_chunked(
+    csv_path: Path,
+    output_path: Path,
+    backend: Backend,
+    concurrency: int,
+    token_budget: int,
+    cache: ResponseCache | None,
+    usage: TokenUsage,
+    where: IssueFilter | None = None,
+    keep_clones: bool = False,
+    parse_jobs: int = 1,
+    submit: Submit | None = None,
+) -> None:
+    if not csv_path.exists():
+        raise SystemExit(f"CSV file not found: {csv_path}")
+
+    with stage("collect"):
+        issues = list(iter_issues(csv_path, where=where, parse_jobs=parse_jobs))
+    if not keep_clones:
+        with stage("dedupe"):
+            issues = collapse_for_prompt(issues, usage.counter)
+    with stage("group"):
+        grouped = group_by_fix_version(issues)
+    if not grouped:
+        raise SystemExit("No issues with acceptable resolution were found in the CSV export.")
+
+    release_notes = translate_issues(
+        grouped,
+        partial(complete, backend, usage),
+        issue_line,
+        concurrency,
+        token_budget,
+        cache=cache,
+        model=backend.model,
+        counter=usage.counter,
+        prepare=backend.prepare,
+        submit=submit,
+    )
+    with stage("write"):
+        output_path.write_text(release_notes, encoding="utf-8")
+    unique_issue_count = len({issue.key for issues in grouped.values() for issue in issues})
+    print(f"Wrote MediaWiki output for {unique_issue_count} issues to {output_path}.")
+
+
+def translate_single(
+    csv_path: Path,
+    output_path: Path,
+    backend: Backend,
+    token_budget: int,
+    cache: ResponseCache | None,
+    usage: TokenUsage,
+    where: IssueFilter | None = None,
+    keep_clones: bool = False,
+) -> None:
+    with stage("collect"):
+        issues = load_issues(csv_path, token_budget, usage.counter, where, keep_clones)
+    with stage("prompt"):
+        prompt = build_prompt(issues, usage.counter)
+    with stage("requests"):
+        if cache is None:
+            response_text = complete(backend, usage, prompt)
+        else:
+            key = cache.key(backend.model, prompt)
+            response_text = cache.get(key)
+            if response_text is None:
+                response_text = complete(backend, usage, prompt)
+                cache.put(key, response_text)
+    with stage("write"):
+        output_path.write_text(response_text, encoding="utf-8")
+    print(f"Wrote MediaWiki output for {len(issues)} issues to {output_path}.")
+
+
+def stream_completion(backend: Backend, usage: TokenUsage, prompt: str, table: TableStream) -> str:
+    """Feed ``backend.stream`` into ``table`` as it arrives and return the whole reply.
+
+    The request's latency is sampled like ``complete``'s.
+    """
+    pieces: list[str] = []
+    started = time.perf_counter()
+    try:
+        for delta in backend.stream(prompt, usage):
+            pieces.append(delta)
+            table.feed(delta)
+    finally:
+        sample("request_seconds", time.perf_counter() - started)
+    table.close()
+    return "".join(pieces)
+
+
+def translate_streaming(
+    csv_path: Path,
+    output_path: Path,
+    backend: Backend,
+    token_budget: int,
+    cache: ResponseCache | None,
+    usage: TokenUsage,
+    where: IssueFilter | None = None,
+    keep_clones: bool = False,
+) -> None:
+    """The single-request translation, with the reply streamed into ``output_path`` row by row.
+
+    Rows are appended to ``<output>.partial`` as they complete, and a checkpoint
+    records which tickets they cover. Rerunning after an interruption prompts only
+    for the remaining tickets. Tickets the reply left out are rendered offline.
+    """
+    with stage("collect"):
+        issues = load_issues(csv_path, token_budget, usage.counter, where, keep_clones)
+    with stage("prompt"):
+        prompt = build_prompt(issues, usage.counter)
+    checkpoint = StreamCheckpoint.load(output_path, fingerprint(backend.model, prompt))
+    done = set(checkpoint.written)
+    remaining = [issue for issue in issues if issue.key not in done]
+    if checkpoint.resumed:
+        print(f"Resuming {output_path}: {len(done)} of {len(issues)} rows already written.")
+        prompt = build_prompt(remaining, usage.counter)
+
+    handle = checkpoint.open()
+    table = TableStream(handle, checkpoint, {issue.key for issue in issues})
+    with stage("requests"):
+        # Only a whole, uninterrupted reply is cached, under the prompt for every issue.
+        key = cache.key(backend.model, prompt) if cache is not None and not checkpoint.resumed else None
+        cached = cache.get(key) if key is not None else None
+        if cached is not None:
+            table.feed(cached)
+            table.close()
+        elif remaining:
+            try:
+                response_text = stream_completion(backend, usage, prompt, table)
+            except Exception as exc:  # noqa: BLE001 - the rows so far are checkpointed; report how to resume
+                handle.close()
+                raise SystemExit(
+                    f"Stream interrupted after {len(table.written)} of {len(issues)} rows ({exc}); "
+                    f"rerun to resume {checkpoint.partial_path}."
+                ) from exc
+            if key is not None:
+                cache.put(key, response_text)
+
+    with stage("write"):
+        missing = [issue for issue in issues if issue.key not in table.written]
+        checkpoint.finish(handle, build_table_rows(missing))
+    print(
+        f"Streamed {table.rows} rows to {output_path} ({len(done)} resumed, {len(missing)} rendered offline, "
+        f"{table.skipped} invalid or duplicate rows skipped)."
+    )
+
+
+def translate_file(
+    csv_path: Path,
+    output_path: Path,
+    backend: Backend,
+    chunked: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    use_cache: bool = True,
+    tokenizer: str = DEFAULT_TOKENIZER,
+    where: IssueFilter | None = None,
+    keep_clones: bool = False,
+    stream: bool = False,
+    parse_jobs: int = 1,
+    submit_batch: bool = False,
+    poll_seconds: int = POLL_FIRST_SECONDS,
+) -> None:
+    """Translate one export with ``backend``: the whole file with ``chunked``, else one request's worth.
+
+    With ``stream`` (and without ``chunked``), the reply is written row by row as it arrives.
+
+    Issues that fail ``where`` are dropped while the export loads, before any prompt is built.
+    Backport clone families are sent as one ticket unless ``keep_clones``. ``parse_jobs`` > 1
+    parses a large export on that many processes when the whole file is read (offline or ``chunked``).
+
+    ``submit_batch`` sends the chunks as one Batch API job, polled every ``poll_seconds``
+    (doubling); see batchapi.py.
+    """
+    if submit_batch and not backend.batch:
+        raise SystemExit(f"The {backend.name} backend has no batch API; -submit-batch needs -backend openai.")
+    if backend.offline:
+        noprompt.process_file(csv_path, output_path, where=where, keep_clones=keep_clones, parse_jobs=parse_jobs)
+        return
+
+    cache = ResponseCache() if use_cache else None
+    usage = TokenUsage(get_counter(tokenizer, backend.model))
+    if submit_batch:
+        submit = BatchSubmitter(backend.batch_client, backend.model, output_path, usage, poll_seconds)
+        translate_chunked(
+            csv_path, output_path, backend, concurrency, token_budget, cache, usage, where, keep_clones, parse_jobs, submit
+        )
+    elif chunked:
+        translate_chunked(
+            csv_path, output_path, backend, concurrency, token_budget, cache, usage, where, keep_clones, parse_jobs
+        )
+    elif stream:
+        translate_streaming(csv_path, output_path, backend, token_budget, cache, usage, where, keep_clones)
+    else:
+        translate_single(csv_path, output_path, backend, token_budget, cache, usage, where, keep_clones)
+
+    record_usage(usage, backend.model, cache, submit_batch)
+    if cache is not None:
+        cache.evict()
+        print(cache.summary())
+    print(usage.summary())
+    report = backend.report()
+    if report:
+        print(report)
+
+
+def main(default_backend: str = DEFAULT_BACKEND) -> None:
+    args = sys.argv[1:]
+    with profiled(Path(sys.argv[0]).stem, pop_flag(args, "-profile"), pop_flag(args, "-cprofile")):
+        jobs = pop_option(args, "-jobs", 1)
+        debounce_ms = pop_option(args, "-debounce", DEFAULT_DEBOUNCE_MS)
+        status_port = pop_option(args, "-status-port", DEFAULT_STATUS_PORT)
+        backend = make_backend(pop_value(args, "-backend", default_backend))
+        csv_path = Path(pop_value(args, "-input", str(CSV_PATH)))
+        convert = partial(
+            translate_file,
+            backend=backend,
+            chunked=pop_flag(args, "-chunked"),
+            concurrency=pop_option(args, "-concurrency", DEFAULT_CONCURRENCY),
+            token_budget=pop_option(args, "-budget", DEFAULT_TOKEN_BUDGET),
+            use_cache=not pop_flag(args, "-no-cache"),
+            tokenizer=pop_value(args, "-tokenizer", DEFAULT_TOKENIZER),
+            where=compile_where(pop_value(args, "-where", "")),
+            keep_clones=pop_flag(args, "-keep-clones"),
+            stream=pop_flag(args, "-stream"),
+            parse_jobs=pop_option(args, "-parse-jobs", 1),
+            submit_batch=pop_flag(args, "-submit-batch"),
+            poll_seconds=pop_option(args, "-poll", POLL_FIRST_SECONDS),
+        )
+        if args and args[0] == "-batch":
+            if len(args) < 2:
+                print("Error: Missing directory path for batch mode.")
+                sys.exit(1)
+            directory = Path(args[1])
+            if not directory.is_dir():
+                print(f"Error: {directory} is not a directory.")
+                sys.exit(1)
+
+            tasks = csv_batch_tasks(directory, CSV_PATH, backend.output_path)
+            if not tasks:
+                print(f"No CSV files found in {directory}.")
+                return
+
+            # The offline renderer is CPU-bound; the LLM backends mostly wait on the network.
+            if run_batch(convert, tasks, jobs, executor="process" if backend.offline else "thread"):
+                sys.exit(1)
+        elif args and args[0] == "-watch":
+            if len(args) < 2:
+                print("Error: Missing directory path for watch mode.")
+                sys.exit(1)
+            directory = Path(args[1])
+            if not directory.is_dir():
+                print(f"Error: {directory} is not a directory.")
+                sys.exit(1)
+            from watch import watch
+
+            tasks_for = partial(csv_batch_tasks, default_csv=CSV_PATH, default_output=backend.output_path)
+            executor = "process" if backend.offline else "thread"
+            watch(directory, tasks_for, convert, jobs, executor, debounce_ms, status_port)
+        elif args and args[0] in ("-h", "--help"):
+            script = Path(sys.argv[0]).name
+            print("Usage:")
+            print(f"  python {script} [-backend NAME] [options]                 # Translate Jira.csv (or -input)")
+            print(f"  python {script} [-backend NAME] [options] -batch <dir>    # Translate every CSV in a directory")
+            print(f"  python {script} [-backend NAME] [options] -watch <dir>    # Retranslate each CSV in a directory when it changes")
+            print(f"Backends: {', '.join(BACKENDS)} (default {default_backend})")
+            print("Options: -input Jira.csv|Jira.db -chunked -concurrency N -budget N -tokenizer approx|tiktoken -no-cache -jobs N")
+            print("         -parse-jobs N   # parse one large export on N processes (offline and -chunked runs)")
+            print("         -submit-batch -poll SECONDS   # send the chunks as one OpenAI Batch API job (half price, up to 24h)")
+            print("         -keep-clones   # prompt every backport clone instead of one ticket per clone family")
+            print("         -stream   # write rows as they arrive; an interrupted run resumes where it stopped")
+            print('         -where \'fix_version ~ "10.0.*" and priority in (P1, P2)\'   # see issuefilter.py for the syntax')
+            print("         -profile -cprofile   # write per-stage metrics (and cProfile data) under profiles/")
+            print("         -debounce MS -status-port N   # -watch: quiet time before a pass; JSON status on localhost")
+        else:
+            try:
+                convert(csv_path, backend.output_path)
+            except RuntimeError as exc:
+                # An API failure a backend client could not recover from (e.g. circuitclient.CircuitError).
+                raise SystemExit(f"Error: {exc}") from exc
+
+
+if __name__ == "__main__":
+    main()
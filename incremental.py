@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Incremental release-notes regeneration: re-render only the tickets that changed since the last export."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from metrics import stage
+from noprompt import (
+    Issue,
+    build_section,
+    build_table_rows,
+    collapse_backports,
+    iter_issues,
+    join_release_notes,
+    ordered_fix_versions,
+)
+
+if TYPE_CHECKING:
+    from issuefilter import IssueFilter
+
+STATE_VERSION = 3
+
+
+def state_path_for(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}.state.json")
+
+
+def content_hash(issue: Issue) -> str:
+    """Hash of every field that reaches the rendered row."""
+    digest = hashlib.sha1()
+    for field in (
+        issue.key,
+        issue.summary,
+        issue.issue_type,
+        issue.status,
+        issue.resolution,
+        issue.priority,
+        issue.description,
+        "\x1e".join(issue.fix_versions),
+        "\x1e".join(issue.components),
+        "\x1e".join(issue.labels),
+    ):
+        digest.update(field.encode("utf-8"))
+        digest.update(b"\x1f")
+    # Only collapsed families hash their backports, so every other ticket keeps its old hash.
+    for key, branch in issue.clones:
+        digest.update(f"{key}\x1e{branch}\x1f".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_state(path: Path) -> dict[str, dict]:
+    """Issue key -> {updated, hash, rows, fix_versions, sort_key, clones}; empty when missing or stale."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    if data.get("version") != STATE_VERSION:
+        return {}
+    return data["issues"]
+
+
+def save_state(path: Path, issues: dict[str, dict]) -> None:
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        json.dump({"version": STATE_VERSION, "issues": issues}, handle, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temp_name, path)
+
+
+def read_sections(path: Path) -> dict[str, list[str]]:
+    """Split a previously written output file into its per-fix-version sections."""
+    sections: dict[str, list[str]] = {}
+    current: list[str] | None = None
+    for line in path.read_text(encoding="utf-8").split("\n"):
+        if line.startswith("== ") and line.endswith(" =="):
+            current = sections.setdefault(line[3:-3], [])
+        if current is not None:
+            current.append(line)
+    for lines in sections.values():
+        # join_release_notes strips the final separator; restore it so every section matches build_section.
+        while lines and lines[-1] == "":
+            lines.pop()
+        lines.append("")
+    return sections
+
+
+def regenerate(
+    csv_path: Path,
+    output_path: Path,
+    state_path: Path | None = None,
+    where: IssueFilter | None = None,
+    keep_clones: bool = False,
+    parse_jobs: int = 1,
+) -> None:
+    """Patch ``output_path`` from ``csv_path``, re-rendering only new, edited and removed tickets.
+
+    Tickets whose ``Updated`` timestamp matches the state file are reused without
+    hashing; the rest are hashed and only re-rendered when their content changed.
+    Only the fix-version sections that gained, lost or changed a row are rebuilt;
+    every other section is copied from the existing output file.
+
+    Unless ``keep_clones``, backport clone families are collapsed first. A family's
+    row depends on its clones as well as its canonical ticket, so families are always
+    hashed rather than trusted by ``Updated`` time.
+    """
+    if not csv_path.exists():
+        raise SystemExit(f"CSV file not found: {csv_path}")
+    state_path = state_path or state_path_for(output_path)
+
+    with stage("state"):
+        previous = load_state(state_path)
+        old_sections = read_sections(output_path) if previous and output_path.exists() else {}
+        if not old_sections:
+            previous = {}
+
+    current: dict[str, dict] = {}
+    dirty_versions: set[str] = set()
+    added = changed = 0
+    # "collect" also covers re-rendering the rows of new and edited tickets.
+    with stage("collect"):
+        issues = iter_issues(csv_path, where=where, parse_jobs=parse_jobs)
+        if not keep_clones:
+            issues = collapse_backports(list(issues))
+        for issue in issues:
+            entry = previous.get(issue.key)
+            reusable = entry is not None and not issue.clones and not entry.get("clones")
+            if reusable and issue.updated and entry["updated"] == issue.updated:
+                current[issue.key] = entry
+                continue
+
+            digest = content_hash(issue)
+            if entry is not None and entry["hash"] == digest:
+                current[issue.key] = {**entry, "updated": issue.updated}
+                continue
+
+            if entry is None:
+                added += 1
+            else:
+                changed += 1
+                dirty_versions.update(entry["fix_versions"])
+            dirty_versions.update(issue.fix_versions)
+            current[issue.key] = {
+                "updated": issue.updated,
+                "hash": digest,
+                "rows": build_table_rows([issue]),
+                "fix_versions": list(issue.fix_versions),
+                "sort_key": list(issue.sort_key),
+                "clones": len(issue.clones),
+            }
+
+    removed = previous.keys() - current.keys()
+    for key in removed:
+        dirty_versions.update(previous[key]["fix_versions"])
+
+    if not current:
+        raise SystemExit("No issues with acceptable resolution were found in the CSV export.")
+
+    with stage("group"):
+        by_version: dict[str, list[dict]] = {}
+        for entry in current.values():
+            for version in entry["fix_versions"]:
+                by_version.setdefault(version, []).append(entry)
+
+    with stage("render"):
+        sections: list[list[str]] = []
+        for version in ordered_fix_versions(by_version):
+            if version in old_sections and version not in dirty_versions:
+                sections.append(old_sections[version])
+                continue
+            entries = sorted(by_version[version], key=lambda item: item["sort_key"])
+            sections.append(build_section(version, [line for entry in entries for line in entry["rows"]]))
+
+    with stage("write"):
+        if dirty_versions or set(old_sections) != set(by_version):
+            output_path.write_text(join_release_notes(sections), encoding="utf-8")
+        save_state(state_path, current)
+    rebuilt = len(by_version) - sum(1 for version in by_version if version in old_sections and version not in dirty_versions)
+    print(
+        f"Updated {output_path}: {added} new, {changed} changed, {len(removed)} removed of {len(current)} issues; "
+        f"rebuilt {rebuilt} of {len(by_version)} fix version sections."
+    )
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Compile ``-where`` expressions into issue predicates, evaluated while an export streams in.
+
+    fix_version ~ "9.4.*" and priority in (P1, P2)
+    component = Search and not label = docs
+    updated >= 2025-07-01 or (status != Closed and resolution = "")
+
+Fields are key, summary, type, status, resolution, priority, description, updated,
+fix_version, component and label. ``=``/``!=`` compare case-insensitively, ``~``/``!~``
+match shell-style globs, ``in``/``not in`` take a parenthesized list, and ``<``, ``<=``,
+``>``, ``>=`` order versions naturally and ``updated`` by date. A multi-valued field
+(fix_version, component, label) matches when any of its values does. A priority
+matches both its full name (``P1-Immediate``) and its number (``P1``).
+"""
+from __future__ import annotations
+
+import fnmatch
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable
+
+from noprompt import Issue, natural_key
+
+Predicate = Callable[[Issue], bool]
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>!=|!~|<=|>=|=|~|<|>|\(|\)|,)
+      | (?P<word>[^\s=!~<>(),"']+)
+    )""",
+    re.VERBOSE,
+)
+_KEYWORDS = {"and", "or", "not", "in"}
+_ESCAPE = re.compile(r"\\(.)")
+
+# Field name (and aliases) -> the issue's values for that field, always as a tuple.
+FIELDS: dict[str, Callable[[Issue], tuple[str, ...]]] = {
+    "key": lambda issue: (issue.key,),
+    "summary": lambda issue: (issue.summary,),
+    "type": lambda issue: (issue.issue_type,),
+    "status": lambda issue: (issue.status,),
+    "resolution": lambda issue: (issue.resolution,),
+    "priority": lambda issue: _priority_names(issue.priority),
+    "description": lambda issue: (issue.description,),
+    "updated": lambda issue: (issue.updated,),
+    "fix_version": lambda issue: issue.fix_versions,
+    "component": lambda issue: issue.components,
+    "label": lambda issue: issue.labels,
+}
+ALIASES = {
+    "issue_type": "type",
+    "fix_versions": "fix_version",
+    "fixversion": "fix_version",
+    "version": "fix_version",
+    "components": "component",
+    "labels": "label",
+}
+# Fields an issuestore can narrow through an index before the predicate runs.
+INDEXED_FIELDS = ("key", "fix_version", "component")
+
+
+@lru_cache(maxsize=64)
+def _priority_names(priority: str) -> tuple[str, ...]:
+    short, dash, _ = priority.partition("-")
+    return (priority, short) if dash else (priority,)
+
+
+@lru_cache(maxsize=65536)
+def _parse_date(text: str) -> datetime | None:
+    for fmt in ("%d/%b/%y %I:%M %p", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%d/%b/%y"):
+        try:
+            return datetime.strptime(text.strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class IssueFilter:
+    """A compiled ``-where`` expression; call it with an Issue.
+
+    ``fields`` lists every field the expression reads. ``indexed_terms`` lists
+    ``(field, values)`` equality tests on indexed fields that every match must
+    satisfy, so a store can pre-select candidates. Pickles as its source text,
+    so it can be sent to batch worker processes.
+    """
+
+    def __init__(self, text: str, predicate: Predicate, fields: set[str], indexed_terms: list[tuple[str, tuple[str, ...]]]) -> None:
+        self.text = text
+        self.predicate = predicate
+        self.fields = frozenset(fields)
+        self.indexed_terms = indexed_terms
+
+    def __call__(self, issue: Issue) -> bool:
+        return self.predicate(issue)
+
+    def __reduce__(self):
+        return compile_filter, (self.text,)
+
+    def __repr__(self) -> str:
+        return f"IssueFilter({self.text!r})"
+
+
+def _tokenize(text: str) -> list[tuple[str, str]]:
+    tokens: list[tuple[str, str]] = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise SystemExit(f"Invalid -where expression: unexpected {text[position:].strip()[:20]!r}.")
+        position = match.end()
+        if match["string"] is not None:
+            tokens.append(("value", _ESCAPE.sub(r"\1", match["string"][1:-1])))
+        elif match["op"] is not None:
+            tokens.append(("op", match["op"]))
+        elif match["word"].lower() in _KEYWORDS:
+            tokens.append(("keyword", match["word"].lower()))
+        else:
+            tokens.append(("value", match["word"]))
+    return tokens
+
+
+def _compare(field: str, op: str, values: tuple[str, ...]) -> Predicate:
+    """One field test, with its values lowered, globbed or parsed once at compile time."""
+    get = FIELDS[field]
+    negate = op in ("!=", "!~", "not in")
+
+    if op in ("=", "!=", "in", "not in"):
+        wanted = {value.lower() for value in values}
+
+        def matches(issue: Issue) -> bool:
+            return any(value.lower() in wanted for value in get(issue))
+    elif op in ("~", "!~"):
+        pattern = re.compile("|".join(fnmatch.translate(value) for value in values), re.IGNORECASE)
+
+        def matches(issue: Issue) -> bool:
+            return any(pattern.match(value) for value in get(issue))
+    else:
+        if field == "updated":
+            bound = _parse_date(values[0])
+            if bound is None:
+                raise SystemExit(f"Invalid -where expression: {values[0]!r} is not a date (use YYYY-MM-DD).")
+            key = _parse_date
+        else:
+            bound = natural_key(values[0].lower())
+            key = lambda value: natural_key(value.lower())
+        check = {"<": bound.__gt__, "<=": bound.__ge__, ">": bound.__lt__, ">=": bound.__le__}[op]
+
+        def matches(issue: Issue) -> bool:
+            for value in get(issue):
+                converted = key(value)
+                if converted is not None and check(converted):
+                    return True
+            return False
+
+    if negate:
+        return lambda issue: not matches(issue)
+    return matches
+
+
+class _Parser:
+    """Recursive descent over: or_expr := and_expr (or and_expr)*; and_expr := not_expr (and not_expr)*;
+    not_expr := not not_expr | ( or_expr ) | field op value | field [not] in ( value, ... )."""
+
+    def __init__(self, tokens: list[tuple[str, str]]) -> None:
+        self.tokens = tokens
+        self.position = 0
+        self.fields: set[str] = set()
+
+    def peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self, kind: str | None = None, text: str | None = None) -> tuple[str, str]:
+        token = self.peek()
+        if token is None or (kind and token[0] != kind) or (text and token[1] != text):
+            found = "the end of the expression" if token is None else repr(token[1])
+            raise SystemExit(f"Invalid -where expression: expected {text or kind} but found {found}.")
+        self.position += 1
+        return token
+
+    def accept(self, kind: str, text: str) -> bool:
+        if self.peek() == (kind, text):
+            self.position += 1
+            return True
+        return False
+
+    def parse_or(self) -> tuple[Predicate, list]:
+        predicate, terms = self.parse_and()
+        alternatives = [predicate]
+        while self.accept("keyword", "or"):
+            alternatives.append(self.parse_and()[0])
+        if len(alternatives) == 1:
+            return predicate, terms
+        return (lambda issue: any(test(issue) for test in alternatives)), []
+
+    def parse_and(self) -> tuple[Predicate, list]:
+        predicate, terms = self.parse_not()
+        conjuncts = [predicate]
+        terms = list(terms)
+        while self.accept("keyword", "and"):
+            predicate, more = self.parse_not()
+            conjuncts.append(predicate)
+            terms.extend(more)
+        if len(conjuncts) == 1:
+            return predicate, terms
+        return (lambda issue: all(test(issue) for test in conjuncts)), terms
+
+    def parse_not(self) -> tuple[Predicate, list]:
+        if self.accept("keyword", "not"):
+            inner = self.parse_not()[0]
+            return (lambda issue: not inner(issue)), []
+        if self.accept("op", "("):
+            result = self.parse_or()
+            self.take("op", ")")
+            return result
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> tuple[Predicate, list]:
+        name = self.take("value")[1].lower()
+        field = ALIASES.get(name, name)
+        if field not in FIELDS:
+            raise SystemExit(f"Invalid -where expression: unknown field {name!r} (expected one of {', '.join(FIELDS)}).")
+        self.fields.add(field)
+
+        if self.accept("keyword", "not"):
+            self.take("keyword", "in")
+            op = "not in"
+        elif self.accept("keyword", "in"):
+            op = "in"
+        else:
+            op = self.take("op")[1]
+            if op in ("(", ")", ","):
+                raise SystemExit(f"Invalid -where expression: expected a comparison after {name!r}.")
+
+        if op in ("in", "not in"):
+            self.take("op", "(")
+            values = [self.take("value")[1]]
+            while self.accept("op", ","):
+                values.append(self.take("value")[1])
+            self.take("op", ")")
+        else:
+            values = [self.take("value")[1]]
+
+        terms = [(field, tuple(values))] if field in INDEXED_FIELDS and op in ("=", "in") else []
+        return _compare(field, op, tuple(values)), terms
+
+
+@lru_cache(maxsize=32)
+def compile_filter(text: str) -> IssueFilter:
+    """Parse ``text`` once into an IssueFilter; invalid expressions exit with a message."""
+    parser = _Parser(_tokenize(text))
+    if parser.peek() is None:
+        raise SystemExit("Invalid -where expression: it is empty.")
+    predicate, terms = parser.parse_or()
+    if parser.peek() is not None:
+        raise SystemExit(f"Invalid -where expression: unexpected {parser.peek()[1]!r}.")
+    return IssueFilter(text, predicate, parser.fields, terms)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Parse a Jira CSV export once into an indexed SQLite store that every converter can read.
+
+The wide export (thousands of columns) is reduced to the fields ``noprompt.Issue``
+keeps, one row per ticket in export order, with lookup tables indexed by issue
+key, fix version and component. Reading the store skips CSV parsing entirely.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+from batch import pop_value
+from metrics import timed
+from noprompt import CSV_PATH, INCLUDED_RESOLUTIONS, Issue, compile_where, iter_issues
+
+if TYPE_CHECKING:
+    from issuefilter import IssueFilter
+
+STORE_PATH = Path("Jira.db")
+SCHEMA_VERSION = 2
+# Separates the values of fix_versions, components, labels and clone_links in their issues columns.
+LIST_SEPARATOR = "\x1f"
+
+SCHEMA = """
+CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE issues (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    issue_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    description TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    fix_versions TEXT NOT NULL,
+    components TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    clone_links TEXT NOT NULL
+);
+CREATE TABLE fix_versions (issue_id INTEGER NOT NULL, version TEXT NOT NULL);
+CREATE TABLE components (issue_id INTEGER NOT NULL, component TEXT NOT NULL);
+"""
+# Built after the bulk insert, which is much faster than maintaining them row by row.
+# Case-insensitive, like the -where comparisons they serve.
+INDEXES = """
+CREATE INDEX issues_key ON issues (key COLLATE NOCASE);
+CREATE INDEX fix_versions_version ON fix_versions (version COLLATE NOCASE, issue_id);
+CREATE INDEX components_component ON components (component COLLATE NOCASE, issue_id);
+"""
+# -where field -> the indexed lookup that pre-selects issue ids for an equality test on it.
+INDEXED_LOOKUPS = {
+    "key": "id IN (SELECT id FROM issues WHERE key COLLATE NOCASE IN ({}))",
+    "fix_version": "id IN (SELECT issue_id FROM fix_versions WHERE version COLLATE NOCASE IN ({}))",
+    "component": "id IN (SELECT issue_id FROM components WHERE component COLLATE NOCASE IN ({}))",
+}
+
+
+def convert(csv_path: Path, store_path: Path) -> int:
+    """Write every ticket of ``csv_path`` (all resolutions) to a new store; returns the ticket count."""
+    if not csv_path.exists():
+        raise SystemExit(f"CSV file not found: {csv_path}")
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=store_path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(temp_name)
+        try:
+            # A half-built store is discarded anyway, so skip the journal and fsyncs.
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            connection.executescript(SCHEMA)
+            count = 0
+            with connection:
+                for count, issue in enumerate(iter_issues(csv_path, resolutions=None), start=1):
+                    connection.execute(
+                        "INSERT INTO issues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            count,
+                            issue.key,
+                            issue.summary,
+                            issue.issue_type,
+                            issue.status,
+                            issue.resolution,
+                            issue.priority,
+                            issue.description,
+                            issue.updated,
+                            LIST_SEPARATOR.join(issue.fix_versions),
+                            LIST_SEPARATOR.join(issue.components),
+                            LIST_SEPARATOR.join(issue.labels),
+                            LIST_SEPARATOR.join(issue.clone_links),
+                        ),
+                    )
+                    connection.executemany(
+                        "INSERT INTO fix_versions VALUES (?, ?)", [(count, version) for version in issue.fix_versions]
+                    )
+                    connection.executemany(
+                        "INSERT INTO components VALUES (?, ?)", [(count, component) for component in issue.components]
+                    )
+                stat = csv_path.stat()
+                connection.executemany(
+                    "INSERT INTO meta VALUES (?, ?)",
+                    [
+                        ("schema_version", str(SCHEMA_VERSION)),
+                        ("source", str(csv_path.resolve())),
+                        ("source_size", str(stat.st_size)),
+                        ("source_mtime", str(stat.st_mtime_ns)),
+                    ],
+                )
+            connection.executescript(INDEXES)
+        finally:
+            connection.close()
+        os.replace(temp_name, store_path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+    return count
+
+
+def open_store(store_path: Path) -> sqlite3.Connection:
+    """Open a store read-only, warning when the export it was built from has changed since."""
+    if not store_path.exists():
+        raise SystemExit(f"Issue store not found: {store_path} (build it with `python issuestore.py convert`).")
+    connection = sqlite3.connect(f"{store_path.resolve().as_uri()}?mode=ro", uri=True)
+    meta = dict(connection.execute("SELECT name, value FROM meta"))
+    if meta.get("schema_version") != str(SCHEMA_VERSION):
+        connection.close()
+        raise SystemExit(f"{store_path} was built by a different version; rebuild it with `python issuestore.py convert`.")
+    source = Path(meta["source"])
+    try:
+        stat = source.stat()
+    except FileNotFoundError:
+        pass
+    else:
+        if str(stat.st_size) != meta["source_size"] or str(stat.st_mtime_ns) != meta["source_mtime"]:
+            print(f"Warning: {source} changed after {store_path} was built; rerun convert to pick up the changes.")
+    return connection
+
+
+@lru_cache(maxsize=4096)
+def _split(text: str) -> tuple[str, ...]:
+    # Most tickets share a handful of version/component/label combinations.
+    return tuple(sys.intern(value) for value in text.split(LIST_SEPARATOR)) if text else ()
+
+
+def iter_store_issues(
+    store_path: Path,
+    resolutions: set[str] | None = INCLUDED_RESOLUTIONS,
+    where: IssueFilter | None = None,
+) -> Iterator[Issue]:
+    """Yield the stored tickets in export order, with the same filtering as ``iter_issues``.
+
+    Equality tests that every ``where`` match must pass (on key, fix version or
+    component) are answered from the indexes, so only candidate rows are read.
+    """
+    query = (
+        "SELECT key, summary, issue_type, status, resolution, priority, description, updated, "
+        "fix_versions, components, labels, clone_links FROM issues"
+    )
+    clauses: list[str] = []
+    params: list[str] = []
+    for field, values in where.indexed_terms if where is not None else ():
+        clauses.append(INDEXED_LOOKUPS[field].format(", ".join("?" * len(values))))
+        params.extend(values)
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY id"
+
+    connection = open_store(store_path)
+    try:
+        for key, summary, issue_type, status, resolution, priority, description, updated, fixes, comps, labels, links in (
+            timed("load", connection.execute(query, params))
+        ):
+            if resolutions is not None and resolution.lower() not in resolutions:
+                continue
+            issue = Issue(
+                key=key,
+                summary=summary,
+                issue_type=issue_type,
+                status=status,
+                resolution=resolution,
+                priority=priority,
+                description=description,
+                updated=updated,
+                fix_versions=_split(fixes),
+                components=_split(comps),
+                labels=_split(labels),
+                clone_links=_split(links),
+            )
+            if where is None or where(issue):
+                yield issue
+    finally:
+        connection.close()
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    if args and args[0] == "convert":
+        csv_path = Path(args[1]) if len(args) > 1 else CSV_PATH
+        store_path = Path(args[2]) if len(args) > 2 else csv_path.with_suffix(STORE_PATH.suffix)
+        started = time.perf_counter()
+        count = convert(csv_path, store_path)
+        print(f"Stored {count} issues from {csv_path} in {store_path} in {time.perf_counter() - started:.2f}s.")
+    elif args and args[0] == "query":
+        where = compile_where(pop_value(args, "-where", ""))
+        # Flags such as the old -version and -component are gone; ignoring them would list every issue.
+        unknown = [arg for arg in args[1:] if arg.startswith("-")] + args[2:]
+        if unknown:
+            raise SystemExit(f"Unknown query arguments: {' '.join(dict.fromkeys(unknown))}. Filter with -where EXPR.")
+        store_path = Path(args[1]) if len(args) > 1 else STORE_PATH
+        started = time.perf_counter()
+        issues = list(iter_store_issues(store_path, resolutions=None, where=where))
+        for issue in issues:
+            print(f"{issue.key}\t{issue.resolution or '-'}\t{issue.summary}")
+        print(f"{len(issues)} issues in {1000 * (time.perf_counter() - started):.0f} ms.")
+    else:
+        print("Usage:")
+        print("  python issuestore.py convert [Jira.csv] [Jira.db]                          # Parse an export into a store")
+        print("  python issuestore.py query [Jira.db] [-where EXPR]                         # List stored issues")
+        print("Then pass the store to the converters, e.g. python noprompt.py -input Jira.db")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
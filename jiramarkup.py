@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Convert the Jira wiki markup in a ticket description to MediaWiki for one table cell.
+
+One compiled pattern finds every construct in a single left-to-right pass:
+``{noformat}``/``{code}`` blocks, ``{{monospace}}``, links, images, ``{color}``-style
+macros, ``h3.`` headings, list bullets, ``*bold*`` and ``_italic_``, line breaks, and
+bare ``|`` (which would start a new cell). The output stays on one line, with
+``<br/>`` between lines, as the table rows need.
+
+Jira's smart links repeat their URL (``[url|url|smart-link]``), so they become the
+bare URL. Runs of log lines are shown as code, one per line, without lines that
+differ only in their numbers (timestamps, thread and process IDs), and capped at
+``LOG_LINE_CAP`` lines.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+# The most log lines of a {noformat}/{code} run a cell shows; the rest are counted.
+LOG_LINE_CAP = 10
+IMAGE_SUFFIXES = ("png", "jpg", "jpeg", "gif", "svg", "bmp", "webp")
+
+_TOKENS = re.compile(
+    r"""
+    # Every construct starts with one of these, so most positions fail at the first test.
+    (?=[{\[!*#_|\n-]|^[^\S\n]|^h|[^\S\n]+\n)
+    (?:(?P<block>\{(?P<tag>noformat|code)(?::[^}\n]*)?\}(?P<body>[\s\S]*?)\{(?P=tag)\})
+    |(?P<mono>\{\{(?P<mono_text>[^\n]+?)\}\})
+    |(?P<link>\[(?P<link_parts>[^\[\]\n]+)\])
+    |(?P<image>!(?P<image_name>[^!\s|][^!\n|]*?\.(?:"""
+    + "|".join(IMAGE_SUFFIXES)
+    + r"""))(?:\|[^!\n]*)?!)
+    |(?P<macro>\{(?:color|quote|panel)(?::[^}\n]*)?\})
+    |(?P<heading>^h[1-6]\.[ \t]*(?P<heading_text>[^\n]*))
+    |(?P<bullet>^[ \t]*(?P<bullet_marks>[*#-]+)[ \t]+)
+    |(?P<bold>(?<![\w*])\*(?=[^\s*])(?P<bold_text>[^*\n]+?)(?<=\S)\*(?![\w*]))
+    |(?P<italic>(?<![\w_])_(?=[^\s_])(?P<italic_text>[^_\n]+?)(?<=\S)_(?![\w_]))
+    |(?P<newlines>[^\S\n]*\n(?:[^\S\n]*\n)*)
+    |(?P<pipe>\|))
+    """,
+    re.VERBOSE | re.MULTILINE | re.IGNORECASE,
+)
+_NUMBERED = re.compile(r"[ \t]*#+[ \t]")
+_DIGITS = re.compile(r"\d+")
+_URL = re.compile(r"(?:https?|ftp|mailto):\S+$", re.IGNORECASE)
+_PLAIN_TAGS = re.compile(r"\{(?:noformat|code|color|quote|panel)(?::[^}\n]*)?\}", re.IGNORECASE)
+
+
+def code(text: str) -> str:
+    """``text`` as inline code. ``&`` and ``<`` are escaped so a ``</nowiki>`` in it can't end the nowiki early."""
+    if "&" in text or "<" in text:
+        text = text.replace("&", "&amp;").replace("<", "&lt;")
+    return f"<code><nowiki>{text}</nowiki></code>"
+
+
+def log_lines(lines: list[str]) -> str:
+    """Lines of pasted logs as code: repeats (ignoring numbers) dropped, at most ``LOG_LINE_CAP`` shown."""
+    seen: set[str] = set()
+    shown: list[str] = []
+    similar = hidden = 0
+    for line in lines:
+        shape = _DIGITS.sub("#", line)
+        if shape in seen:
+            similar += 1
+        elif len(shown) == LOG_LINE_CAP:
+            hidden += 1
+        else:
+            seen.add(shape)
+            shown.append(code(line))
+    notes = []
+    if similar:
+        notes.append(f"{similar} similar line{'s' if similar != 1 else ''} omitted")
+    if hidden:
+        notes.append(f"{hidden} more line{'s' if hidden != 1 else ''}")
+    if notes:
+        shown.append(f"''({'; '.join(notes)})''")
+    return "<br/>".join(shown)
+
+
+def link(parts: list[str]) -> str | None:
+    """MediaWiki for a ``[...]`` link, or ``None`` when the brackets aren't a Jira link."""
+    if parts[0].startswith("~"):
+        # [~accountid:...] mentions carry no readable name.
+        name = parts[0][1:]
+        return "" if name.startswith("accountid:") else f"@{name}"
+    if len(parts) == 1:
+        return parts[0].strip() if _URL.match(parts[0].strip()) else None
+    text, url = parts[0].strip(), parts[1].strip()
+    if not _URL.match(url):
+        return None
+    if not text or text == url:
+        # Smart links repeat the URL; MediaWiki links a bare URL by itself.
+        return url
+    return f"[{url} {convert_inline(text)}]"
+
+
+def convert_inline(text: str) -> str:
+    """Convert ``text`` (part of one line, e.g. a bold span's contents)."""
+    return _convert(text)
+
+
+def _convert(text: str) -> str:
+    out: list[str] = []
+    logs: list[str] = []
+    log_break = False
+    number = 0
+    position = 0
+
+    def flush() -> None:
+        nonlocal log_break
+        if logs:
+            out.append(log_lines(logs))
+            if log_break:
+                out.append("<br/>")
+            logs.clear()
+            log_break = False
+
+    for match in _TOKENS.finditer(text):
+        plain = text[position:match.start()]
+        position = match.end()
+        kind = match.lastgroup
+        if plain and not (logs and plain.isspace()):
+            flush()
+            out.append(plain)
+        if kind == "block":
+            if logs and not log_break and not plain:
+                # Two blocks on one line are one line of output.
+                logs[-1] += match["body"].strip("\n")
+            else:
+                logs.extend(line for line in match["body"].strip("\n").split("\n") if line.strip())
+            log_break = False
+            continue
+        if kind == "newlines":
+            if logs:
+                log_break = True
+            else:
+                out.append("<br/>")
+            if not _NUMBERED.match(text, position):
+                number = 0
+            continue
+
+        flush()
+        if kind == "mono":
+            out.append(code(match["mono_text"]))
+        elif kind == "link":
+            converted = link(match["link_parts"].split("|"))
+            out.append(converted if converted is not None else match[0].replace("|", "&#124;"))
+        elif kind == "image":
+            out.append(f"[image: {match['image_name']}]")
+        elif kind == "macro":
+            pass
+        elif kind == "heading":
+            out.append(f"'''{convert_inline(match['heading_text'].strip())}'''")
+        elif kind == "bullet":
+            if match["bullet_marks"].startswith("#"):
+                number += 1
+                out.append(f"{number}. ")
+            else:
+                out.append("&bull; ")
+        elif kind == "bold":
+            out.append(f"'''{convert_inline(match['bold_text'])}'''")
+        elif kind == "italic":
+            out.append(f"''{convert_inline(match['italic_text'])}''")
+        elif kind == "pipe":
+            out.append("&#124;")
+
+    plain = text[position:]
+    if plain and not (logs and plain.isspace()):
+        flush()
+        out.append(plain)
+    log_break = False
+    flush()
+    return "".join(out)
+
+
+@lru_cache(maxsize=8192)
+def jira_to_mediawiki(text: str) -> str:
+    """A description cell: ``text`` converted to one line of MediaWiki, or ``&mdash;`` when empty.
+
+    Cached by content, so the identical descriptions of backport clones (and of an
+    unchanged export in -watch mode) are converted once.
+    """
+    cleaned = text.strip()
+    if not cleaned:
+        return "&mdash;"
+    if "\r" in cleaned:
+        cleaned = cleaned.replace("\r\n", "\n").replace("\r", "\n")
+    return _convert(cleaned)
+
+
+def plain_lines(text: str) -> list[str]:
+    """The non-blank lines of ``text`` with Jira's block and macro tags removed, for formats other than MediaWiki."""
+    if "{" in text:
+        text = _PLAIN_TAGS.sub("", text)
+    return [line.strip() for line in text.splitlines() if line.strip()]
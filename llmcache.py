@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Content-addressed on-disk cache for LLM responses, so unchanged tickets are not re-sent."""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(".rexml-cache")
+MAX_CACHE_BYTES = 256 * 2**20
+MAX_CACHE_AGE_DAYS = 30
+
+
+class ResponseCache:
+    """Stores one text file per key under ``directory``, named by the key's SHA-256.
+
+    Entries older than ``max_age_days`` (by last use) are ignored and evicted; when the
+    cache grows past ``max_bytes``, the least recently used entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        directory: Path = CACHE_DIR,
+        max_bytes: int = MAX_CACHE_BYTES,
+        max_age_days: float = MAX_CACHE_AGE_DAYS,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            encoded = part.encode("utf-8")
+            # Length-prefix each part so ("ab", "c") and ("a", "bc") hash differently.
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.txt"
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age:
+                raise FileNotFoundError(path)
+            text = path.read_text(encoding="utf-8")
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so concurrent runs never read a half-written entry.
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.replace(temp_name, path)
+        self.stores += 1
+
+    def evict(self) -> None:
+        if not self.directory.is_dir():
+            return
+        now = time.time()
+        entries: list[tuple[float, int, Path]] = []
+        for path in self.directory.glob("*/*.txt"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0.0
+        return (
+            f"Cache {self.directory}: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), "
+            f"{self.stores} stored, {self.evictions} evicted."
+        )
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Per-stage wall time, CPU time and peak RSS for one run, written as a JSON metrics file.
+
+The converters mark their stages with ``stage("render")`` and report figures with
+``count``/``sample``. Outside a ``profiled`` run those calls do nothing, so the
+hooks cost nothing in normal runs.
+"""
+from __future__ import annotations
+
+import json
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import ContextManager, Iterable, Iterator, TypeVar
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+T = TypeVar("T")
+
+PROFILE_DIR = Path("profiles")
+# ru_maxrss is in bytes on macOS and KiB on Linux.
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+class RunMetrics:
+    """Stage timings, counters and latency samples for one run; safe to update from several threads.
+
+    A stage entered more than once (e.g. once per batch file) accumulates its calls,
+    wall and CPU time; an enclosing stage's time includes the stages inside it.
+    ``peak_rss_mib`` is the process's high-water mark when the stage last finished,
+    so the first stage that reaches it is the one to look at. CPU time is
+    process-wide, so stages that overlap in threads share it.
+    """
+
+    def __init__(self, command: str) -> None:
+        self.command = command
+        self.started_at = datetime.now(timezone.utc)
+        self.stages: dict[str, dict[str, float]] = {}
+        self.counters: dict[str, float] = {}
+        self.samples: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, name: str, wall: float, cpu: float) -> None:
+        rss = peak_rss_bytes()
+        with self._lock:
+            stats = self.stages.setdefault(name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+            stats["calls"] += 1
+            stats["wall_seconds"] += wall
+            stats["cpu_seconds"] += cpu
+            if rss is not None:
+                stats["peak_rss_mib"] = rss / 2**20
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def timed(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Pass ``iterable`` through, timing only the work done to produce each item."""
+        iterator = iter(iterable)
+        wall = cpu = 0.0
+        try:
+            while True:
+                started, started_cpu = time.perf_counter(), time.process_time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    wall += time.perf_counter() - started
+                    cpu += time.process_time() - started_cpu
+                yield item
+        finally:
+            self._record(name, wall, cpu)
+
+    def count(self, name: str, value: float) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def sample(self, name: str, value: float) -> None:
+        with self._lock:
+            self.samples.setdefault(name, []).append(value)
+
+    def as_dict(self, status: str) -> dict:
+        samples = {}
+        for name, values in self.samples.items():
+            ordered = sorted(values)
+            samples[name] = {
+                "count": len(ordered),
+                "total": sum(ordered),
+                "p50": percentile(ordered, 0.5),
+                "p95": percentile(ordered, 0.95),
+                "max": ordered[-1],
+            }
+        rss = peak_rss_bytes()
+        return {
+            "command": self.command,
+            "argv": sys.argv[1:],
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "status": status,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "peak_rss_mib": rss / 2**20 if rss is not None else None,
+            "stages": self.stages,
+            "counters": self.counters,
+            "samples": samples,
+        }
+
+
+_active: RunMetrics | None = None
+
+
+def stage(name: str) -> ContextManager[None]:
+    """Time the enclosed block as ``name`` when a profiled run is active."""
+    return _active.stage(name) if _active is not None else nullcontext()
+
+
+def timed(name: str, iterable: Iterable[T]) -> Iterable[T]:
+    """Time the production of each item of ``iterable`` as ``name`` when a profiled run is active."""
+    return _active.timed(name, iterable) if _active is not None else iterable
+
+
+def count(name: str, value: float) -> None:
+    if _active is not None:
+        _active.count(name, value)
+
+
+def sample(name: str, value: float) -> None:
+    if _active is not None:
+        _active.sample(name, value)
+
+
+@contextmanager
+def profiled(command: str, enabled: bool, cprofile: bool = False, directory: Path = PROFILE_DIR) -> Iterator[None]:
+    """Record the enclosed run and write ``<directory>/<command>-<UTC time>.json`` (and ``.prof``) on exit.
+
+    The metrics file is written even when the run fails, with ``status`` set accordingly.
+    """
+    global _active
+    if not enabled and not cprofile:
+        yield
+        return
+
+    metrics = _active = RunMetrics(command)
+    profiler = None
+    if cprofile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    status = "failed"
+    try:
+        if profiler is not None:
+            profiler.enable()
+        with metrics.stage("total"):
+            yield
+        status = "ok"
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        _active = None
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = directory / f"{command}-{metrics.started_at:%Y%m%dT%H%M%SZ}"
+        metrics_path = stem.with_suffix(".json")
+        metrics_path.write_text(json.dumps(metrics.as_dict(status), indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote metrics to {metrics_path}.")
+        if profiler is not None:
+            profiler.dump_stats(stem.with_suffix(".prof"))
+            print(f"Wrote cProfile data to {stem.with_suffix('.prof')} (inspect with `python -m pstats`).")
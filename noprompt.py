@@ -6,25 +6,83 @@ import csv
 import re
 import sys
 from collections import defaultdict
+from functools import lru_cache, partial
+from operator import itemgetter
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import TYPE_CHECKING, Iterable, Iterator, Sequence, TextIO
+
+from batch import (
+    DEFAULT_DEBOUNCE_MS,
+    DEFAULT_STATUS_PORT,
+    csv_batch_tasks,
+    pop_flag,
+    pop_option,
+    pop_value,
+    run_batch,
+)
+from jiramarkup import jira_to_mediawiki
+from metrics import count, profiled, stage, timed
+
+if TYPE_CHECKING:
+    from issuefilter import IssueFilter
 
 CSV_PATH = Path("Jira.csv")
 OUTPUT_PATH = Path("output.mw")
+OUTPUT_BUFFER_BYTES = 1 << 20
+# Inputs with these suffixes are issuestore databases rather than CSV exports.
+STORE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
 
 # Allowlist of resolutions that should appear in the release notes.
 INCLUDED_RESOLUTIONS = {"", "fixed", "done", "completed"}
 
-
-def load_csv(path: Path) -> tuple[list[str], list[list[str]]]:
+# Single-valued columns read from each row; everything else in the export is ignored.
+ISSUE_COLUMNS = (
+    "Summary",
+    "Issue key",
+    "Issue Type",
+    "Status",
+    "Resolution",
+    "Priority",
+    "Description",
+    "Updated",
+)
+# Read when present: without "Updated", -incremental hashes every ticket instead of trusting its time.
+OPTIONAL_COLUMNS = {"Updated"}
+# Columns that Jira repeats once per value (e.g. one "Fix versions" column per version).
+REPEATED_COLUMNS = ("Fix versions", "Components", "Labels", "Inward issue link (Cloners)", "Outward issue link (Cloners)")
+
+_DIGITS = re.compile(r"(\d+)")
+_BLANK_LINES = re.compile(r"\n{2,}")
+
+
+def iter_csv_rows(path: Path) -> Iterator[list[str]]:
+    """Yield the header and then each data row, one row at a time."""
     with path.open(newline="", encoding="utf-8") as handle:
-        reader = csv.reader(handle)
-        header = next(reader)
-        rows = [row for row in reader if any(cell.strip() for cell in row)]
-    return header, rows
-
-
-def dedupe_preserve_order(values: Iterable[str]) -> list[str]:
+        for row in csv.reader(handle):
+            if row:
+                yield row
+
+
+def resolve_columns(header: Sequence[str]) -> tuple[dict[str, int], dict[str, list[int]]]:
+    """Map the needed column names to their positions in the export header.
+
+    Optional columns the export lacks are left out of the index; a missing required
+    column stops the run.
+    """
+    index = {name: header.index(name) for name in ISSUE_COLUMNS if name in header}
+    missing = [name for name in ISSUE_COLUMNS if name not in index and name not in OPTIONAL_COLUMNS]
+    if missing:
+        raise SystemExit(f"The CSV export is missing required column(s): {', '.join(missing)}.")
+    repeated: dict[str, list[int]] = {name: [] for name in REPEATED_COLUMNS}
+    for i, name in enumerate(header):
+        if name in repeated:
+            repeated[name].append(i)
+    return index, repeated
+
+
+def dedupe_preserve_order(values: Iterable[str]) -> tuple[str, ...]:
+    # Version, component and label names repeat across thousands of tickets; interning
+    # keeps a single copy of each.
     seen: set[str] = set()
     ordered: list[str] = []
     for value in values:
@@ -32,12 +90,70 @@ def dedupe_preserve_order(values: Iterable[str]) -> list[str]:
         if not cleaned or cleaned in seen:
             continue
         seen.add(cleaned)
-        ordered.append(cleaned)
-    return ordered
+        ordered.append(sys.intern(cleaned))
+    return tuple(ordered)
+
+
+class Issue:
+    """A releasable Jira ticket, reduced to the fields the release notes use."""
+
+    __slots__ = (
+        "key",
+        "summary",
+        "issue_type",
+        "status",
+        "resolution",
+        "priority",
+        "description",
+        "updated",
+        "fix_versions",
+        "components",
+        "labels",
+        "clone_links",
+        "clones",
+        "sort_key",
+    )
+
+    def __init__(
+        self,
+        key: str,
+        summary: str,
+        issue_type: str,
+        status: str,
+        resolution: str,
+        priority: str,
+        description: str,
+        updated: str,
+        fix_versions: tuple[str, ...],
+        components: tuple[str, ...],
+        labels: tuple[str, ...],
+        clone_links: tuple[str, ...] = (),
+    ) -> None:
+        self.key = key
+        self.summary = summary
+        # Low-cardinality fields share one string object per distinct value.
+        self.issue_type = sys.intern(issue_type)
+        self.status = sys.intern(status)
+        self.resolution = sys.intern(resolution)
+        self.priority = sys.intern(priority)
+        self.description = description
+        self.updated = updated
+        self.fix_versions = fix_versions
+        self.components = components
+        self.labels = labels
+        # Keys linked to this one by Jira's Cloners link, in either direction.
+        self.clone_links = clone_links
+        # (key, branch) of the backport clones collapsed into this issue; see clones.py.
+        self.clones: tuple[tuple[str, str], ...] = ()
+        primary_component = components[0].lower() if components else "zzzz"
+        self.sort_key = (primary_component, summary.lower(), key.lower())
+
+    def __repr__(self) -> str:
+        return f"Issue({self.key!r}, {self.summary!r})"
 
 
 def natural_key(text: str) -> list[object]:
-    parts = re.split(r"(\d+)", text)
+    parts = _DIGITS.split(text)
     key: list[object] = []
     for part in parts:
         if part.isdigit():
@@ -51,8 +167,11 @@ def sanitize_cell(text: str) -> str:
     cleaned = text.strip()
     if not cleaned:
         return "&mdash;"
-    cleaned = cleaned.replace("\r\n", "\n").replace("\r", "\n")
-    cleaned = re.sub(r"\n{2,}", "\n", cleaned)
+    # Each pass only runs when its input is present; most cells need just the final replace.
+    if "\r" in cleaned:
+        cleaned = cleaned.replace("\r\n", "\n").replace("\r", "\n")
+    if "\n\n" in cleaned:
+        cleaned = _BLANK_LINES.sub("\n", cleaned)
     return cleaned.replace("\n", "<br/>")
 
 
@@ -62,161 +181,359 @@ def format_list(values: Sequence[str]) -> str:
     return ", ".join(values)
 
 
-def issue_sort_key(issue: dict) -> tuple:
-    primary_component = issue["components"][0].lower() if issue["components"] else "zzzz"
-    return (primary_component, issue["summary"].lower(), issue["key"].lower())
-
-
-def collect_issues(header: Sequence[str], rows: Sequence[Sequence[str]]) -> list[dict]:
-    index = {name: header.index(name) for name in (
-        "Summary",
-        "Issue key",
-        "Issue Type",
-        "Status",
-        "Resolution",
-        "Priority",
-        "Description",
-    )}
-    fix_indexes = [i for i, name in enumerate(header) if name == "Fix versions"]
-    component_indexes = [i for i, name in enumerate(header) if name == "Components"]
-    label_indexes = [i for i, name in enumerate(header) if name == "Labels"]
+# Priority, status, resolution, issue type and the version/component/label tuples take a
+# handful of distinct values across a whole export, so format each distinct value once.
+sanitize_repeated = lru_cache(maxsize=4096)(sanitize_cell)
+format_repeated = lru_cache(maxsize=4096)(format_list)
+
+
+def issue_sort_key(issue: Issue) -> tuple:
+    return issue.sort_key
+
+
+def collect_issues(
+    header: Sequence[str],
+    rows: Iterable[Sequence[str]],
+    resolutions: set[str] | None = INCLUDED_RESOLUTIONS,
+    where: IssueFilter | None = None,
+) -> Iterator[Issue]:
+    """Yield an Issue per row; ``resolutions=None`` keeps every resolution and ``where`` drops non-matches."""
+    index, repeated = resolve_columns(header)
+    fix_count = len(repeated["Fix versions"])
+    component_count = len(repeated["Components"])
+    label_count = len(repeated["Labels"])
+
+    # Project each wide row down to the handful of cells we use, in a single C-level call:
+    # the single-valued columns first, then the fix version, component, label and Cloners link columns.
+    project = itemgetter(
+        *(index[name] for name in ISSUE_COLUMNS if name in index),
+        *repeated["Fix versions"],
+        *repeated["Components"],
+        *repeated["Labels"],
+        *repeated["Inward issue link (Cloners)"],
+        *repeated["Outward issue link (Cloners)"],
+    )
+    has_updated = "Updated" in index
+    first_repeated = len(ISSUE_COLUMNS) - (not has_updated)
+    first_component = first_repeated + fix_count
+    first_label = first_component + component_count
+    first_link = first_label + label_count
 
-    issues: list[dict] = []
     for row in rows:
-        summary = row[index["Summary"]].strip()
+        cells = project(row)
+        summary_cell, key, issue_type, status, resolution_cell, priority, description = cells[:7]
+        updated = cells[7] if has_updated else ""
+        summary = summary_cell.strip()
         if not summary:
             continue
 
-        resolution = row[index["Resolution"]].strip().lower()
-        if resolution not in INCLUDED_RESOLUTIONS:
+        resolution = resolution_cell.strip()
+        if resolutions is not None and resolution.lower() not in resolutions:
             continue
 
-        fix_versions = dedupe_preserve_order(row[i] for i in fix_indexes)
+        fix_versions = dedupe_preserve_order(cells[first_repeated:first_component])
         if not fix_versions:
-            fix_versions = ["Unscheduled"]
-
-        issue = {
-            "summary": summary,
-            "key": row[index["Issue key"]].strip(),
-            "issue_type": row[index["Issue Type"]].strip(),
-            "status": row[index["Status"]].strip(),
-            "resolution": row[index["Resolution"]].strip(),
-            "priority": row[index["Priority"]].strip(),
-            "description": row[index["Description"]],
-            "fix_versions": fix_versions,
-            "all_fix_versions": fix_versions,
-            "components": dedupe_preserve_order(row[i] for i in component_indexes),
-            "labels": dedupe_preserve_order(row[i] for i in label_indexes),
-        }
-        issues.append(issue)
-
-    return issues
-
-
-def group_by_fix_version(issues: Iterable[dict]) -> dict[str, list[dict]]:
-    grouped: dict[str, list[dict]] = defaultdict(list)
+            fix_versions = ("Unscheduled",)
+
+        issue = Issue(
+            key=key.strip(),
+            summary=summary,
+            issue_type=issue_type.strip(),
+            status=status.strip(),
+            resolution=resolution,
+            priority=priority.strip(),
+            description=description,
+            updated=updated.strip(),
+            fix_versions=fix_versions,
+            components=dedupe_preserve_order(cells[first_component:first_label]),
+            labels=dedupe_preserve_order(cells[first_label:first_link]),
+            clone_links=dedupe_preserve_order(cells[first_link:]),
+        )
+        if where is None or where(issue):
+            yield issue
+
+
+def iter_issues(
+    path: Path,
+    resolutions: set[str] | None = INCLUDED_RESOLUTIONS,
+    where: IssueFilter | None = None,
+    parse_jobs: int = 1,
+) -> Iterator[Issue]:
+    """Stream the issues of a Jira export (or of an issuestore built from one) without loading the whole file.
+
+    A ``where`` filter that tests ``resolution`` replaces the ``resolutions`` allowlist.
+    With ``parse_jobs`` > 1, a large CSV is parsed by that many processes (see parallelcsv.py).
+    """
+    if where is not None and "resolution" in where.fields:
+        resolutions = None
+    if path.suffix.lower() in STORE_SUFFIXES:
+        # Imported here because issuestore builds on this module.
+        from issuestore import iter_store_issues
+
+        yield from iter_store_issues(path, resolutions, where)
+        return
+    if parse_jobs > 1:
+        # Imported here because parallelcsv builds on this module.
+        from parallelcsv import parallel_issues
+
+        yield from parallel_issues(path, parse_jobs, resolutions, where)
+        return
+
+    rows = timed("load", iter_csv_rows(path))
+    header = next(rows, None)
+    if header is None:
+        return
+    yield from collect_issues(header, rows, resolutions, where)
+
+
+def group_by_fix_version(issues: Iterable[Issue]) -> dict[str, list[Issue]]:
+    grouped: dict[str, list[Issue]] = defaultdict(list)
     for issue in issues:
-        for version in issue["fix_versions"]:
+        for version in issue.fix_versions:
             grouped[version].append(issue)
     return grouped
 
 
-def ordered_fix_versions(grouped: dict[str, list[dict]]) -> list[str]:
+def ordered_fix_versions(grouped: dict[str, list[Issue]]) -> list[str]:
     versions = list(grouped.keys())
     versions.sort(key=lambda value: (value == "Unscheduled", natural_key(value)))
     return versions
 
 
-def build_table_rows(issues: Iterable[dict]) -> list[str]:
+def ticket_url(key: str) -> str:
+    return f"https://splunk.atlassian.net/browse/{key}"
+
+
+def ticket_link(key: str) -> str:
+    return f"[{ticket_url(key)} {key}]"
+
+
+def format_ticket(issue: Issue) -> str:
+    """The Ticket cell: the issue's link, then the backport clones collapsed into it."""
+    if not issue.clones:
+        return ticket_link(issue.key)
+    backports = ", ".join(
+        f"{ticket_link(key)} ({branch})" if branch else ticket_link(key) for key, branch in issue.clones
+    )
+    return f"{ticket_link(issue.key)}<br/>Backports: {backports}"
+
+
+def render_row(issue: Issue) -> str:
+    """One table row (eleven lines, no trailing newline) for ``issue``."""
+    return (
+        f"|-\n"
+        f"| {format_ticket(issue)}\n"
+        f"| {sanitize_cell(issue.summary)}\n"
+        f"| {format_repeated(issue.components)}\n"
+        f"| {format_repeated(issue.fix_versions)}\n"
+        f"| {sanitize_repeated(issue.priority)}\n"
+        f"| {sanitize_repeated(issue.issue_type)}\n"
+        f"| {sanitize_repeated(issue.status)}\n"
+        f"| {sanitize_repeated(issue.resolution)}\n"
+        f"| {format_repeated(issue.labels)}\n"
+        f"| {jira_to_mediawiki(issue.description)}"
+    )
+
+
+def build_table_rows(issues: Iterable[Issue]) -> list[str]:
     rows: list[str] = []
     for issue in sorted(issues, key=issue_sort_key):
-        ticket_link = f"[https://splunk.atlassian.net/browse/{issue['key']} {issue['key']}]"
-        summary = sanitize_cell(issue["summary"])
-        components = format_list(issue["components"])
-        priority = sanitize_cell(issue["priority"])
-        issue_type = sanitize_cell(issue["issue_type"])
-        status = sanitize_cell(issue["status"])
-        resolution = sanitize_cell(issue["resolution"])
-        labels = format_list(issue["labels"])
-        description = sanitize_cell(issue["description"])
-        fix_versions = format_list(issue["all_fix_versions"])
-
-        rows.extend([
-            "|-",
-            f"| {ticket_link}",
-            f"| {summary}",
-            f"| {components}",
-            f"| {fix_versions}",
-            f"| {priority}",
-            f"| {issue_type}",
-            f"| {status}",
-            f"| {resolution}",
-            f"| {labels}",
-            f"| {description}",
-        ])
+        rows.extend(render_row(issue).split("\n"))
     return rows
 
 
-def build_release_notes(grouped: dict[str, list[dict]]) -> str:
-    lines: list[str] = [
-        "= Fixed issues =",
-        "This page lists Jira tickets that were marked as fixed and are ready to be published in the release notes.",
-        "",
-    ]
-
-    for version in ordered_fix_versions(grouped):
-        issues = grouped[version]
-        lines.append(f"== {version} ==")
-        if version == "Unscheduled":
-            lines.append("Tickets below do not yet have a scheduled fix version.")
-        lines.append("{| class=\"wikitable sortable\"")
-        lines.append("! Ticket !! Summary !! Components !! Fix version(s) !! Priority !! Issue type !! Status !! Resolution !! Labels !! Notes")
-        lines.extend(build_table_rows(issues))
-        lines.append("|}")
-        lines.append("")
+RELEASE_NOTES_PREAMBLE = (
+    "= Fixed issues =",
+    "This page lists Jira tickets that were marked as fixed and are ready to be published in the release notes.",
+    "",
+)
+
+
+TABLE_HEADER = "! Ticket !! Summary !! Components !! Fix version(s) !! Priority !! Issue type !! Status !! Resolution !! Labels !! Notes"
+
 
+def section_header(version: str) -> list[str]:
+    lines = [f"== {version} =="]
+    if version == "Unscheduled":
+        lines.append("Tickets below do not yet have a scheduled fix version.")
+    lines.append("{| class=\"wikitable sortable\"")
+    lines.append(TABLE_HEADER)
+    return lines
+
+
+def build_section(version: str, rows: Sequence[str]) -> list[str]:
+    """The heading and table for one fix version, ending with a blank separator line."""
+    lines = section_header(version)
+    lines.extend(rows)
+    lines.append("|}")
+    lines.append("")
+    return lines
+
+
+def join_release_notes(sections: Iterable[Sequence[str]]) -> str:
+    lines = list(RELEASE_NOTES_PREAMBLE)
+    for section in sections:
+        lines.extend(section)
     return "\n".join(lines).rstrip() + "\n"
 
 
-def process_file(csv_path: Path, output_path: Path) -> None:
+def build_release_notes(grouped: dict[str, list[Issue]], rendered_rows: dict[str, list[str]] | None = None) -> str:
+    """Lay out one table per fix version; ``rendered_rows`` supplies pre-rendered rows per version."""
+    return join_release_notes(
+        build_section(version, rendered_rows[version] if rendered_rows is not None else build_table_rows(grouped[version]))
+        for version in ordered_fix_versions(grouped)
+    )
+
+
+def write_release_notes(grouped: dict[str, list[Issue]], handle: TextIO) -> None:
+    """Stream the same document build_release_notes returns into ``handle``, one section at a time."""
+    # Imported here because renderers builds on this module.
+    from renderers import MediaWikiRenderer, write_document
+
+    write_document(MediaWikiRenderer(), grouped, handle)
+
+
+def compile_where(text: str) -> IssueFilter | None:
+    """Compile a ``-where`` option, or ``None`` when it was not given."""
+    if not text:
+        return None
+    from issuefilter import compile_filter
+
+    return compile_filter(text)
+
+
+def collapse_backports(issues: list[Issue]) -> list[Issue]:
+    """``issues`` with each backport clone family collapsed into one issue (see clones.py)."""
+    # Imported here because clones builds on this module.
+    from clones import collapse_clones
+
+    with stage("dedupe"):
+        issues, families = collapse_clones(issues)
+    if families:
+        folded = sum(len(family.members) for family in families) - len(families)
+        count("clones_collapsed", folded)
+        print(f"Collapsed {folded} backport clones into {len(families)} tickets.")
+    return issues
+
+
+def process_file(
+    csv_path: Path,
+    output_path: Path,
+    incremental: bool = False,
+    where: IssueFilter | None = None,
+    keep_clones: bool = False,
+    parse_jobs: int = 1,
+    pages: bool = False,
+    page_bytes: int | None = None,
+    page_jobs: int = 1,
+    formats: Sequence[str] = ("mw",),
+) -> None:
+    """Render ``csv_path`` to ``output_path``; backport clones share one row unless ``keep_clones``.
+
+    ``parse_jobs`` > 1 parses a large CSV export on that many processes. With ``pages``,
+    the notes are written as one page per fix version (or per ``page_bytes``) under
+    ``<output stem>-pages/`` instead, rendered on ``page_jobs`` processes; see pages.py.
+    Other ``formats`` ("dita", "html") are written next to ``output_path`` from the same
+    parse; see renderers.py.
+    """
+    if incremental:
+        # Imported here because incremental builds on this module.
+        from incremental import regenerate
+
+        regenerate(csv_path, output_path, where=where, keep_clones=keep_clones, parse_jobs=parse_jobs)
+        return
+
     if not csv_path.exists():
         raise SystemExit(f"CSV file not found: {csv_path}")
 
-    header, rows = load_csv(csv_path)
-    issues = collect_issues(header, rows)
-    if not issues:
+    # "collect" includes "load", the time spent reading and splitting CSV rows.
+    with stage("collect"):
+        issues = list(iter_issues(csv_path, where=where, parse_jobs=parse_jobs))
+    if not keep_clones:
+        issues = collapse_backports(issues)
+    with stage("group"):
+        grouped = group_by_fix_version(issues)
+    if not grouped:
         raise SystemExit("No issues with acceptable resolution were found in the CSV export.")
 
-    grouped = group_by_fix_version(issues)
-    release_notes = build_release_notes(grouped)
-    output_path.write_text(release_notes, encoding="utf-8")
-    unique_issue_count = len({issue["key"] for issue in issues})
+    if pages:
+        # Imported here because pages builds on this module.
+        from pages import pages_dir_for, write_pages
+
+        write_pages(grouped, pages_dir_for(output_path), page_bytes, page_jobs)
+        return
+
+    # Imported here because renderers builds on this module.
+    from renderers import write_formats
+
+    written = ", ".join(str(path) for path in write_formats(grouped, output_path, formats))
+    unique_issue_count = len({issue.key for issues in grouped.values() for issue in issues})
     print(
-        f"Wrote {output_path} with {unique_issue_count} unique issues across {len(grouped)} fix version buckets."
+        f"Wrote {written} with {unique_issue_count} unique issues across {len(grouped)} fix version buckets."
     )
 
 
 def main() -> None:
-    if len(sys.argv) > 1 and sys.argv[1] == "-batch":
-        if len(sys.argv) < 3:
-            print("Error: Missing directory path for batch mode.")
-            sys.exit(1)
-        directory = Path(sys.argv[2])
-        if not directory.is_dir():
-            print(f"Error: {directory} is not a directory.")
-            sys.exit(1)
-
-        csv_files = sorted(directory.glob("*.csv"))
-        if not csv_files:
-            print(f"No CSV files found in {directory}.")
-            return
-
-        default_csv = CSV_PATH.resolve()
-        for csv_file in csv_files:
-            output_path = OUTPUT_PATH if csv_file.resolve() == default_csv else csv_file.with_suffix(OUTPUT_PATH.suffix)
-            process_file(csv_file, output_path)
-    else:
-        process_file(CSV_PATH, OUTPUT_PATH)
+    args = sys.argv[1:]
+    with profiled("noprompt", pop_flag(args, "-profile"), pop_flag(args, "-cprofile")):
+        jobs = pop_option(args, "-jobs", 1)
+        debounce_ms = pop_option(args, "-debounce", DEFAULT_DEBOUNCE_MS)
+        status_port = pop_option(args, "-status-port", DEFAULT_STATUS_PORT)
+        csv_path = Path(pop_value(args, "-input", str(CSV_PATH)))
+        where = pop_value(args, "-where", "")
+        page_bytes = pop_option(args, "-page-bytes", 1) if "-page-bytes" in args else None
+        pages = pop_flag(args, "-pages") or page_bytes is not None
+        incremental = pop_flag(args, "-incremental")
+        if pages and incremental:
+            raise SystemExit("-pages already rewrites only the pages that changed; drop -incremental.")
+        formats: tuple[str, ...] = ("mw",)
+        if "-formats" in args:
+            from renderers import parse_formats
+
+            formats = parse_formats(pop_value(args, "-formats", "mw"))
+            if formats != ("mw",) and (pages or incremental):
+                raise SystemExit("-formats writes whole documents; it can't be combined with -pages or -incremental.")
+        convert = partial(
+            process_file,
+            incremental=incremental,
+            where=compile_where(where),
+            keep_clones=pop_flag(args, "-keep-clones"),
+            parse_jobs=pop_option(args, "-parse-jobs", 1),
+            pages=pages,
+            page_bytes=page_bytes,
+            formats=formats,
+        )
+        if args and args[0] == "-batch":
+            if len(args) < 2:
+                print("Error: Missing directory path for batch mode.")
+                sys.exit(1)
+            directory = Path(args[1])
+            if not directory.is_dir():
+                print(f"Error: {directory} is not a directory.")
+                sys.exit(1)
+
+            tasks = csv_batch_tasks(directory, CSV_PATH, OUTPUT_PATH)
+            if not tasks:
+                print(f"No CSV files found in {directory}.")
+                return
+
+            if run_batch(convert, tasks, jobs, executor="process"):
+                sys.exit(1)
+        elif args and args[0] == "-watch":
+            if len(args) < 2:
+                print("Error: Missing directory path for watch mode.")
+                sys.exit(1)
+            directory = Path(args[1])
+            if not directory.is_dir():
+                print(f"Error: {directory} is not a directory.")
+                sys.exit(1)
+            from watch import watch
+
+            tasks_for = partial(csv_batch_tasks, default_csv=CSV_PATH, default_output=OUTPUT_PATH)
+            watch(directory, tasks_for, convert, jobs, "process", debounce_ms, status_port)
+        else:
+            # A single file's pages can use the processes -jobs would give a batch.
+            convert(csv_path, OUTPUT_PATH, page_jobs=jobs)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Write the release notes as one MediaWiki page per fix version, plus an index page.
+
+A single output.mw for a real export outgrows MediaWiki's page-size limit and renders
+slowly. ``write_pages`` instead writes each fix version's table to its own page file.
+A version too big for one page is split into parts. With a byte budget, consecutive
+versions are packed together into pages of at most that size. ``index.mw`` links every
+page.
+
+``manifest.json`` records each page's title, size and content hash. A rerun writes
+only the pages whose content changed, deletes the pages that are gone, and lists both
+in the manifest, so a publishing script only has to upload what changed.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Sequence
+
+from metrics import count, stage
+from noprompt import (
+    RELEASE_NOTES_PREAMBLE,
+    Issue,
+    build_section,
+    issue_sort_key,
+    ordered_fix_versions,
+    render_row,
+)
+
+PAGE_TITLE = "Fixed issues"
+INDEX_NAME = "index.mw"
+MANIFEST_NAME = "manifest.json"
+# MediaWiki's default $wgMaxArticleSize is 2048 KiB; pages stay under it even without a budget.
+MAX_PAGE_BYTES = 2_000_000
+# Page files are written from a few threads: hashing and file writes release the GIL.
+WRITE_THREADS = 8
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class Page:
+    """One output page: its file name, wiki title, and (version, heading, rows) sections."""
+
+    __slots__ = ("name", "title", "sections", "size")
+
+    def __init__(self, name: str, title: str) -> None:
+        self.name = name
+        self.title = title
+        self.sections: list[tuple[str, str, list[str]]] = []
+        self.size = 0
+
+
+def render_rows(issues: Sequence[Issue]) -> list[str]:
+    """Each issue's table row (as ``render_row`` returns it), in table order."""
+    return [render_row(issue) for issue in sorted(issues, key=issue_sort_key)]
+
+
+def split_rows(rows: list[str], limit: int) -> list[list[str]]:
+    """Split a version's rows into parts whose rows take at most ``limit`` bytes (a part holds at least one row)."""
+    parts: list[list[str]] = [[]]
+    size = 0
+    for row in rows:
+        row_size = byte_size([row])
+        if parts[-1] and size + row_size > limit:
+            parts.append([])
+            size = 0
+        parts[-1].append(row)
+        size += row_size
+    return parts
+
+
+def pages_dir_for(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}-pages")
+
+
+def page_name(subtitle: str, taken: set[str]) -> str:
+    """A file name for ``subtitle`` that no other page (or the index) uses."""
+    stem = _UNSAFE.sub("_", subtitle).strip("_") or "page"
+    name = f"{stem}.mw"
+    number = 1
+    while name in taken:
+        number += 1
+        name = f"{stem}_{number}.mw"
+    taken.add(name)
+    return name
+
+
+def byte_size(lines: Sequence[str]) -> int:
+    """Bytes ``lines`` take in a page: each line and its newline."""
+    return sum(len(line.encode("utf-8")) + 1 for line in lines)
+
+
+def page_head(title: str) -> list[str]:
+    return [f"= {title} =", f"[[{PAGE_TITLE}|All fix versions]]", ""]
+
+
+def section_lines(version: str, heading: str, rows: list[str]) -> list[str]:
+    section = build_section(version, rows)
+    section[0] = f"== {heading} =="
+    return section
+
+
+def section_overhead(version: str, heading: str) -> int:
+    """Bytes of a section's heading, table header and closing lines (everything but its rows)."""
+    return byte_size(section_lines(version, heading, []))
+
+
+def plan_pages(versions: list[tuple[str, list[str]]], page_bytes: int | None = None) -> list[Page]:
+    """Lay the versions' rows out on pages of at most ``page_bytes`` (or ``MAX_PAGE_BYTES``).
+
+    Without ``page_bytes``, each version gets its own page, split into parts when it
+    doesn't fit. With it, versions are packed in order into numbered pages, and a version
+    that doesn't fit is continued on the next page. Sizes count the whole page text:
+    the page title and link, and each section's heading and table lines as well as its rows.
+    """
+    limit = min(page_bytes or MAX_PAGE_BYTES, MAX_PAGE_BYTES)
+    total_rows = sum(len(rows) for _, rows in versions)
+    pages: list[Page] = []
+    taken = {INDEX_NAME}
+    for version, rows in versions:
+        # The longest heading and title this version's parts can get, so every part fits.
+        longest = f"{version} (part {len(rows)} of {len(rows)})"
+        title = f"{PAGE_TITLE}/{longest if page_bytes is None else total_rows}"
+        room = limit - byte_size(page_head(title)) - section_overhead(version, longest)
+        if room < 1:
+            raise SystemExit(f"-page-bytes {limit} leaves no room for the rows of {version}; raise it.")
+        parts = split_rows(rows, room)
+        for number, part in enumerate(parts, start=1):
+            heading = f"{version} (part {number} of {len(parts)})" if len(parts) > 1 else version
+            size = byte_size(part) + section_overhead(version, heading)
+            if page_bytes is None or not pages or pages[-1].size + size > limit:
+                subtitle = heading if page_bytes is None else str(len(pages) + 1)
+                page = Page(page_name(subtitle if page_bytes is None else f"page-{subtitle}", taken), f"{PAGE_TITLE}/{subtitle}")
+                page.size = byte_size(page_head(page.title))
+                pages.append(page)
+            pages[-1].sections.append((version, heading, part))
+            pages[-1].size += size
+    return pages
+
+
+def page_text(page: Page) -> str:
+    lines = page_head(page.title)
+    for version, heading, rows in page.sections:
+        lines.extend(section_lines(version, heading, rows))
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def index_text(pages: list[Page]) -> str:
+    lines = list(RELEASE_NOTES_PREAMBLE)
+    for page in pages:
+        for _, heading, rows in page.sections:
+            tickets = len(rows)
+            lines.append(f"* [[{page.title}#{heading}|{heading}]]: {tickets} ticket{'s' if tickets != 1 else ''}")
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def load_manifest(directory: Path) -> dict[str, dict]:
+    try:
+        return json.loads((directory / MANIFEST_NAME).read_text(encoding="utf-8"))["pages"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return {}
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as handle:
+        handle.write(text)
+    os.replace(temp_name, path)
+
+
+def _write_if_changed(path: Path, text: str, previous: dict | None) -> tuple[str, int, bool]:
+    """Hash ``text`` and write it unless the manifest already has that hash for an existing file."""
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    if previous is not None and previous.get("sha256") == digest and path.exists():
+        return digest, len(data), False
+    _write_atomic(path, text)
+    return digest, len(data), True
+
+
+def write_pages(grouped: dict[str, list[Issue]], directory: Path, page_bytes: int | None = None, jobs: int = 1) -> None:
+    """Write one page per fix version (or per ``page_bytes``), ``index.mw`` and ``manifest.json`` under ``directory``.
+
+    With ``jobs`` > 1, the versions' rows are rendered on that many processes.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    previous = load_manifest(directory)
+    versions = ordered_fix_versions(grouped)
+    with stage("render"):
+        if jobs > 1 and len(versions) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(versions))) as pool:
+                rendered = list(pool.map(render_rows, [grouped[version] for version in versions]))
+        else:
+            rendered = [render_rows(grouped[version]) for version in versions]
+        pages = plan_pages(list(zip(versions, rendered)), page_bytes)
+        texts = {page.name: page_text(page) for page in pages}
+        limit = min(page_bytes or MAX_PAGE_BYTES, MAX_PAGE_BYTES)
+        for name, text in texts.items():
+            size = len(text.encode("utf-8"))
+            if size > limit:
+                # Only a single row larger than the budget can get here.
+                raise SystemExit(f"{name} is {size} bytes, over the {limit}-byte page limit; one of its rows is too large.")
+        texts[INDEX_NAME] = index_text(pages)
+    titles = {page.name: page.title for page in pages}
+    titles[INDEX_NAME] = PAGE_TITLE
+
+    with stage("write"):
+        with ThreadPoolExecutor(max_workers=min(WRITE_THREADS, len(texts))) as pool:
+            results = dict(
+                zip(
+                    texts,
+                    pool.map(
+                        lambda name: _write_if_changed(directory / name, texts[name], previous.get(name)),
+                        texts,
+                    ),
+                )
+            )
+        removed = sorted(name for name in previous if name not in texts)
+        for name in removed:
+            (directory / name).unlink(missing_ok=True)
+        changed = [name for name, (_, _, written) in results.items() if written]
+        manifest = {
+            "pages": {
+                name: {"title": titles[name], "sha256": digest, "bytes": size}
+                for name, (digest, size, _) in results.items()
+            },
+            "changed": changed,
+            "removed": removed,
+        }
+        _write_atomic(directory / MANIFEST_NAME, json.dumps(manifest, indent=2) + "\n")
+
+    count("pages", len(texts))
+    count("pages_changed", len(changed))
+    largest = max(size for _, size, _ in results.values())
+    print(
+        f"Wrote {len(changed)} of {len(texts)} pages to {directory} ({len(texts) - len(changed)} unchanged, "
+        f"{len(removed)} removed; largest {largest / 1024:.0f} KiB)."
+    )
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Parse one large Jira CSV export on several cores.
+
+The export is memory-mapped and cut into byte ranges that each end on a record
+boundary. Each range is then parsed and filtered by ``noprompt.collect_issues`` in
+a process pool, and the issues come back in source order.
+
+A newline ends a record only when it is outside a quoted field. Jira quotes every
+field that holds a newline, comma or quote, and doubles the quotes inside it. So a
+newline is a record boundary exactly when an even number of ``"`` bytes comes
+before it. The first pass counts the quotes in each range in parallel. Each cut
+point is then moved forward to the first newline where the running count is even,
+so a multi-line Description or Comment is never split.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Sequence
+
+from metrics import count, stage, timed
+from noprompt import INCLUDED_RESOLUTIONS, Issue, collect_issues, iter_csv_rows
+
+if TYPE_CHECKING:
+    from issuefilter import IssueFilter
+
+# Below this many bytes per worker, starting the pool costs more than it saves.
+MIN_RANGE_BYTES = 4 << 20
+# Each range is decoded whole in its worker, so ranges are capped to bound memory;
+# more ranges than workers also evens out the load.
+MAX_RANGE_BYTES = 64 << 20
+# How far to read at a time while looking for the next record boundary.
+SCAN_BYTES = 1 << 16
+
+Range = tuple[int, int]
+
+
+def count_quotes(path: Path, start: int, end: int) -> int:
+    with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return data[start:end].count(b'"')
+
+
+def next_boundary(data: mmap.mmap, position: int, odd: bool) -> int:
+    """The offset just past the first newline at or after ``position`` that lies outside quotes.
+
+    ``odd`` says whether an odd number of quotes precede ``position``. The result is
+    ``len(data)`` when no record starts after ``position``.
+    """
+    while position < len(data):
+        block = data[position:position + SCAN_BYTES]
+        offset = 0
+        while True:
+            newline = block.find(b"\n", offset)
+            if newline < 0:
+                break
+            odd ^= block.count(b'"', offset, newline) % 2 == 1
+            if not odd:
+                return position + newline + 1
+            offset = newline + 1
+        odd ^= block.count(b'"', offset) % 2 == 1
+        position += len(block)
+    return len(data)
+
+
+def split_ranges(path: Path, parts: int, pool: ProcessPoolExecutor | None = None) -> tuple[list[str], list[Range]]:
+    """Return the export's header and up to ``parts`` byte ranges of whole records covering the rest."""
+    with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        body = next_boundary(data, 0, odd=False)
+        header = next(csv.reader(io.StringIO(data[:body].decode("utf-8"), newline="")), [])
+        size = len(data)
+        step = max((size - body) // parts, 1)
+        cuts = [min(body + step * i, size) for i in range(parts)] + [size]
+        spans = list(zip(cuts, cuts[1:]))
+        if pool is None:
+            quotes = [count_quotes(path, start, end) for start, end in spans]
+        else:
+            quotes = list(pool.map(count_quotes, [path] * len(spans), *zip(*spans)))
+
+        boundaries = [body]
+        seen = 0
+        for (start, _), quotes_in_span in zip(spans[1:], quotes):
+            seen += quotes_in_span
+            boundaries.append(max(next_boundary(data, start, odd=seen % 2 == 1), boundaries[-1]))
+        boundaries.append(size)
+    ranges = [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+    return header, ranges
+
+
+def parse_range(
+    path: Path,
+    start: int,
+    end: int,
+    header: Sequence[str],
+    resolutions: set[str] | None,
+    where: IssueFilter | None,
+) -> list[Issue]:
+    """The issues ``collect_issues`` yields for the records in ``path[start:end]``."""
+    with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        chunk = data[start:end]
+    # Decoded a block at a time, as when the whole file is read, rather than into one huge string.
+    with io.TextIOWrapper(io.BytesIO(chunk), encoding="utf-8", newline="") as text:
+        rows = (row for row in csv.reader(text) if row)
+        return list(collect_issues(header, rows, resolutions, where))
+
+
+def parallel_issues(
+    path: Path,
+    jobs: int,
+    resolutions: set[str] | None = INCLUDED_RESOLUTIONS,
+    where: IssueFilter | None = None,
+) -> Iterator[Issue]:
+    """Yield the issues of the CSV export at ``path`` in source order, parsed by up to ``jobs`` processes.
+
+    An export with less than ``MIN_RANGE_BYTES`` per worker gets fewer workers, and
+    one that is too small for two is streamed in this process as usual.
+    """
+    size = os.path.getsize(path)
+    workers = min(jobs, size // MIN_RANGE_BYTES)
+    if workers < 2:
+        rows = timed("load", iter_csv_rows(path))
+        header = next(rows, None)
+        if header is not None:
+            yield from collect_issues(header, rows, resolutions, where)
+        return
+
+    parts = max(workers, -(-size // MAX_RANGE_BYTES))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        with stage("split"):
+            header, ranges = split_ranges(path, parts, pool)
+        count("parse_ranges", len(ranges))
+        results = pool.map(
+            parse_range,
+            [path] * len(ranges),
+            *zip(*ranges),
+            [header] * len(ranges),
+            [resolutions] * len(ranges),
+            [where] * len(ranges),
+        )
+        for issues in results:
+            yield from issues
@@ -1,25 +1,38 @@
-import pandas as pd
-from openai import OpenAI
+import csv
+import io
+import itertools
 
 # Load csv data
 csv_file = 'Jira.csv'
-csv_data = pd.read_csv(csv_file)
-# Limit to first 100 rows
-limited_csv = csv_data.head(10)
-# Convert limited CSV to string
-csv_text = limited_csv.to_string()
-
-client = OpenAI()
-
-prompt = (
-f"Convert the following CSV data into MediaWiki table format:\n\n"
-f"{csv_text}\n\n"
-"Please format it as a MediaWiki table."
-)
-
-response = client.responses.create(
-    model="gpt-4o",
-    input=prompt,
-)
-
-print(response.output_text)
+
+
+def main():
+    # Limit to the header and the first 10 rows; the csv module reads only those,
+    # where pandas had to be imported (and parse the whole export) just to take head(10)
+    with open(csv_file, newline='', encoding='utf-8') as handle:
+        limited_rows = list(itertools.islice(csv.reader(handle), 11))
+    # Convert limited CSV to string
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(limited_rows)
+    csv_text = buffer.getvalue()
+
+    from openai import OpenAI   # imported only when a request is actually sent
+
+    client = OpenAI()
+
+    prompt = (
+    f"Convert the following CSV data into MediaWiki table format:\n\n"
+    f"{csv_text}\n\n"
+    "Please format it as a MediaWiki table."
+    )
+
+    response = client.responses.create(
+        model="gpt-4o",
+        input=prompt,
+    )
+
+    print(response.output_text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Write the release notes in several formats from one parse: MediaWiki, DITA and HTML.
+
+Every format renders the same model: the fix versions in order (``ordered_fix_versions``),
+each with its issues in table order (``issue_sort_key``). A ``Renderer`` turns that model
+into text in three parts: a header, one section per fix version, and a footer.
+
+``write_formats`` sorts each fix version once and hands the section to every renderer.
+Each renderer runs on its own thread and streams its file, so an extra format costs its
+render time, not another read and parse of the export. noprompt.py writes output.mw
+through ``MediaWikiRenderer`` too, with or without -formats. The DITA output is a concept topic in the
+Heretto shape spexml.py writes.
+"""
+from __future__ import annotations
+
+import html
+import os
+import queue
+import re
+import threading
+from pathlib import Path
+from typing import Sequence, TextIO
+
+from jiramarkup import plain_lines
+from metrics import count, stage
+from noprompt import (
+    OUTPUT_BUFFER_BYTES,
+    RELEASE_NOTES_PREAMBLE,
+    TABLE_HEADER,
+    Issue,
+    build_section,
+    issue_sort_key,
+    ordered_fix_versions,
+    render_row,
+    ticket_url,
+)
+
+TITLE = RELEASE_NOTES_PREAMBLE[0].strip("= ")
+INTRO = RELEASE_NOTES_PREAMBLE[1]
+UNSCHEDULED_NOTE = "Tickets below do not yet have a scheduled fix version."
+COLUMNS = tuple(TABLE_HEADER.lstrip("! ").split(" !! "))
+# Sections waiting per writer; a slow writer holds back the others by at most this many.
+QUEUE_SECTIONS = 4
+
+_XML_ID = re.compile(r"[^A-Za-z0-9._-]+")
+# Control characters (other than tab and newline) are not allowed in XML 1.0.
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def cells(issue: Issue) -> list[str]:
+    """The plain-text cells after Ticket and Summary, in ``COLUMNS`` order, up to Notes."""
+    return [
+        ", ".join(issue.components),
+        ", ".join(issue.fix_versions),
+        issue.priority,
+        issue.issue_type,
+        issue.status,
+        issue.resolution,
+        ", ".join(issue.labels),
+    ]
+
+
+def xml_id(text: str, fallback: str) -> str:
+    """``text`` as an XML ID (an NCName): unsafe characters replaced, prefixed unless it starts with a letter or ``_``."""
+    value = _XML_ID.sub("_", text).strip("_") or fallback
+    return value if value[0].isalpha() or value[0] == "_" else f"_{value}"
+
+
+class Renderer:
+    """One output format. ``section`` gets each fix version's number (from 0), name and sorted issues."""
+
+    suffix = ""
+
+    def header(self, name: str) -> str:
+        return ""
+
+    def section(self, number: int, version: str, issues: Sequence[Issue]) -> str:
+        raise NotImplementedError
+
+    def footer(self) -> str:
+        return ""
+
+
+class MediaWikiRenderer(Renderer):
+    """The wikitable release notes noprompt.py writes to output.mw."""
+
+    suffix = ".mw"
+
+    def header(self, name: str) -> str:
+        return "\n".join(RELEASE_NOTES_PREAMBLE) + "\n"
+
+    def section(self, number: int, version: str, issues: Sequence[Issue]) -> str:
+        # build_section ends with a blank line, so the text ends "|}\n"; later sections start after a blank line.
+        return ("\n" if number else "") + "\n".join(build_section(version, [render_row(issue) for issue in issues]))
+
+
+class DitaRenderer(Renderer):
+    """A DITA concept like spexml.py's: title, shortdesc and prolog, then a ``<simpletable>`` section per fix version."""
+
+    suffix = ".dita"
+
+    def __init__(self) -> None:
+        # Imported here: only DITA output needs lxml.
+        from lxml import etree
+
+        self.etree = etree
+
+    def text(self, parent, tag: str, text: str, **attrib: str):
+        element = self.etree.SubElement(parent, tag, attrib=attrib)
+        element.text = _CONTROL.sub("", text)
+        return element
+
+    def xref(self, parent, key: str):
+        return self.text(parent, "xref", key, href=ticket_url(key), format="html", scope="external")
+
+    def serialize(self, element, level: int) -> str:
+        self.etree.indent(element, space="  ", level=level)
+        return "\n" + "  " * level + self.etree.tostring(element, encoding="unicode")
+
+    def header(self, name: str) -> str:
+        etree = self.etree
+        title = etree.Element("title")
+        title.text = TITLE
+        shortdesc = etree.Element("shortdesc")
+        shortdesc.text = INTRO
+        prolog = etree.Element("prolog")
+        author = etree.SubElement(prolog, "author", attrib={"translate": "no", "type": "creator"})
+        author.text = "ReXML did this"
+        etree.SubElement(etree.SubElement(prolog, "metadata"), "keywords")
+        topic_id = xml_id(name, "release-notes")
+        return (
+            "<?xml version='1.0' encoding='UTF-8'?>\n"
+            f'<concept id="{topic_id}" xml:lang="en-us">'
+            + "".join(self.serialize(element, 1) for element in (title, shortdesc, prolog))
+            + "\n  <conbody>"
+        )
+
+    def section(self, number: int, version: str, issues: Sequence[Issue]) -> str:
+        etree = self.etree
+        section = etree.Element("section", attrib={"id": xml_id(f"v-{version}", f"v-{number}")})
+        self.text(section, "title", version)
+        if version == "Unscheduled":
+            self.text(section, "p", UNSCHEDULED_NOTE)
+        table = etree.SubElement(section, "simpletable", attrib={"relcolwidth": "2* 3* 2* 2* 1* 1* 1* 1* 2* 6*"})
+        head = etree.SubElement(table, "sthead")
+        for column in COLUMNS:
+            self.text(head, "stentry", column)
+        for issue in issues:
+            row = etree.SubElement(table, "strow")
+            ticket = etree.SubElement(row, "stentry")
+            self.xref(ticket, issue.key)
+            if issue.clones:
+                backports = self.text(ticket, "p", "Backports: ")
+                for position, (key, branch) in enumerate(issue.clones):
+                    xref = self.xref(backports, key)
+                    xref.tail = (f" ({branch})" if branch else "") + (", " if position < len(issue.clones) - 1 else "")
+            self.text(row, "stentry", issue.summary.strip())
+            for cell in cells(issue):
+                self.text(row, "stentry", cell)
+            notes = etree.SubElement(row, "stentry")
+            for line in plain_lines(issue.description):
+                self.text(notes, "p", line)
+        return self.serialize(section, 2)
+
+    def footer(self) -> str:
+        return "\n  </conbody>\n</concept>\n"
+
+
+class HtmlRenderer(Renderer):
+    """A standalone HTML page: a heading and table per fix version."""
+
+    suffix = ".html"
+
+    def header(self, name: str) -> str:
+        return (
+            '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            f"<title>{html.escape(TITLE)}</title>\n</head>\n<body>\n"
+            f"<h1>{html.escape(TITLE)}</h1>\n<p>{html.escape(INTRO)}</p>\n"
+        )
+
+    def section(self, number: int, version: str, issues: Sequence[Issue]) -> str:
+        lines = [f"<h2>{html.escape(version)}</h2>"]
+        if version == "Unscheduled":
+            lines.append(f"<p>{UNSCHEDULED_NOTE}</p>")
+        lines.append("<table>")
+        lines.append("<tr>" + "".join(f"<th>{html.escape(column)}</th>" for column in COLUMNS) + "</tr>")
+        for issue in issues:
+            ticket = link(issue.key)
+            if issue.clones:
+                backports = ", ".join(link(key) + (f" ({html.escape(branch)})" if branch else "") for key, branch in issue.clones)
+                ticket += f"<br>Backports: {backports}"
+            row = [ticket, html.escape(issue.summary.strip())]
+            row.extend(html.escape(cell) for cell in cells(issue))
+            row.append("<br>".join(html.escape(line) for line in plain_lines(issue.description)))
+            lines.append("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>")
+        lines.append("</table>\n")
+        return "\n".join(lines)
+
+    def footer(self) -> str:
+        return "</body>\n</html>\n"
+
+
+def link(key: str) -> str:
+    return f'<a href="{html.escape(ticket_url(key))}">{html.escape(key)}</a>'
+
+
+RENDERERS: dict[str, type[Renderer]] = {"mw": MediaWikiRenderer, "dita": DitaRenderer, "html": HtmlRenderer}
+
+
+def parse_formats(text: str) -> tuple[str, ...]:
+    """The formats named in a comma-separated ``-formats`` value, in order, without repeats."""
+    formats = tuple(dict.fromkeys(name.strip().lower() for name in text.split(",") if name.strip()))
+    unknown = [name for name in formats if name not in RENDERERS]
+    if unknown or not formats:
+        raise SystemExit(f"-formats takes a comma-separated list of {', '.join(RENDERERS)}; got {text!r}.")
+    return formats
+
+
+def write_document(renderer: Renderer, grouped: dict[str, list[Issue]], handle: TextIO, name: str = "") -> None:
+    """Write ``grouped`` with one renderer into ``handle``, section by section, on this thread."""
+    handle.write(renderer.header(name))
+    for number, version in enumerate(ordered_fix_versions(grouped)):
+        handle.write(renderer.section(number, version, sorted(grouped[version], key=issue_sort_key)))
+    handle.write(renderer.footer())
+
+
+def _write(renderer: Renderer, path: Path, sections: queue.Queue) -> None:
+    """Stream ``renderer``'s document to ``path``; the file is replaced only once it is complete."""
+    finished = False
+    temp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with temp_path.open("w", encoding="utf-8", newline="\n", buffering=OUTPUT_BUFFER_BYTES) as handle:
+            handle.write(renderer.header(path.stem))
+            while (item := sections.get()) is not None:
+                handle.write(renderer.section(*item))
+            finished = True
+            handle.write(renderer.footer())
+        os.replace(temp_path, path)
+    except BaseException:
+        # Keep taking sections so the reader never blocks on this writer's full queue.
+        while not finished and sections.get() is not None:
+            pass
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_formats(grouped: dict[str, list[Issue]], output_path: Path, formats: Sequence[str]) -> list[Path]:
+    """Write ``grouped`` in each of ``formats``: MediaWiki to ``output_path``, the others next to it (``output.dita``, ...)."""
+    renderers = [RENDERERS[name]() for name in formats]
+    paths = [
+        output_path if isinstance(renderer, MediaWikiRenderer) else output_path.with_suffix(renderer.suffix)
+        for renderer in renderers
+    ]
+    queues: list[queue.Queue] = [queue.Queue(maxsize=QUEUE_SECTIONS) for _ in renderers]
+    errors: list[BaseException] = []
+
+    def run(renderer: Renderer, path: Path, sections: queue.Queue) -> None:
+        try:
+            _write(renderer, path, sections)
+        except BaseException as error:
+            errors.append(error)
+
+    threads = [
+        threading.Thread(target=run, args=job, name=f"render-{name}", daemon=True)
+        for name, job in zip(formats, zip(renderers, paths, queues))
+    ]
+    with stage("render"):
+        for thread in threads:
+            thread.start()
+        for number, version in enumerate(ordered_fix_versions(grouped)):
+            item = (number, version, sorted(grouped[version], key=issue_sort_key))
+            for sections in queues:
+                sections.put(item)
+        for sections in queues:
+            sections.put(None)
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    count("formats", len(formats))
+    return paths
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""One command for every ReXML tool: ``python3 rexml.py <command> [options]``.
+
+Only the module behind the chosen command is imported, and each module imports its
+heavy dependencies (lxml, requests, openai, asyncio) on the code paths that use
+them, so ``rexml.py -h`` or an offline run starts without them.
+"""
+from __future__ import annotations
+
+import importlib
+import sys
+
+# command -> (script the command stands for, module, keyword arguments for its main(), help)
+COMMANDS: dict[str, tuple[str, str, dict[str, str], str]] = {
+    "noprompt": ("noprompt.py", "noprompt", {}, "Render Jira.csv as MediaWiki release notes offline (output.mw)"),
+    "prompt": ("prompt.py", "engine", {"default_backend": "openai"}, "Translate Jira.csv with the OpenAI API"),
+    "circuit": ("promptcircuit.py", "engine", {"default_backend": "circuit"}, "Translate Jira.csv with the Circuit API"),
+    "engine": ("engine.py", "engine", {}, "Translate Jira.csv with any -backend"),
+    "spexml": ("spexml.py", "spexml", {}, "Convert .conf.spec files to DITA"),
+    "store": ("issuestore.py", "issuestore", {}, "Build or query a SQLite store of a Jira export"),
+    "bench": ("bench.py", "bench", {}, "Run the benchmarks"),
+}
+
+
+def usage() -> None:
+    print("Usage: python rexml.py <command> [options]")
+    print("Commands:")
+    for name, (script, _, _, description) in COMMANDS.items():
+        print(f"  {name:<9} {description} (same options as {script})")
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    if not args or args[0] in ("-h", "--help", "help"):
+        usage()
+        sys.exit(0 if args else 1)
+    command = COMMANDS.get(args[0])
+    if command is None:
+        print(f"Unknown command: {args[0]}")
+        usage()
+        sys.exit(1)
+
+    script, module_name, kwargs, _ = command
+    # The command's main() parses sys.argv as if its script had been run directly,
+    # so usage messages and -profile file names match the standalone scripts.
+    sys.argv = [script, *args[1:]]
+    getattr(importlib.import_module(module_name), "main")(**kwargs)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,97 +1,218 @@
 import sys              # system functions for arguments from command line
 import re               # regular expressions to detect conf headers
 import os               # os for file path processing
+from functools import partial # binds -structured for batch workers
+from pathlib import Path # batch runner works on Path pairs
 from lxml import etree  # xml element tree with which to build dita file
 
-def parse_splunk_conf_spec(input_path, output_path):
+from batch import DEFAULT_DEBOUNCE_MS, DEFAULT_STATUS_PORT, pop_flag, pop_option, run_batch   # parallel, failure-isolated batch runs
+from confspec import iter_stanzas   # structured model of conf.spec stanzas and settings
+from metrics import profiled, stage, timed   # -profile: per-stage timings written as JSON
+
+STANZA_HEADER = re.compile(r"^\[.*\]$")   # compiled once; matched against every line of every spec
+
+def write_section(xf, section):
+    # Emits one finished <section> inside <conbody>
+    etree.indent(section, space="  ", level=2)   # same layout pretty_print gave the whole tree
+    # indent treats every child as a block; keep inline <codeph> flush with the text around it
+    for phrase in section.iter("codeph"):
+        if phrase.tail is not None and not phrase.tail.strip():
+            phrase.tail = None
+        parent = phrase.getparent()
+        if parent.text is not None and not parent.text.strip():
+            parent.text = None
+    xf.write("\n    ")
+    xf.write(section)
+
+def codeblock_section(title, code_lines):
+    # One stanza as <section><title/><codeblock/></section>
+    # code_lines is a list buffer joined once, so long stanzas stay linear
+    section = etree.Element("section")
+    section_title = etree.SubElement(section, "title")
+    section_title.text = title
+    codeblock = etree.SubElement(section, "codeblock")
+    codeblock.text = "".join(code_lines)
+    # Placeholder for TBD outputclass
+    # codeblock.set("outputclass", "good-output")
+    return section
+
+def add_text(parent, tag, text):
+    element = etree.SubElement(parent, tag)
+    element.text = text
+    return element
+
+def add_notes(parent, item):
+    # Bullets become a <ul>, the default a labelled <p>, and example lines one <codeblock>
+    if item.description:
+        ul = etree.SubElement(parent, "ul")
+        for bullet in item.description:
+            add_text(ul, "li", bullet)
+    if item.default is not None:
+        p = add_text(parent, "p", "Default: ")
+        add_text(p, "codeph", item.default)
+    if item.examples:
+        add_text(parent, "codeblock", "\n".join(item.examples) + "\n")
+
+def structured_section(stanza):
+    # One confspec.Stanza as a <section>: its description, a simpletable summarizing
+    # each setting's value and default, then a <dl> with every setting's full description
+    section = etree.Element("section")
+    add_text(section, "title", stanza.name if stanza.name is not None else "Global settings")
+    add_notes(section, stanza)
+    if stanza.settings:
+        table = etree.SubElement(section, "simpletable", attrib={"relcolwidth": "2* 2* 1*"})
+        head = etree.SubElement(table, "sthead")
+        for label in ("Setting", "Value", "Default"):
+            add_text(head, "stentry", label)
+        for setting in stanza.settings:
+            row = etree.SubElement(table, "strow")
+            add_text(etree.SubElement(row, "stentry"), "codeph", setting.name)
+            add_text(row, "stentry", setting.value)
+            add_text(row, "stentry", setting.default)
+
+        dl = etree.SubElement(section, "dl")
+        for setting in stanza.settings:
+            entry = etree.SubElement(dl, "dlentry")
+            add_text(entry, "dt", setting.name)
+            dd = etree.SubElement(entry, "dd")
+            add_text(etree.SubElement(dd, "p"), "codeph", f"{setting.name} = {setting.value}")
+            add_notes(dd, setting)
+    return section
+
+def parse_splunk_conf_spec(input_path, output_path, structured=False):
     # Translates the file at input_path (must be a .conf.spec)
     # Writes the file at output_path, which should be XML with .xml extension instead of .spec
     # Conforms to an example Heretto topic: spexml_test_1.dita on splunk-dev.heretto
     # concept id is not dynamic yet (eg id="concept-5110"); using base file prefix as id (eg app.conf for app.conf.spec)
-    with open(input_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()   # load the lines of the conf.spec file
+    # structured renders each stanza from the confspec model (tables and definition lists)
+    # instead of copying its lines into a codeblock
+    # Timed as the "convert" stage of a -profile run
+    # Streams: the spec is read line by line and each <section> is written as soon as its stanza ends,
+    # so memory is bounded by the largest stanza rather than the whole file
     file_prefix = os.path.splitext(os.path.basename(input_path))[0]
 
-    # Build the Heretto concept elements
-    concept = etree.Element("concept", id=file_prefix) # use conf.spec name as id; see dita_tree below for attrib={"xml:lang": "en-us"}
-    title = etree.SubElement(concept, "title")
-    title.text = f"{file_prefix} (SpeXML)" 
-    shortdesc = etree.SubElement(concept, "shortdesc")
-    shortdesc.text = f"The following are the spec and example files for {file_prefix}."
-    prolog = etree.SubElement(concept, "prolog")
-    author = etree.SubElement(prolog, "author", attrib={"translate": "no", "type": "creator"})
-    author.text = "SpeXML did this"
-    metadata = etree.SubElement(prolog, "metadata")
-    keywords = etree.SubElement(metadata, "keywords")
-    conbody = etree.SubElement(concept, "conbody")
-    
-    section = etree.SubElement(conbody, "section")
-    title_section = etree.SubElement(section, "title", attrib={"outputclass": "h2"})
-    title_section.text = file_prefix + ".spec"    
-    
-    # Build the conf.spec sections
-    current_section = None
-    codeblock = None
-
-    for line in lines:
-        line = line.strip()
-        
-        # Detect stanza headers
-        if re.match(r"^\[.*\]$", line):
-            current_section = etree.SubElement(conbody, "section")
-            section_title = etree.SubElement(current_section, "title")
-            section_title.text = line.strip("[]")
-
-            # Create a new <codeblock> for this section
-            codeblock = etree.SubElement(current_section, "codeblock")
-            # Placeholder for TBD outputclass
-            # codeblock.set("outputclass", "good-output")
-
-        # Add settings and comment lines inside the <codeblock>
-        if current_section is not None and codeblock is not None:
-            if line:
-                codeblock.text = (codeblock.text or "") + line + "\n"
-
-    # Save as DITA XML
-    dita_tree = etree.ElementTree(concept)
-
-    # xml:lang is special; see http://ditanauts.org/2012/05/04/python-lxml-and-setting-xmllang/
-    root = dita_tree.getroot()
-    attr = root.attrib
-    attr['{http://www.w3.org/XML/1998/namespace}lang'] = "en-us"
-
-    dita_tree.write(output_path, pretty_print=True, xml_declaration=True, encoding="UTF-8")
+    with stage("convert"), open(input_path, "r", encoding="utf-8") as f, open(output_path, "wb") as out:
+        with etree.xmlfile(out, encoding="UTF-8") as xf:
+            xf.write_declaration()
+            # xml:lang is special; xmlfile accepts the prefixed name directly
+            # (see http://ditanauts.org/2012/05/04/python-lxml-and-setting-xmllang/)
+            with xf.element("concept", {"id": file_prefix, "xml:lang": "en-us"}):
+                # Build the Heretto concept elements
+                title = etree.Element("title")
+                title.text = f"{file_prefix} (SpeXML)"
+                shortdesc = etree.Element("shortdesc")
+                shortdesc.text = f"The following are the spec and example files for {file_prefix}."
+                prolog = etree.Element("prolog")
+                author = etree.SubElement(prolog, "author", attrib={"translate": "no", "type": "creator"})
+                author.text = "SpeXML did this"
+                metadata = etree.SubElement(prolog, "metadata")
+                etree.SubElement(metadata, "keywords")
+                etree.indent(prolog, space="  ", level=1)
+                for element in (title, shortdesc, prolog):
+                    xf.write("\n  ")
+                    xf.write(element)
+
+                xf.write("\n  ")
+                with xf.element("conbody"):
+                    section = etree.Element("section")
+                    title_section = etree.SubElement(section, "title", attrib={"outputclass": "h2"})
+                    title_section.text = file_prefix + ".spec"
+                    write_section(xf, section)
+
+                    if structured:
+                        # "parse" is the time spent tokenizing and building each stanza's model
+                        for stanza in timed("parse", iter_stanzas(f)):
+                            write_section(xf, structured_section(stanza))
+                    else:
+                        # Build the conf.spec sections
+                        stanza_title = None
+                        code_lines = []
+
+                        for line in f:
+                            line = line.strip()
+
+                            # Detect stanza headers; the previous stanza is complete and can be written
+                            if STANZA_HEADER.match(line):
+                                if stanza_title is not None:
+                                    write_section(xf, codeblock_section(stanza_title, code_lines))
+                                stanza_title = line.strip("[]")
+                                code_lines = []
+
+                            # Add settings and comment lines inside the <codeblock>
+                            if stanza_title is not None and line:
+                                code_lines.append(line + "\n")
+
+                        if stanza_title is not None:
+                            write_section(xf, codeblock_section(stanza_title, code_lines))
+                    xf.write("\n  ")
+                xf.write("\n")
+        out.write(b"\n")   # pretty_print ended the file with a newline; keep outputs byte-identical
     print(f"Translated: {input_path} -> {output_path}")
 
-def process_directory(directory):
-    # Processes all .conf.spec files in the specified directory
-    for filename in os.listdir(directory):
+def spec_tasks(directory):
+    # Pairs each .conf.spec file in the directory with its .xml output, sorted so runs are repeatable
+    tasks = []
+    for filename in sorted(os.listdir(directory)):
         if filename.endswith(".conf.spec"):
             input_path = os.path.join(directory, filename)
             output_path = os.path.join(directory, f"{os.path.splitext(filename)[0]}.xml")
-            parse_splunk_conf_spec(input_path, output_path)
+            tasks.append((Path(input_path), Path(output_path)))
+    return tasks
+
+def process_directory(directory, jobs=1, structured=False):
+    # Processes all .conf.spec files in the specified directory
+    # jobs > 1 spreads the files over a process pool; returns the number of files that failed
+    tasks = spec_tasks(directory)
+    if not tasks:
+        print(f"No .conf.spec files found in {directory}.")
+        return 0
+    return run_batch(partial(parse_splunk_conf_spec, structured=structured), tasks, jobs)
 
 def main():
     # Processes command line args, requires:
     # spexml.py <input_file>
     # or
-    # spexml.py -batch <directory>
+    # spexml.py -batch <directory> [-jobs N]
+    # or
+    # spexml.py -watch <directory> [-jobs N] [-debounce MS] [-status-port N]
+    # Either form accepts -structured for tables and definition lists instead of codeblocks,
+    # and -profile / -cprofile to write run metrics under profiles/
     # Outputs translation to output_file
-    if len(sys.argv) < 2:
-        print("Usage:")
-        print("  python spexml.py <file.conf.spec>   # Translate a single file from the current directory")
-        print("  python spexml.py -batch <directory> # Translate all .conf.spec files in a directory")
-        sys.exit(1)        
-
-    if sys.argv[1] == "-batch":
-        if len(sys.argv) < 3:
-            print("Error: Missing directory path for batch mode.")
-            sys.exit(1)
-        directory = sys.argv[2]
-        process_directory(directory)
-    else:
-        input_file = sys.argv[1]
-        output_file = f"{os.path.splitext(input_file)[0]}.xml"
-        parse_splunk_conf_spec(input_file, output_file)
-
-main()
\ No newline at end of file
+    args = sys.argv[1:]
+    with profiled("spexml", pop_flag(args, "-profile"), pop_flag(args, "-cprofile")):
+        jobs = pop_option(args, "-jobs", 1)
+        debounce_ms = pop_option(args, "-debounce", DEFAULT_DEBOUNCE_MS)
+        status_port = pop_option(args, "-status-port", DEFAULT_STATUS_PORT)
+        structured = pop_flag(args, "-structured")
+        if len(args) < 1:
+            print("Usage:")
+            print("  python spexml.py <file.conf.spec>             # Translate a single file from the current directory")
+            print("  python spexml.py -batch <directory> [-jobs N] # Translate all .conf.spec files in a directory")
+            print("  python spexml.py -watch <directory> [-jobs N] # Retranslate each .conf.spec file in a directory when it changes")
+            print("  Add -structured to render settings as tables and definition lists instead of codeblocks")
+            print("  Add -profile (or -cprofile) to write per-stage metrics under profiles/")
+            sys.exit(1)        
+
+        if args[0] == "-batch":
+            if len(args) < 2:
+                print("Error: Missing directory path for batch mode.")
+                sys.exit(1)
+            directory = args[1]
+            if process_directory(directory, jobs, structured):
+                sys.exit(1)
+        elif args[0] == "-watch":
+            if len(args) < 2 or not os.path.isdir(args[1]):
+                print("Error: Missing or invalid directory path for watch mode.")
+                sys.exit(1)
+            # Keeps lxml and the tokenizer loaded between passes; only changed specs are reconverted
+            from watch import watch   # imported here: only -watch needs its inotify and HTTP modules
+            convert = partial(parse_splunk_conf_spec, structured=structured)
+            watch(Path(args[1]), spec_tasks, convert, jobs, "process", debounce_ms, status_port)
+        else:
+            input_file = args[0]
+            output_file = f"{os.path.splitext(input_file)[0]}.xml"
+            parse_splunk_conf_spec(input_file, output_file, structured)
+
+# Guarded so worker processes (and library users) can import this module without running the CLI
+if __name__ == "__main__":
+    main()
\ No newline at end of file
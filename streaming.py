@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Write a streamed MediaWiki table to disk one validated row at a time, with a checkpoint to resume from.
+
+A streamed completion arrives as text deltas. ``TableStream`` splits them into lines
+and drops the ```` ```mediawiki ```` fences models wrap their answer in. It holds
+each ``|-`` row until the next row (or the table end) shows it is complete, then
+appends it to the partial output and records its ticket key in the checkpoint.
+A run that is interrupted resumes by prompting only for the tickets with no row
+yet and appending to the same partial file.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Sequence, TextIO
+
+from noprompt import TABLE_HEADER
+
+CHECKPOINT_VERSION = 2
+DEFAULT_TABLE_START = '{| class="wikitable"'
+_KEY = re.compile(r"\b([A-Z][A-Z0-9_]*-\d+)\b")
+
+
+def partial_path_for(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.name}.partial")
+
+
+def checkpoint_path_for(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}.checkpoint.json")
+
+
+def fingerprint(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class StreamCheckpoint:
+    """The rows already in ``<output>.partial`` for one prompt fingerprint.
+
+    ``written`` holds the ticket keys that have a complete row; ``opened`` records
+    whether the table start is in the file, and ``header`` whether its ``!`` header row is.
+    """
+
+    def __init__(self, output_path: Path, digest: str) -> None:
+        self.output_path = output_path
+        self.partial_path = partial_path_for(output_path)
+        self.path = checkpoint_path_for(output_path)
+        self.digest = digest
+        self.written: list[str] = []
+        self.opened = False
+        self.header = False
+        self.size = 0
+
+    @classmethod
+    def load(cls, output_path: Path, digest: str) -> StreamCheckpoint:
+        """Resume the checkpoint for ``digest``, or start over when it is missing, stale or damaged."""
+        checkpoint = cls(output_path, digest)
+        try:
+            data = json.loads(checkpoint.path.read_text(encoding="utf-8"))
+            partial_size = checkpoint.partial_path.stat().st_size
+        except (FileNotFoundError, ValueError):
+            return checkpoint
+        # The partial file may hold the start of a row written after the last checkpoint; it is truncated away.
+        if data.get("version") == CHECKPOINT_VERSION and data.get("digest") == digest and partial_size >= data["size"]:
+            checkpoint.written = data["written"]
+            checkpoint.opened = data["opened"]
+            checkpoint.header = data["header"]
+            checkpoint.size = data["size"]
+        return checkpoint
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.written or self.opened)
+
+    def open(self) -> TextIO:
+        """The partial output, truncated to the last checkpointed row and opened for appending."""
+        handle = self.partial_path.open("a+" if self.resumed else "w", encoding="utf-8", newline="\n")
+        handle.truncate(self.size)
+        handle.seek(self.size)
+        return handle
+
+    def save(self, handle: TextIO) -> None:
+        handle.flush()
+        self.size = handle.tell()
+        fd, temp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as checkpoint:
+            json.dump(
+                {
+                    "version": CHECKPOINT_VERSION,
+                    "digest": self.digest,
+                    "written": self.written,
+                    "opened": self.opened,
+                    "header": self.header,
+                    "size": self.size,
+                },
+                checkpoint,
+            )
+        os.replace(temp_name, self.path)
+
+    def finish(self, handle: TextIO, extra_rows: Sequence[str] = ()) -> None:
+        """Append ``extra_rows`` (table lines), close the table and move the partial file into place as the output."""
+        if not self.opened:
+            handle.write(f"{DEFAULT_TABLE_START}\n")
+        if not self.header:
+            handle.write(f"|-\n{TABLE_HEADER}\n")
+        for line in extra_rows:
+            handle.write(line + "\n")
+        handle.write("|}\n")
+        handle.close()
+        os.replace(self.partial_path, self.output_path)
+        self.path.unlink(missing_ok=True)
+
+
+class TableStream:
+    """Feed it text deltas; it appends each complete, valid table row to ``handle`` and checkpoints it.
+
+    A data row is valid when its first ticket key is one of ``expected`` and has no
+    row yet. Rows for unknown or already-written tickets are skipped and counted.
+    """
+
+    def __init__(self, handle: TextIO, checkpoint: StreamCheckpoint, expected: set[str]) -> None:
+        self.handle = handle
+        self.checkpoint = checkpoint
+        self.expected = expected
+        self.written = set(checkpoint.written)
+        self.table_start = DEFAULT_TABLE_START
+        self.block: list[str] | None = None
+        self.closed = False
+        self.rows = 0
+        self.skipped = 0
+        self._buffer = ""
+
+    def feed(self, delta: str) -> None:
+        self._buffer += delta
+        if "\n" not in delta:
+            return
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._line(line.rstrip("\r"))
+
+    def close(self) -> None:
+        """The stream completed: the text after the last newline and the last row are complete too."""
+        if self._buffer:
+            self._line(self._buffer.rstrip("\r"))
+            self._buffer = ""
+        self._finish_block()
+        self.block = None
+
+    def _line(self, line: str) -> None:
+        stripped = line.strip()
+        if self.closed or stripped.startswith("```"):
+            return
+        if stripped.startswith("{|"):
+            self.table_start = stripped
+            # A header row may follow the table start without its own "|-".
+            self.block = []
+        elif stripped == "|-":
+            self._finish_block()
+            self.block = []
+        elif stripped == "|}":
+            self._finish_block()
+            self.block = None
+            self.closed = True
+        elif self.block is not None:
+            self.block.append(line)
+        # Anything else is prose around the table.
+
+    def _start_table(self) -> None:
+        if not self.checkpoint.opened:
+            self.handle.write(self.table_start + "\n")
+            self.checkpoint.opened = True
+
+    def _finish_block(self) -> None:
+        block = self.block
+        self.block = None
+        if not block:
+            return
+        if block[0].lstrip().startswith("!"):
+            # The header row; a resumed run already has one.
+            if self.checkpoint.header:
+                return
+            self._start_table()
+            self.handle.write("|-\n" + "\n".join(block) + "\n")
+            self.checkpoint.header = True
+            self.checkpoint.save(self.handle)
+            return
+
+        match = _KEY.search("\n".join(block))
+        key = match[1] if match else None
+        if key not in self.expected or key in self.written:
+            self.skipped += 1
+            return
+        self._start_table()
+        if not self.checkpoint.header:
+            # The reply has no header row of its own; the table still needs one above its first row.
+            self.handle.write(f"|-\n{TABLE_HEADER}\n")
+            self.checkpoint.header = True
+        self.handle.write("|-\n" + "\n".join(block) + "\n")
+        self.written.add(key)
+        self.checkpoint.written.append(key)
+        self.checkpoint.save(self.handle)
+        self.rows += 1
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""A local stand-in for the Circuit chat-completions API and OpenAI's Files and Batches APIs.
+
+It answers every prompt like ``FakeBackend``: one placeholder row per prompted issue.
+
+A chat-completions request with ``"stream": true`` gets the reply as server-sent
+events, a few characters per event. ``-fail-after N`` drops each stream after N
+rows, to test that an interrupted ``-stream`` run resumes. ``-rate-limit N`` answers
+chat requests beyond N per second with 429 and a Retry-After header, to test the
+client's backoff. ``/oauth2/token`` issues access tokens for the client-credentials
+grant, so the OAuth refresh path runs against the stub too.
+
+A batch job (``/v1/files`` then ``/v1/batches``) is validated, in progress and then
+completed over ``-batch-seconds`` seconds, and its output file holds one Responses
+API result per request. ``-fail-every N`` makes every Nth request fail, so it lands
+in the error file instead.
+
+    python3 stubserver.py -port 8766 -delay 20
+    CIRCUIT_API_URL=http://127.0.0.1:8766/chat CISCO_API_KEY=stub python3 promptcircuit.py -stream
+    CIRCUIT_API_URL=http://127.0.0.1:8766/chat CIRCUIT_TOKEN_URL=http://127.0.0.1:8766/oauth2/token \
+        CISCO_CLIENT_ID=stub CISCO_CLIENT_SECRET=stub python3 promptcircuit.py
+    OPENAI_BASE_URL=http://127.0.0.1:8766/v1 OPENAI_API_KEY=stub python3 prompt.py -submit-batch -poll 1
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import sys
+import threading
+import time
+from collections import deque
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backends import fake_response, split_pieces
+from batch import pop_option, pop_value
+from tokens import approximate_tokens
+
+DEFAULT_PORT = 8766
+DEFAULT_BATCH_SECONDS = 3
+TOKEN_SECONDS = 3600
+
+
+def responses_body(prompt: str) -> dict:
+    """A Responses API result for ``prompt``, as it appears in a batch output file."""
+    reply = fake_response(prompt)
+    return {
+        "object": "response",
+        "status": "completed",
+        "output": [{"type": "message", "role": "assistant", "content": [{"type": "output_text", "text": reply}]}],
+        "usage": {"input_tokens": approximate_tokens(prompt), "output_tokens": approximate_tokens(reply)},
+    }
+
+
+class BatchStore:
+    """Uploaded files and batch jobs, kept in memory for the life of the server."""
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.ids = itertools.count(1)
+        self.files: dict[str, dict] = {}
+        self.batches: dict[str, dict] = {}
+
+    def add_file(self, data: bytes, filename: str, purpose: str) -> dict:
+        with self.lock:
+            file_id = f"file-stub{next(self.ids)}"
+            self.files[file_id] = {
+                "id": file_id,
+                "object": "file",
+                "bytes": len(data),
+                "created_at": int(time.time()),
+                "filename": filename,
+                "purpose": purpose,
+                "status": "processed",
+                "data": data,
+            }
+            return self.files[file_id]
+
+    def add_batch(self, request: dict) -> dict:
+        with self.lock:
+            batch_id = f"batch_stub{next(self.ids)}"
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": request["endpoint"],
+                "input_file_id": request["input_file_id"],
+                "completion_window": request["completion_window"],
+                "created_at": int(time.time()),
+                "started": time.monotonic(),
+                "status": "validating",
+            }
+        return self.refresh(batch_id)
+
+    def refresh(self, batch_id: str) -> dict:
+        """The batch, advanced through validating and in_progress to completed as time passes."""
+        with self.lock:
+            batch = self.batches[batch_id]
+            if batch["status"] == "completed":
+                return batch
+            lines = [line for line in self.files[batch["input_file_id"]]["data"].decode("utf-8").splitlines() if line]
+            progress = (time.monotonic() - batch["started"]) / StubHandler.batch_seconds if StubHandler.batch_seconds else 1
+            done = min(len(lines), int(len(lines) * max(0.0, progress * 1.5 - 0.5)))
+            failed = sum(1 for number in range(1, done + 1) if StubHandler.fail_every and number % StubHandler.fail_every == 0)
+            batch["request_counts"] = {"total": len(lines), "completed": done - failed, "failed": failed}
+            if progress < 1 / 3:
+                return batch
+            batch["status"] = "in_progress"
+            if progress < 1:
+                return batch
+            batch["status"] = "completed"
+            batch["completed_at"] = int(time.time())
+            output, errors = [], []
+            for number, line in enumerate(lines, start=1):
+                request = json.loads(line)
+                result = {"id": f"batch_req_{number}", "custom_id": request["custom_id"]}
+                if StubHandler.fail_every and number % StubHandler.fail_every == 0:
+                    error = {"message": "stub failure", "type": "server_error"}
+                    errors.append({**result, "response": {"status_code": 500, "body": {"error": error}}, "error": None})
+                else:
+                    body = responses_body(request["body"]["input"])
+                    output.append({**result, "response": {"status_code": 200, "body": body}, "error": None})
+            for key, records in (("output_file_id", output), ("error_file_id", errors)):
+                if records:
+                    data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+                    batch[key] = self.add_file(data, f"{batch_id}_{key}.jsonl", "batch_output")["id"]
+            return batch
+
+
+class RateLimiter:
+    """Admits at most ``limit`` requests in any one-second window."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.admitted: deque[float] = deque()
+
+    def wait_seconds(self) -> float:
+        """Zero when a request is admitted now, otherwise how long until the window has room."""
+        now = time.monotonic()
+        with self.lock:
+            while self.admitted and now - self.admitted[0] >= 1:
+                self.admitted.popleft()
+            if len(self.admitted) < self.limit:
+                self.admitted.append(now)
+                return 0.0
+            return 1 - (now - self.admitted[0])
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail_after: int | None = None
+    fail_every = 0
+    rate_limiter: RateLimiter | None = None
+    batch_seconds = float(DEFAULT_BATCH_SECONDS)
+    store = BatchStore()
+    tokens = itertools.count(1)
+
+    def do_POST(self) -> None:
+        data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.startswith("/oauth2/token"):
+            self.issue_token(data)
+            return
+        if self.path.startswith("/v1/files"):
+            self.upload(data)
+            return
+        if self.path.startswith("/v1/batches"):
+            batch = self.store.add_batch(json.loads(data))
+            self.send_json({key: value for key, value in batch.items() if key != "started"})
+            return
+
+        wait = self.rate_limiter.wait_seconds() if self.rate_limiter else 0.0
+        if wait:
+            self.send_response(429)
+            self.send_header("Retry-After", str(max(1, round(wait))))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        payload = json.loads(data)
+        prompt = payload["messages"][-1]["content"]
+        reply = fake_response(prompt)
+        usage = {"prompt_tokens": approximate_tokens(prompt), "completion_tokens": approximate_tokens(reply)}
+        if payload.get("stream"):
+            self.stream_reply(reply, usage)
+            return
+        self.send_json({"choices": [{"index": 0, "message": {"role": "assistant", "content": reply}}], "usage": usage})
+
+    def do_GET(self) -> None:
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts[:2] == ["v1", "batches"] and len(parts) == 3 and parts[2] in self.store.batches:
+            batch = self.store.refresh(parts[2])
+            self.send_json({key: value for key, value in batch.items() if key != "started"})
+        elif parts[:2] == ["v1", "files"] and len(parts) == 4 and parts[3] == "content" and parts[2] in self.store.files:
+            self.send_body(self.store.files[parts[2]]["data"], "application/jsonl")
+        else:
+            self.send_error(404)
+
+    def issue_token(self, data: bytes) -> None:
+        """Answer a client-credentials grant with a fresh access token."""
+        if b"grant_type=client_credentials" not in data or not self.headers.get("Authorization", "").startswith("Basic "):
+            self.send_error(401)
+            return
+        self.send_json({"access_token": f"stub-token-{next(self.tokens)}", "token_type": "Bearer", "expires_in": TOKEN_SECONDS})
+
+    def upload(self, data: bytes) -> None:
+        """Store a multipart ``/v1/files`` upload."""
+        head = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8")
+        form = BytesParser(policy=HTTP).parsebytes(head + data)
+        fields = {part.get_param("name", header="content-disposition"): part for part in form.iter_parts()}
+        uploaded = self.store.add_file(
+            fields["file"].get_payload(decode=True),
+            fields["file"].get_filename() or "upload.jsonl",
+            fields["purpose"].get_content().strip() if "purpose" in fields else "batch",
+        )
+        self.send_json({key: value for key, value in uploaded.items() if key != "data"})
+
+    def send_json(self, payload: dict) -> None:
+        self.send_body(json.dumps(payload).encode("utf-8"), "application/json")
+
+    def send_body(self, body: bytes, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reply(self, reply: str, usage: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        sent = ""
+        for piece in split_pieces(reply):
+            sent += piece
+            if self.fail_after is not None and sent.count("\n|-") > self.fail_after:
+                # Hang up mid-reply, without the [DONE] sentinel.
+                self.close_connection = True
+                return
+            self.send_event({"choices": [{"index": 0, "delta": {"content": piece}}]})
+            time.sleep(self.delay)
+        self.send_event({"choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def send_event(self, event: dict) -> None:
+        self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    port = pop_option(args, "-port", DEFAULT_PORT)
+    StubHandler.delay = int(pop_value(args, "-delay", "0")) / 1000
+    if "-fail-after" in args:
+        StubHandler.fail_after = pop_option(args, "-fail-after", 1)
+    if "-fail-every" in args:
+        StubHandler.fail_every = pop_option(args, "-fail-every", 1)
+    if "-rate-limit" in args:
+        StubHandler.rate_limiter = RateLimiter(pop_option(args, "-rate-limit", 1))
+    StubHandler.batch_seconds = float(pop_value(args, "-batch-seconds", str(DEFAULT_BATCH_SECONDS)))
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    print(f"Circuit and OpenAI Batch API stub at http://127.0.0.1:{port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Offline token estimates, token-budgeted description trimming, and per-run token usage."""
+from __future__ import annotations
+
+import re
+import threading
+from typing import Callable
+
+TokenCounter = Callable[[str], int]
+
+DEFAULT_TOKENIZER = "approx"
+# USD per million input / output tokens at list price, for the cost estimate in run metrics.
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+# The Batch API bills half the synchronous list price.
+BATCH_PRICE_FACTOR = 0.5
+
+_WORDS = re.compile(r"[A-Za-z]+")
+# Digits tokenize in groups of up to three; newlines and punctuation are usually their own token.
+_OTHER = re.compile(r"\d{1,3}|\n|[^\sA-Za-z\d]")
+# Jira {noformat}/{code} blocks are almost always pasted logs or stack traces.
+_LOG_BLOCK = re.compile(r"\{(noformat|code)(?::[^}]*)?\}.*?\{\1\}", re.DOTALL)
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+LOG_PLACEHOLDER = "[log omitted]"
+
+
+def approximate_tokens(text: str) -> int:
+    """Estimate BPE tokens without a tokenizer: short words are one token, long ones one per ~7 letters."""
+    return sum((len(word) + 6) // 7 for word in _WORDS.findall(text)) + len(_OTHER.findall(text))
+
+
+def tiktoken_counter(model: str) -> TokenCounter:
+    # Optional dependency; its encodings are downloaded on first use, so it is never the default.
+    try:
+        import tiktoken
+    except ImportError:
+        raise SystemExit("The tiktoken tokenizer needs `pip install tiktoken`.") from None
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def get_counter(name: str, model: str) -> TokenCounter:
+    if name == "approx":
+        return approximate_tokens
+    if name == "tiktoken":
+        return tiktoken_counter(model)
+    raise SystemExit(f"Unknown tokenizer: {name} (expected approx or tiktoken).")
+
+
+def trim_description(text: str, max_tokens: int, counter: TokenCounter = approximate_tokens) -> str:
+    """Shorten ``text`` to about ``max_tokens``, dropping {noformat}/{code} log blocks before cutting prose."""
+    text = text.strip()
+    if max_tokens <= 0:
+        return ""
+    if counter(text) <= max_tokens:
+        return text
+
+    text = _BLANK_LINES.sub("\n", _LOG_BLOCK.sub(LOG_PLACEHOLDER, text))
+    if counter(text) <= max_tokens:
+        return text
+
+    # Longest prefix that fits, leaving one token for the ellipsis.
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if counter(text[:middle]) < max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip() + "…"
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int, batch: bool = False) -> float | None:
+    """List-price cost of a run in USD, or ``None`` for models without a known price.
+
+    ``batch`` prices the tokens at the Batch API's discount.
+    """
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    cost = (input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+    return cost * BATCH_PRICE_FACTOR if batch else cost
+
+
+class TokenUsage:
+    """Thread-safe tally of estimated versus API-reported tokens for one run."""
+
+    def __init__(self, counter: TokenCounter = approximate_tokens) -> None:
+        self.counter = counter
+        self.requests = 0
+        self.estimated = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._reported_estimate = 0
+        self._lock = threading.Lock()
+
+    def record(self, prompt: str, input_tokens: int | None, output_tokens: int | None) -> None:
+        """Count one request; pass ``None`` when the API did not report usage."""
+        estimate = self.counter(prompt)
+        with self._lock:
+            self.requests += 1
+            self.estimated += estimate
+            if input_tokens is not None:
+                self.input_tokens += input_tokens
+                self.output_tokens += output_tokens or 0
+                self._reported_estimate += estimate
+
+    def summary(self) -> str:
+        text = f"Tokens: {self.requests} requests, {self.estimated} prompt tokens estimated"
+        if not self._reported_estimate:
+            return text + "; the API reported no usage."
+        error = 100 * (self._reported_estimate - self.input_tokens) / max(self.input_tokens, 1)
+        return (
+            f"{text}; API reported {self.input_tokens} in / {self.output_tokens} out "
+            f"(estimate {error:+.1f}% vs. actual input)."
+        )
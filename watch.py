@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Keep a converter running and regenerate a directory's outputs whenever their inputs change.
+
+The converters' ``-watch <directory>`` mode. It saves the interpreter start-up
+and imports (lxml, openai, ...) that a cron job pays on every run. The directory
+is watched with inotify where the platform has it, and polled otherwise. A burst
+of events (an editor's save, a copy of many files) is debounced into one pass,
+and a pass converts only the inputs whose size or modification time changed. A
+small HTTP server on localhost reports the watcher's status and the last pass's
+timings as JSON.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+
+from batch import DEFAULT_DEBOUNCE_MS, DEFAULT_STATUS_PORT, Convert, convert_tasks
+
+POLL_SECONDS = 1.0
+
+# From <sys/inotify.h>: a finished write, a rename into or out of the directory, a deletion.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+
+Tasks = Callable[[Path], list[tuple[Path, Path]]]
+Signature = tuple[int, int]
+
+
+class InotifyWatcher:
+    """Wakes on file events in one directory, through libc's inotify calls (Linux only)."""
+
+    kind = "inotify"
+
+    def __init__(self, directory: Path) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout: float | None) -> bool:
+        """Block until an event arrives (True) or ``timeout`` seconds pass (False); drains pending events."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        # Which file changed doesn't matter: a pass compares every input's signature.
+        os.read(self.fd, 65536)
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Compares the directory listing's sizes and modification times every ``POLL_SECONDS``."""
+
+    kind = "polling"
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.snapshot = self.scan()
+
+    def scan(self) -> dict[str, Signature]:
+        snapshot: dict[str, Signature] = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout: float | None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            pause = POLL_SECONDS if deadline is None else min(POLL_SECONDS, deadline - time.monotonic())
+            if pause > 0:
+                time.sleep(pause)
+            snapshot = self.scan()
+            if snapshot != self.snapshot:
+                self.snapshot = snapshot
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self) -> None:
+        pass
+
+
+def make_watcher(directory: Path) -> InotifyWatcher | PollingWatcher:
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError, TypeError) as exc:
+            print(f"inotify unavailable ({exc}); polling {directory} every {POLL_SECONDS:g}s instead.")
+    return PollingWatcher(directory)
+
+
+def signature(path: Path) -> Signature | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class WatchStatus:
+    """What the status endpoint reports; updated by the watch loop, read by the HTTP thread."""
+
+    def __init__(self, directory: Path, watcher: str) -> None:
+        self.lock = threading.Lock()
+        self.data: dict = {
+            "directory": str(directory.resolve()),
+            "watcher": watcher,
+            "pid": os.getpid(),
+            "started_at": now(),
+            "state": "starting",
+            "passes": 0,
+            "files_converted": 0,
+            "failures": 0,
+            "last_pass": None,
+        }
+
+    def update(self, **changes: object) -> None:
+        with self.lock:
+            self.data.update(changes)
+
+    def record_pass(self, started_at: str, seconds: float, files: list[dict]) -> None:
+        with self.lock:
+            self.data["passes"] += 1
+            self.data["files_converted"] += len(files)
+            self.data["failures"] += sum(1 for item in files if item["error"] is not None)
+            self.data["last_pass"] = {"started_at": started_at, "seconds": round(seconds, 4), "files": files}
+
+    def as_json(self) -> bytes:
+        with self.lock:
+            return json.dumps(self.data, indent=2).encode("utf-8") + b"\n"
+
+
+def serve_status(status: WatchStatus, port: int) -> ThreadingHTTPServer | None:
+    """Serve ``GET /status`` on localhost from a daemon thread; ``None`` if the port can't be bound."""
+
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") not in ("", "/status"):
+                self.send_error(404)
+                return
+            body = status.as_json()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), StatusHandler)
+    except OSError as exc:
+        print(f"Status endpoint disabled: cannot listen on 127.0.0.1:{port} ({exc}).")
+        return None
+    threading.Thread(target=server.serve_forever, name="watch-status", daemon=True).start()
+    print(f"Status at http://127.0.0.1:{server.server_address[1]}/status")
+    return server
+
+
+def stale_on_start(input_path: Path, output_path: Path) -> bool:
+    """Whether the first pass must convert ``input_path``: its output is missing or older."""
+    output = signature(output_path)
+    source = signature(input_path)
+    return output is None or source is None or output[1] < source[1]
+
+
+def watch(
+    directory: Path,
+    tasks_for: Tasks,
+    convert: Convert,
+    jobs: int = 1,
+    executor: str = "process",
+    debounce_ms: int = DEFAULT_DEBOUNCE_MS,
+    port: int = DEFAULT_STATUS_PORT,
+) -> None:
+    """Convert ``tasks_for(directory)`` whenever their inputs change, until interrupted.
+
+    The first pass converts the inputs whose output is missing or older than the
+    input. Each later pass converts the inputs that are new or whose size or
+    modification time changed, and runs ``debounce_ms`` after the last of a burst
+    of events. Inputs are converted in this process (modules stay imported)
+    unless ``jobs`` > 1.
+    """
+    watcher = make_watcher(directory)
+    status = WatchStatus(directory, watcher.kind)
+    server = serve_status(status, port)
+    seen: dict[Path, Signature | None] = {}
+
+    def run_pass(first: bool) -> None:
+        tasks = tasks_for(directory)
+        current = {input_path: signature(input_path) for input_path, _ in tasks}
+        if first:
+            due = [task for task in tasks if stale_on_start(*task)]
+        else:
+            due = [task for task in tasks if seen.get(task[0]) != current[task[0]]]
+        seen.clear()
+        seen.update(current)
+        if not due:
+            return
+        started_at = now()
+        started = time.perf_counter()
+        status.update(state="converting")
+        results = convert_tasks(convert, due, jobs, executor)
+        elapsed = time.perf_counter() - started
+        files = [
+            {"input": str(input_path), "output": str(output_path), "seconds": round(seconds, 4), "error": error}
+            for (input_path, output_path), (error, seconds) in zip(due, results)
+        ]
+        status.record_pass(started_at, elapsed, files)
+        failed = [item for item in files if item["error"] is not None]
+        print(f"[{started_at}] Regenerated {len(due) - len(failed)} of {len(due)} files in {elapsed:.2f}s.")
+        for item in failed:
+            print(f"  FAILED {item['input']}: {item['error']}")
+
+    print(f"Watching {directory} ({watcher.kind}); press Ctrl+C to stop.")
+    try:
+        run_pass(first=True)
+        while True:
+            status.update(state="idle")
+            if not watcher.wait(None):
+                continue
+            # Wait out the rest of the burst before converting.
+            while watcher.wait(debounce_ms / 1000):
+                pass
+            run_pass(first=False)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    finally:
+        watcher.close()
+        if server is not None:
+            server.shutdown()